@@ -1,3 +1,7 @@
-from importlib.metadata import version
+from importlib.metadata import PackageNotFoundError, version
 
-__version__ = version("cookiecutter-data-science")
+try:
+    __version__ = version("cookiecutter-data-science")
+except PackageNotFoundError:
+    # imported from a checkout, e.g. by the copier post-generation task
+    __version__ = "unknown"
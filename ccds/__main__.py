@@ -1,49 +1,232 @@
-# Monkey-patch jinja to allow variables to not exist, which happens with sub-options
-import jinja2
+"""The ``ccds`` command line.
 
-jinja2.StrictUndefined = jinja2.Undefined
+Importing this module is cheap: jinja2 and cookiecutter are only imported and
+monkey-patched by :func:`install_patches` once a generation actually starts, so
+``ccds --version`` and the subcommands don't pay for them.
+"""
 
+import sys
+from functools import wraps
 
-# Monkey-patch cookiecutter to allow sub-items
-from cookiecutter import prompt
+from ccds import __version__
 
-from ccds.monkey_patch import prompt_for_config
+DEFAULT_TEMPLATE = "https://github.com/drivendataorg/cookiecutter-data-science"
+# the release tag of the installed ccds; when ccds is imported from a checkout
+# its version is unknown, and the template's default branch is used instead
+DEFAULT_CHECKOUT = None if __version__ == "unknown" else f"v{__version__}"
 
-prompt.prompt_for_config = prompt_for_config
+_patches_installed = False
 
 
-# monkey-patch context to point to ccds.json
-from cookiecutter import generate
+def install_patches():
+    """Monkey-patch jinja2 and cookiecutter for ccds templates, once."""
+    global _patches_installed
+    if _patches_installed:
+        return
 
-from ccds.monkey_patch import generate_context_wrapper
+    # Monkey-patch jinja to allow variables to not exist, which happens with sub-options
+    import jinja2
 
-generate.generate_context = generate_context_wrapper
+    jinja2.StrictUndefined = jinja2.Undefined
 
-# for use in tests need monkey-patched api main
-from cookiecutter import cli
-from cookiecutter import main as api_main  # noqa: F401 referenced by tests
+    # cookiecutter's environment binds StrictUndefined when it is imported
+    from cookiecutter import environment
 
-from ccds import __version__
+    environment.StrictUndefined = jinja2.Undefined
+
+    # Monkey-patch cookiecutter to allow sub-items
+    from cookiecutter import prompt
+
+    from ccds.monkey_patch import prompt_for_config
+
+    prompt.prompt_for_config = prompt_for_config
+
+    # monkey-patch context to point to ccds.json
+    from cookiecutter import generate
+
+    from ccds.monkey_patch import generate_context_wrapper
+
+    generate.generate_context = generate_context_wrapper
+
+    # monkey-patch the rendering environment to use a persistent bytecode cache
+    from ccds.monkey_patch import create_env_with_context_wrapper
+
+    generate.create_env_with_context = create_env_with_context_wrapper
+
+    # monkey-patch rendering to skip the subtrees the answers rule out
+    from ccds.monkey_patch import generate_file_wrapper, render_and_create_dir_wrapper
+
+    generate.generate_file = generate_file_wrapper
+    generate.render_and_create_dir = render_and_create_dir_wrapper
+
+    # monkey-patch hooks to run python hooks inside this interpreter
+    from cookiecutter import hooks
+
+    from ccds.hook_runner import run_script, run_script_with_context
+
+    hooks.run_script = run_script
+    hooks.run_script_with_context = run_script_with_context
+
+    # cookiecutter.main binds the patched functions when it is imported, which
+    # may have happened before (e.g. by importing the cookiecutter cli)
+    from cookiecutter import main as api_main
+
+    api_main.prompt_for_config = prompt_for_config
+    api_main.generate_context = generate_context_wrapper
+
+    # monkey-patch project generation to use the opt-in render cache
+    from ccds.monkey_patch import generate_files_wrapper
+
+    api_main.generate_files = generate_files_wrapper
+
+    _patches_installed = True
+
+
+def __getattr__(name):
+    # for use in tests need monkey-patched api main
+    if name == "api_main":
+        install_patches()
+        from cookiecutter import main as api_main
+
+        return api_main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def template_cache_callback(callback):
+    """Serve remote git templates from the local template cache."""
+
+    @wraps(callback)
+    def _callback(*, template, checkout, no_template_cache, **kwargs):
+        install_patches()
+        if template and not no_template_cache:
+            from cookiecutter.config import get_user_config
+
+            from ccds.template_cache import cached_template
+
+            config_dict = get_user_config(
+                config_file=kwargs["config_file"],
+                default_config=kwargs["default_config"],
+            )
+            template, checkout = cached_template(
+                template, checkout, config_dict["abbreviations"]
+            )
+        return callback(template=template, checkout=checkout, **kwargs)
+
+    return _callback
+
+
+def render_cache_callback(callback):
+    """Bypass the render cache for ``--no-render-cache``."""
+
+    @wraps(callback)
+    def _callback(*, no_render_cache, **kwargs):
+        if no_render_cache:
+            from ccds import render_cache
+
+            render_cache.disable()
+        return callback(**kwargs)
+
+    return _callback
 
 
 def default_ccds_main(f):
     """Set the default for the cookiecutter template argument to the CCDS template."""
 
     def _main(*args, **kwargs):
-        f.params[1].default = (
-            "https://github.com/drivendataorg/cookiecutter-data-science"
-        )
+        f.params[1].default = DEFAULT_TEMPLATE
         # Find the "checkout" option in the cookiecutter cli (currently the fifth)
         # Per #389, set this to the currently released version by default
         param_names = [p.name for p in f.params]
         checkout_index = param_names.index("checkout")
-        f.params[checkout_index].default = f"v{__version__}"
+        f.params[checkout_index].default = DEFAULT_CHECKOUT
+
+        import click
+
+        if "no_template_cache" not in param_names:
+            f.params.append(
+                click.Option(
+                    ["--no-template-cache"],
+                    is_flag=True,
+                    help="Clone remote templates directly instead of using "
+                    "the local template cache",
+                )
+            )
+            f.callback = template_cache_callback(f.callback)
+        if "no_render_cache" not in param_names:
+            f.params.append(
+                click.Option(
+                    ["--no-render-cache"],
+                    is_flag=True,
+                    help="Generate the project even if an identical one is in "
+                    "the render cache (enabled with CCDS_RENDER_CACHE=1)",
+                )
+            )
+            f.callback = render_cache_callback(f.callback)
         return f(*args, **kwargs)
 
     return _main
 
 
-main = default_ccds_main(cli.main)
+def cookiecutter_main(*args, **kwargs):
+    from cookiecutter import cli
+
+    return default_ccds_main(cli.main)(*args, **kwargs)
+
+
+def print_version():
+    """Print what ``cookiecutter --version`` prints, without importing its cli."""
+    import os
+
+    import cookiecutter
+
+    location = os.path.dirname(os.path.dirname(os.path.abspath(cookiecutter.__file__)))
+    print(
+        f"Cookiecutter {cookiecutter.__version__} from {location} "
+        f"(Python {sys.version})"
+    )
+
+
+def _batch_main(args):
+    from ccds.batch import batch
+
+    return batch.main(args, prog_name="ccds batch")
+
+
+def _archive_main(args):
+    from ccds.archive import archive
+
+    return archive.main(args, prog_name="ccds archive")
+
+
+def _cache_main(args):
+    from ccds.template_cache import cache
+
+    return cache.main(args, prog_name="ccds cache")
+
+
+def _serve_main(args):
+    from ccds.serve import serve
+
+    return serve.main(args, prog_name="ccds serve")
+
+
+# ccds-specific subcommands, selected by the first command line argument;
+# anything else is passed through to the cookiecutter command line
+SUBCOMMANDS = {
+    "archive": _archive_main,
+    "batch": _batch_main,
+    "cache": _cache_main,
+    "serve": _serve_main,
+}
+
+
+def main(*args, **kwargs):
+    argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+    if argv in (["--version"], ["-V"]):
+        return print_version()
+    return cookiecutter_main(*args, **kwargs)
 
 
 if __name__ == "__main__":
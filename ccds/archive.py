@@ -0,0 +1,262 @@
+"""Generate projects straight into a zip or tar archive.
+
+:func:`cookiecutter_archive` is :func:`cookiecutter.main.cookiecutter` for
+projects that are served rather than kept: the project is rendered in memory
+with :func:`ccds.render.render_project_tree`, which applies the post-generation
+steps to the in-memory tree, and streamed into a file-like object. Nothing is
+written to disk, so a web service can answer a download without a temporary
+directory. ``ccds archive`` does the same from the command line, writing the
+archive to a file or to stdout.
+"""
+
+import io
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from contextlib import contextmanager, redirect_stdout
+
+import click
+from cookiecutter import generate
+from cookiecutter.find import find_template
+
+from ccds import __main__ as ccds_main
+from ccds.batch import load_template, project_context
+from ccds.render import render_project_tree, render_tree
+
+FORMATS = ("zip", "tar", "tar.gz")
+
+_DIR_MODE = 0o755
+_FILE_MODE = 0o644
+
+
+def _entries(tree, prefix):
+    """``(path, data)`` for every directory (data None) and file of ``tree``,
+    parents first.
+    """
+    entries = [(path, None) for path in tree.dirs if path != "."]
+    entries += list(tree.files.items())
+    return [
+        (f"{prefix}/{path}" if prefix else path, data) for path, data in sorted(entries)
+    ]
+
+
+def write_archive(tree, fileobj, format="zip", prefix=""):
+    """Write the files and directories of the MemoryTree ``tree`` into
+    ``fileobj``, below the directory ``prefix``.
+
+    ``fileobj`` only needs a ``write`` method: archives are written as a
+    stream, so it may be a pipe, a socket or stdout.
+    """
+    if format not in FORMATS:
+        raise ValueError(
+            f"Unknown archive format {format!r}, expected one of {FORMATS}"
+        )
+    mtime = time.time()
+    entries = _entries(tree, prefix)
+    if prefix:
+        entries.insert(0, (prefix, None))
+
+    if format == "zip":
+        date_time = time.localtime(mtime)[:6]
+        with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path, data in entries:
+                if data is None:
+                    info = zipfile.ZipInfo(path + "/", date_time)
+                    info.external_attr = (0o040000 | _DIR_MODE) << 16 | 0x10
+                    zf.writestr(info, b"")
+                else:
+                    info = zipfile.ZipInfo(path, date_time)
+                    info.external_attr = (0o100000 | _FILE_MODE) << 16
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    zf.writestr(info, data)
+        return
+
+    mode = "w|gz" if format == "tar.gz" else "w|"
+    with tarfile.open(fileobj=fileobj, mode=mode) as tf:
+        for path, data in entries:
+            info = tarfile.TarInfo(path)
+            info.mtime = mtime
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                info.mode = _DIR_MODE
+                tf.addfile(info)
+            else:
+                info.mode = _FILE_MODE
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+
+
+def project_name(loaded, context, env):
+    """The name of the project directory ``context`` renders."""
+    template_dir = find_template(loaded.repo_dir, env)
+    return env.from_string(os.path.basename(template_dir)).render(**context)
+
+
+def archive_project(
+    loaded, extra_context, fileobj, format="zip", accept_hooks=True, env=None
+):
+    """Render one project of an already loaded template into an archive in
+    ``fileobj``; return the name of its top-level directory.
+
+    With ``accept_hooks``, the post-generation steps of the ccds hook are
+    applied in memory; the template's own hooks are never run. ``env`` is
+    passed on to :func:`ccds.render.render_tree`.
+    """
+    context = project_context(loaded, extra_context)
+    if env is None:
+        env = generate.create_env_with_context(context)
+    if accept_hooks:
+        tree = render_project_tree(loaded.repo_dir, context, env)
+    else:
+        tree = render_tree(loaded.repo_dir, context, env)
+    name = project_name(loaded, context, env)
+    write_archive(tree, fileobj, format, prefix=name)
+    return name
+
+
+def cookiecutter_archive(
+    template,
+    fileobj,
+    format="zip",
+    checkout=None,
+    extra_context=None,
+    directory=None,
+    accept_hooks=True,
+    use_template_cache=True,
+):
+    """Generate a project from ``template`` into an archive in ``fileobj``,
+    without prompting; return the name of its top-level directory.
+    """
+    # the template's own hooks never run, pre_prompt included; accept_hooks only
+    # applies the ccds post-generation steps, in memory
+    loaded = load_template(
+        template,
+        checkout=checkout,
+        directory=directory,
+        accept_hooks=False,
+        use_template_cache=use_template_cache,
+    )
+    try:
+        return archive_project(
+            loaded, extra_context or {}, fileobj, format, accept_hooks
+        )
+    finally:
+        loaded.cleanup()
+
+
+@contextmanager
+def _archive_stdout():
+    """A binary file on stdout for the archive, while everything else printed
+    meanwhile goes to stderr -- at the file descriptor level, so that the
+    output of subprocesses (e.g. pip, when locking dependencies) does too.
+    """
+    stdout = sys.stdout
+    try:
+        stdout.fileno()
+    except (AttributeError, OSError):
+        # not backed by a file descriptor (e.g. click's test runner), so only
+        # Python code can write to it
+        with redirect_stdout(sys.stderr):
+            yield stdout.buffer
+        stdout.flush()
+        return
+
+    stdout.flush()
+    saved_fd = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with os.fdopen(os.dup(saved_fd), "wb") as fileobj:
+            with redirect_stdout(sys.stderr):
+                yield fileobj
+    finally:
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+
+
+def _parse_extra_context(ctx, param, value):
+    extra_context = {}
+    for item in value:
+        key, sep, val = item.partition("=")
+        if not sep:
+            raise click.BadParameter(
+                f"EXTRA_CONTEXT should contain key=value, got {item!r}"
+            )
+        extra_context[key] = val
+    return extra_context
+
+
+@click.command()
+@click.argument("template", required=False, default=ccds_main.DEFAULT_TEMPLATE)
+@click.argument("extra_context", nargs=-1, callback=_parse_extra_context)
+@click.option(
+    "-c",
+    "--checkout",
+    default=None,
+    help="branch, tag or commit to checkout after git clone "
+    "(defaults to the installed ccds release for the default template)",
+)
+@click.option(
+    "--directory",
+    help="Directory within repo that holds cookiecutter.json file "
+    "for advanced repositories with multi templates in it",
+)
+@click.option(
+    "-f",
+    "--format",
+    "format_",
+    type=click.Choice(FORMATS),
+    default=None,
+    help="Archive format (defaults to the extension of --output, or zip)",
+)
+@click.option(
+    "-o",
+    "--output",
+    default="-",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="File to write the archive to, - for stdout",
+)
+@click.option(
+    "--accept-hooks",
+    type=click.Choice(["yes", "no"]),
+    default="yes",
+    help="Apply the post-generation steps",
+)
+@click.option(
+    "--no-template-cache",
+    is_flag=True,
+    help="Clone remote templates directly instead of using the local template cache",
+)
+def archive(
+    template,
+    extra_context,
+    checkout,
+    directory,
+    format_,
+    output,
+    accept_hooks,
+    no_template_cache,
+):
+    """Generate a project from TEMPLATE, without prompting, into a zip or tar
+    archive instead of a directory.
+
+    EXTRA_CONTEXT is a list of key=value answers, as for cookiecutter.
+    """
+    if format_ is None:
+        format_ = next((f for f in FORMATS if output.endswith("." + f)), "zip")
+    if checkout is None and template == ccds_main.DEFAULT_TEMPLATE:
+        checkout = ccds_main.DEFAULT_CHECKOUT
+
+    # anything printed while generating would corrupt an archive on stdout
+    with _archive_stdout() if output == "-" else open(output, "wb") as fileobj:
+        cookiecutter_archive(
+            template,
+            fileobj,
+            format=format_,
+            checkout=checkout,
+            extra_context=extra_context,
+            directory=directory,
+            accept_hooks=accept_hooks == "yes",
+            use_template_cache=not no_template_cache,
+        )
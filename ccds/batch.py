@@ -0,0 +1,301 @@
+"""Generate many projects from one template in a single process.
+
+The template is resolved (cloned if remote) and its ``ccds.json`` context is
+parsed once; every entry of the manifest is then rendered from copies of that
+context, optionally on a pool of worker processes.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import click
+from cookiecutter.config import get_user_config
+from cookiecutter.generate import apply_overwrites_to_context
+from cookiecutter.hooks import run_pre_prompt_hook
+from cookiecutter.repository import determine_repo_dir
+from cookiecutter.utils import rmtree
+
+from ccds import __main__ as ccds_main
+from ccds.monkey_patch import (
+    generate_context_wrapper,
+    generate_files_wrapper,
+    prompt_for_config,
+)
+from ccds.template_cache import cached_template
+
+
+@dataclass
+class LoadedTemplate:
+    """A template whose repository and context have been resolved once."""
+
+    template: str
+    checkout: Optional[str]
+    repo_dir: str
+    context: dict
+    cleanup_dirs: list = field(default_factory=list)
+
+    def cleanup(self):
+        for path in self.cleanup_dirs:
+            rmtree(path)
+        self.cleanup_dirs = []
+
+
+@dataclass
+class BatchResult:
+    """Outcome of rendering a single manifest entry."""
+
+    name: str
+    project_dir: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def load_manifest(path):
+    """Read a list of ``extra_context`` dicts from a JSON or YAML manifest.
+
+    The manifest is either a list of dicts or a mapping with a ``projects`` list.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+
+    if path.suffix in (".yml", ".yaml"):
+        import yaml
+
+        manifest = yaml.safe_load(text)
+    else:
+        manifest = json.loads(text)
+
+    if isinstance(manifest, dict):
+        manifest = manifest.get("projects")
+
+    if not isinstance(manifest, list) or not all(
+        isinstance(entry, dict) for entry in manifest
+    ):
+        raise click.BadParameter(
+            f"{path} must contain a list of extra_context mappings "
+            "(or a mapping with a 'projects' list)."
+        )
+    return manifest
+
+
+def load_template(
+    template, checkout=None, directory=None, accept_hooks=True, use_template_cache=True
+):
+    """Resolve the template repository and parse its context a single time."""
+    ccds_main.install_patches()
+    config_dict = get_user_config()
+    repo_template, repo_checkout = template, checkout
+    if use_template_cache:
+        repo_template, repo_checkout = cached_template(
+            template, checkout, config_dict["abbreviations"]
+        )
+
+    base_repo_dir, cleanup_base = determine_repo_dir(
+        template=repo_template,
+        abbreviations=config_dict["abbreviations"],
+        clone_to_dir=config_dict["cookiecutters_dir"],
+        checkout=repo_checkout,
+        no_input=True,
+        directory=directory,
+    )
+    repo_dir = (
+        str(run_pre_prompt_hook(base_repo_dir)) if accept_hooks else base_repo_dir
+    )
+
+    cleanup_dirs = []
+    if repo_dir != base_repo_dir:
+        cleanup_dirs.append(repo_dir)
+    if cleanup_base:
+        cleanup_dirs.append(base_repo_dir)
+
+    context = generate_context_wrapper(
+        context_file=os.path.join(repo_dir, "cookiecutter.json"),
+        default_context=config_dict["default_context"],
+        extra_context=None,
+    )
+    return LoadedTemplate(template, checkout, repo_dir, context, cleanup_dirs)
+
+
+def _entry_name(index, extra_context):
+    for key in ("repo_name", "project_name"):
+        if extra_context.get(key):
+            return str(extra_context[key])
+    return f"project-{index}"
+
+
+def project_context(loaded, extra_context, output_dir="."):
+    """The context of one project of an already loaded template, without prompting."""
+    context = deepcopy(loaded.context)
+    apply_overwrites_to_context(context["cookiecutter"], extra_context)
+
+    # same bookkeeping as cookiecutter.main.cookiecutter
+    context["_cookiecutter"] = {
+        k: v for k, v in context["cookiecutter"].items() if not k.startswith("_")
+    }
+    context["cookiecutter"].update(prompt_for_config(context, no_input=True))
+    context["cookiecutter"]["_template"] = loaded.template
+    context["cookiecutter"]["_output_dir"] = os.path.abspath(output_dir)
+    context["cookiecutter"]["_repo_dir"] = loaded.repo_dir
+    context["cookiecutter"]["_checkout"] = loaded.checkout
+    return context
+
+
+def render_project(
+    loaded, extra_context, output_dir=".", overwrite_if_exists=False, accept_hooks=True
+):
+    """Render one project from an already loaded template; return its directory."""
+    # worker processes may not have imported the cli that installs the patches
+    ccds_main.install_patches()
+    context = project_context(loaded, extra_context, output_dir)
+
+    return generate_files_wrapper(
+        repo_dir=loaded.repo_dir,
+        context=context,
+        output_dir=output_dir,
+        overwrite_if_exists=overwrite_if_exists,
+        accept_hooks=accept_hooks,
+    )
+
+
+# template shared by the worker processes, set once per worker by the initializer
+_worker_template = None
+
+
+def _init_worker(loaded):
+    global _worker_template
+    _worker_template = loaded
+
+
+def _render_entry(index, extra_context, output_dir, overwrite_if_exists):
+    name = _entry_name(index, extra_context)
+    try:
+        project_dir = render_project(
+            _worker_template, extra_context, output_dir, overwrite_if_exists
+        )
+    except Exception as err:  # report every failure, keep rendering the rest
+        return BatchResult(name, error=f"{type(err).__name__}: {err}")
+    return BatchResult(name, project_dir=str(project_dir))
+
+
+def run_batch(
+    loaded, manifest, output_dir=".", workers=None, overwrite_if_exists=False
+):
+    """Render every manifest entry and return one ``BatchResult`` per entry.
+
+    Results are returned in manifest order. With ``workers=1`` all projects are
+    rendered in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [
+        (index, extra_context, output_dir, overwrite_if_exists)
+        for index, extra_context in enumerate(manifest)
+    ]
+
+    if workers == 1 or len(jobs) <= 1:
+        _init_worker(loaded)
+        return [_render_entry(*job) for job in jobs]
+
+    # cookiecutter renders relative to the working directory (os.chdir), so
+    # concurrent renders need separate processes rather than threads
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)),
+        initializer=_init_worker,
+        initargs=(loaded,),
+    ) as executor:
+        futures = [executor.submit(_render_entry, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+@click.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.argument("template", required=False, default=ccds_main.DEFAULT_TEMPLATE)
+@click.option(
+    "-c",
+    "--checkout",
+    default=None,
+    help="branch, tag or commit to checkout after git clone "
+    "(defaults to the installed ccds release for the default template)",
+)
+@click.option(
+    "--directory",
+    help="Directory within repo that holds cookiecutter.json file "
+    "for advanced repositories with multi templates in it",
+)
+@click.option(
+    "-o",
+    "--output-dir",
+    default=".",
+    type=click.Path(),
+    help="Where to output the generated projects",
+)
+@click.option(
+    "-j",
+    "--workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of projects rendered concurrently (defaults to the CPU count)",
+)
+@click.option(
+    "-f",
+    "--overwrite-if-exists",
+    is_flag=True,
+    help="Overwrite the contents of the output directories if they already exist",
+)
+@click.option(
+    "--no-template-cache",
+    is_flag=True,
+    help="Clone remote templates directly instead of using the local template cache",
+)
+def batch(
+    manifest,
+    template,
+    checkout,
+    directory,
+    output_dir,
+    workers,
+    overwrite_if_exists,
+    no_template_cache,
+):
+    """Render every project described in MANIFEST from TEMPLATE.
+
+    MANIFEST is a JSON or YAML list of extra_context mappings, one per project.
+    """
+    entries = load_manifest(manifest)
+    if checkout is None and template == ccds_main.DEFAULT_TEMPLATE:
+        checkout = ccds_main.DEFAULT_CHECKOUT
+
+    loaded = load_template(
+        template,
+        checkout=checkout,
+        directory=directory,
+        use_template_cache=not no_template_cache,
+    )
+    try:
+        results = run_batch(
+            loaded,
+            entries,
+            output_dir=output_dir,
+            workers=workers,
+            overwrite_if_exists=overwrite_if_exists,
+        )
+    finally:
+        loaded.cleanup()
+
+    for result in results:
+        if result.ok:
+            click.echo(f"ok      {result.name} -> {result.project_dir}")
+        else:
+            click.echo(f"FAILED  {result.name}: {result.error}", err=True)
+
+    failed = sum(not result.ok for result in results)
+    click.echo(f"{len(results) - failed} succeeded, {failed} failed")
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,84 @@
+"""Persistent Jinja bytecode cache for the files of the project template.
+
+Every bake creates a fresh Jinja environment, so without a bytecode cache each
+template file is lexed, parsed and compiled again on every run. Compiled
+templates are stored under ``$CCDS_CACHE_DIR/bytecode`` keyed by the hash of
+the template source, the ccds version, the enabled Jinja extensions and the
+environment options that change the compiled code, such as the delimiters or
+``trim_blocks`` a template sets in ``_jinja2_env_vars``.
+Set ``CCDS_NO_BYTECODE_CACHE=1`` to disable it.
+"""
+
+import hashlib
+import os
+
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+from ccds import __version__
+from ccds.cache import cache_dir
+
+# the environment options Jinja compiles into the code of a template
+COMPILE_OPTIONS = (
+    "block_start_string",
+    "block_end_string",
+    "variable_start_string",
+    "variable_end_string",
+    "comment_start_string",
+    "comment_end_string",
+    "line_statement_prefix",
+    "line_comment_prefix",
+    "trim_blocks",
+    "lstrip_blocks",
+    "newline_sequence",
+    "keep_trailing_newline",
+    "optimized",
+    "is_async",
+    "autoescape",
+    "finalize",
+)
+
+
+def _option_value(value):
+    if callable(value):
+        # functions are named, as their repr differs between processes
+        name = getattr(value, "__qualname__", type(value).__qualname__)
+        return f"{getattr(value, '__module__', '')}.{name}"
+    return repr(value)
+
+
+def environment_key(environment):
+    """The extensions and compile options of ``environment``, as a string."""
+    options = [
+        f"{option}={_option_value(getattr(environment, option))}"
+        for option in COMPILE_OPTIONS
+    ]
+    return "\0".join(sorted(environment.extensions) + options)
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache keyed by template content rather than template path."""
+
+    def get_bucket(self, environment, name, filename, source):
+        key = hashlib.sha256(
+            "\0".join((__version__, environment_key(environment), name, source)).encode(
+                "utf-8"
+            )
+        ).hexdigest()
+        bucket = Bucket(environment, key, self.get_source_checksum(source))
+        self.load_bytecode(bucket)
+        return bucket
+
+
+_bytecode_caches = {}
+
+
+def get_bytecode_cache():
+    """Return the bytecode cache for the current cache directory, if enabled."""
+    if os.environ.get("CCDS_NO_BYTECODE_CACHE"):
+        return None
+
+    directory = str(cache_dir("bytecode"))
+    if directory not in _bytecode_caches:
+        _bytecode_caches[directory] = TemplateBytecodeCache(directory)
+    return _bytecode_caches[directory]
@@ -0,0 +1,228 @@
+"""Shared helpers for the persistent caches kept by ccds.
+
+Caches live under ``$CCDS_CACHE_DIR`` (default ``$XDG_CACHE_HOME/ccds`` or
+``~/.cache/ccds``), one subdirectory per kind of cache. Each cache keeps an
+``index.json`` with per-entry metadata used for least-recently-used eviction,
+updated under an exclusive lock on ``index.lock`` so that concurrent ccds
+processes do not lose each other's entries.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# directories below a cache root that no index entry accounts for are only
+# removed once they are this old, so that entries other processes are still
+# staging survive a prune
+ORPHAN_AGE = 60 * 60
+
+
+def cache_dir(*parts):
+    """Return (and create) a directory inside the ccds cache root."""
+    root = os.environ.get("CCDS_CACHE_DIR")
+    if not root:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        root = Path(xdg_cache) / "ccds"
+
+    path = Path(root, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def tree_size(path):
+    """Total size in bytes of the files below ``path``."""
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            # LK_LOCK gives up after ten seconds
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CacheIndex:
+    """JSON index of the entries stored in a cache directory.
+
+    Every entry is a directory ``root / key`` plus a metadata dict in
+    ``root / "index.json"`` that records at least its ``size`` and ``last_used``
+    time. Writes replace the index atomically, so it can always be read; every
+    read-modify-write holds :meth:`lock`.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.path = self.root / "index.json"
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_handle = None
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock on the index, across threads and processes.
+
+        The lock is re-entrant, so a caller can wrap a :meth:`load` and
+        :meth:`save` of its own around calls to the other methods.
+        """
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self.root.mkdir(parents=True, exist_ok=True)
+                handle = (self.root / "index.lock").open("a+b")
+                try:
+                    _lock_file(handle)
+                except BaseException:
+                    handle.close()
+                    raise
+                self._lock_handle = handle
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    _unlock_file(self._lock_handle)
+                    self._lock_handle.close()
+                    self._lock_handle = None
+
+    def load(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self, entries):
+        with self.lock():
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def entry_path(self, key):
+        return self.root / key
+
+    def get(self, key):
+        """Return the metadata of ``key`` if its entry still exists on disk."""
+        entry = self.load().get(key)
+        if entry is None or not self.entry_path(key).exists():
+            return None
+        return entry
+
+    def add(self, key, **metadata):
+        size = tree_size(self.entry_path(key))
+        with self.lock():
+            entries = self.load()
+            entry = entries.get(key, {})
+            entry.update(metadata)
+            entry["size"] = size
+            entry["last_used"] = time.time()
+            entries[key] = entry
+            self.save(entries)
+        return entry
+
+    def touch(self, key, **metadata):
+        with self.lock():
+            entries = self.load()
+            if key in entries:
+                entries[key].update(metadata)
+                entries[key]["last_used"] = time.time()
+                self.save(entries)
+
+    def remove(self, key):
+        with self.lock():
+            entries = self.load()
+            entries.pop(key, None)
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+            self.save(entries)
+
+    def _orphans(self, keys, directory=None, prefix=""):
+        """Directories below ``directory`` that hold no entry of ``keys``."""
+        directory = self.root if directory is None else directory
+        orphans = []
+        for path in directory.iterdir():
+            if not path.is_dir() or path.is_symlink():
+                continue
+            key = prefix + path.name
+            if key in keys:
+                continue
+            if any(k.startswith(key + "/") for k in keys):
+                # a parent of nested keys, such as the repository of a checkout
+                orphans += self._orphans(keys, path, key + "/")
+            else:
+                orphans.append(path)
+        return orphans
+
+    def prune(self, max_entries=None, max_bytes=None):
+        """Evict least recently used entries until both limits hold.
+
+        Index entries whose directory has disappeared are dropped as well, and
+        directories that no entry accounts for, left behind by an interrupted
+        run, are removed once they are :data:`ORPHAN_AGE` seconds old.
+        Returns the evicted keys.
+        """
+        with self.lock():
+            return self._prune(max_entries, max_bytes)
+
+    def _prune(self, max_entries, max_bytes):
+        entries = self.load()
+        removed = [key for key in entries if not self.entry_path(key).exists()]
+        for key in removed:
+            del entries[key]
+
+        if self.root.is_dir():
+            cutoff = time.time() - ORPHAN_AGE
+            for path in self._orphans(set(entries)):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+
+        by_age = sorted(entries, key=lambda key: entries[key].get("last_used", 0))
+        total = sum(entry.get("size", 0) for entry in entries.values())
+        count = len(entries)
+        for key in by_age:
+            too_many = max_entries is not None and count > max_entries
+            too_big = max_bytes is not None and total > max_bytes
+            if not (too_many or too_big):
+                break
+            total -= entries[key].get("size", 0)
+            count -= 1
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+            del entries[key]
+            removed.append(key)
+
+        self.save(entries)
+        return removed
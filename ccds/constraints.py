@@ -0,0 +1,159 @@
+"""Declarative option constraints from the ``_constraints`` section of ccds.json.
+
+Each entry maps a variable to the conditions under which it, or some of its
+options, apply::
+
+    "_constraints": {
+        "env_location": {"when": {"environment_manager": ["conda"]}},
+        "dependency_file": {
+            "options": {"environment.yml": {"environment_manager": ["conda"]}}
+        }
+    }
+
+A condition maps variables to the values they must have; all of them have to
+match. A variable whose ``when`` condition does not hold is not asked for and
+takes its default, the first option declared in ccds.json whatever the extra
+context asks for, and an option whose condition does not hold is not offered. The table is compiled once into predicates, which the prompt
+loop, the test matrices and :meth:`Constraints.enumerate` evaluate.
+"""
+
+from collections import OrderedDict
+
+
+def _option_name(option):
+    """The name of a choice option; choices with sub-items are named by their key."""
+    if isinstance(option, dict):
+        return next(iter(option))
+    return option
+
+
+def declared_defaults(context):
+    """The default of every variable of a ccds.json context: the first option of
+    a choice, the value itself otherwise.
+    """
+    return {
+        key: _option_name(value[0]) if isinstance(value, list) and value else value
+        for key, value in context.items()
+        if not key.startswith("_")
+    }
+
+
+def _always(answers):
+    return True
+
+
+def _compile_condition(condition, defaults):
+    """Compile ``{variable: [values]}`` into a predicate over the answers so far.
+
+    Variables that have not been answered yet are taken at their default.
+    """
+    checks = tuple(
+        (variable, frozenset(values), defaults.get(variable))
+        for variable, values in condition.items()
+    )
+
+    def predicate(answers):
+        for variable, values, default in checks:
+            if _option_name(answers.get(variable, default)) not in values:
+                return False
+        return True
+
+    return predicate
+
+
+class Constraints:
+    """Compiled constraint table for the variables of a ccds.json context."""
+
+    def __init__(self, table, defaults=None):
+        defaults = dict(defaults or {})
+        self.defaults = defaults
+        self._when = {}
+        self._options = {}
+        self._dependencies = {}
+
+        for variable, spec in table.items():
+            references = set(spec.get("when", {}))
+            if "when" in spec:
+                self._when[variable] = _compile_condition(spec["when"], defaults)
+            if "options" in spec:
+                self._options[variable] = {
+                    option: _compile_condition(condition, defaults)
+                    for option, condition in spec["options"].items()
+                }
+                for condition in spec["options"].values():
+                    references.update(condition)
+            references.discard(variable)
+            self._dependencies[variable] = tuple(sorted(references))
+
+    @classmethod
+    def from_context(cls, context):
+        """Compile the ``_constraints`` table of a ccds.json context."""
+        return cls(context.get("_constraints", {}), declared_defaults(context))
+
+    def dependencies(self, variable):
+        """Variables that ``variable``'s constraints refer to."""
+        return self._dependencies.get(variable, ())
+
+    def applies(self, variable, answers):
+        """Whether ``variable`` is asked for, given the answers so far."""
+        when = self._when.get(variable)
+        return when is None or when(answers)
+
+    def options(self, variable, options, answers):
+        """The options of ``variable`` that are allowed by the answers so far."""
+        conditions = self._options.get(variable)
+        if not conditions:
+            return options
+        return [
+            option
+            for option in options
+            if conditions.get(_option_name(option), _always)(answers)
+        ]
+
+    def allowed(self, variable, options, answers):
+        """The values ``variable`` may take: its options, or only the default
+        when it does not apply.
+        """
+        if not self.applies(variable, answers):
+            return options[:1]
+        return self.options(variable, options, answers)
+
+    def is_valid(self, config):
+        """Whether every value in ``config`` is allowed by the others."""
+        for variable, value in config.items():
+            name = _option_name(value)
+            if variable in self._when and not self._when[variable](config):
+                if name != self.defaults.get(variable):
+                    return False
+            condition = self._options.get(variable, {}).get(name)
+            if condition is not None and not condition(config):
+                return False
+        return True
+
+    def enumerate(self, fields, fixed=None):
+        """Yield every valid combination of the options in ``fields``.
+
+        ``fields`` maps variables to their candidate values and is searched
+        depth-first in its order, so branches that violate a constraint are
+        pruned as soon as the variables they depend on are assigned. A
+        variable's dependencies must precede it in ``fields`` or be given in
+        ``fixed``; combinations come out in the order of
+        ``itertools.product`` over ``fields``.
+        """
+        fields = list(fields.items())
+        answers = OrderedDict(fixed or {})
+
+        def search(depth):
+            if depth == len(fields):
+                yield OrderedDict(
+                    (variable, answers[variable]) for variable, _ in fields
+                )
+                return
+
+            variable, candidates = fields[depth]
+            for value in self.allowed(variable, list(candidates), answers):
+                answers[variable] = value
+                yield from search(depth + 1)
+            answers.pop(variable, None)
+
+        yield from search(0)
@@ -0,0 +1,83 @@
+"""Run cookiecutter hooks inside the running interpreter.
+
+Cookiecutter renders each hook to a temporary file and runs it with a new
+Python interpreter, which imports tomlkit, cookiecutter and ccds again for
+every project. Here Python hooks are rendered in memory, compiled and executed
+as ``__main__`` in a fresh namespace, with the working directory and
+``sys.argv`` set as they would be for the subprocess. Hooks in other languages,
+and every hook when ``CCDS_HOOK_SUBPROCESS=1`` is set, still run in a
+subprocess.
+"""
+
+import os
+import sys
+import traceback
+from pathlib import Path
+
+from cookiecutter import hooks
+from cookiecutter.exceptions import FailedHookException
+from cookiecutter.utils import create_env_with_context, work_in
+
+# cookiecutter's own runners, used as the fallback
+_run_script = hooks.run_script
+_run_script_with_context = hooks.run_script_with_context
+
+
+def _in_process(script_path):
+    return str(script_path).endswith(".py") and not os.environ.get(
+        "CCDS_HOOK_SUBPROCESS"
+    )
+
+
+def _exit_status(code):
+    """The exit status of an interpreter stopped by ``SystemExit(code)``."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def exec_hook(source, script_path, cwd="."):
+    """Execute the Python ``source`` of a hook as ``__main__`` from ``cwd``.
+
+    Raises FailedHookException like a hook subprocess exiting with an error.
+    """
+    namespace = {"__name__": "__main__", "__file__": str(script_path)}
+    argv = sys.argv
+    sys.argv = [str(script_path)]
+    try:
+        with work_in(cwd):
+            exec(compile(source, str(script_path), "exec"), namespace)
+    except SystemExit as exc:
+        exit_status = _exit_status(exc.code)
+        if exit_status != 0:
+            msg = f"Hook script failed (exit status: {exit_status})"
+            raise FailedHookException(msg) from exc
+    except Exception as err:
+        # what the interpreter would print before exiting with an error
+        traceback.print_exc()
+        raise FailedHookException(f"Hook script failed (error: {err})") from err
+    finally:
+        sys.argv = argv
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def run_script(script_path, cwd="."):
+    """Replacement for ``cookiecutter.hooks.run_script``."""
+    if not _in_process(script_path):
+        return _run_script(script_path, cwd)
+    exec_hook(Path(script_path).read_text(encoding="utf-8"), script_path, cwd)
+
+
+def run_script_with_context(script_path, cwd, context):
+    """Replacement for ``cookiecutter.hooks.run_script_with_context``."""
+    if not _in_process(script_path):
+        return _run_script_with_context(script_path, cwd, context)
+
+    contents = Path(script_path).read_text(encoding="utf-8")
+    env = create_env_with_context(context)
+    source = env.from_string(contents).render(**context)
+    exec_hook(source, script_path, cwd)
@@ -1,19 +1,17 @@
+import os
 from pathlib import Path
-from shutil import copytree
 from tempfile import TemporaryDirectory
-from urllib.request import urlretrieve
-from zipfile import ZipFile
 
 from cookiecutter.vcs import clone
 
+from ccds.overlay import MANIFEST_NAME, apply_overlay
+from ccds.overlay_cache import OverlayCache, apply_zip_overlay
+
 
 def write_custom_config(user_input_config):
     if not user_input_config:
         return
 
-    tmp = TemporaryDirectory()
-    tmp_zip = None
-
     print(user_input_config)
 
     # if not absolute, test if local path relative to parent of created directory
@@ -22,30 +20,57 @@ def write_custom_config(user_input_config):
     else:
         test_path = Path(user_input_config)
 
-    # check if user passed a local path
+    # check if user passed a local path; only the files that differ from the
+    # generated project are written
     if test_path.exists() and test_path.is_dir():
-        local_path = test_path
+        apply_overlay(test_path, ".")
 
-    elif test_path.exists() and test_path.endswith(".zip"):
-        tmp_zip = test_path
+    # local and remote zips are extracted once into the overlay cache
+    elif test_path.exists() and test_path.suffix == ".zip":
+        apply_zip_overlay(test_path)
 
     # check if user passed a url to a zip
     elif user_input_config.startswith("http") and (
         user_input_config.split(".")[-1] in ["zip"]
     ):
-        tmp_zip, _ = urlretrieve(user_input_config)
+        apply_zip_overlay(user_input_config)
 
     # assume it is a VCS uri and try to clone
     else:
-        clone(user_input_config, clone_to_dir=tmp)
-        local_path = tmp
+        with TemporaryDirectory() as tmp:
+            clone(user_input_config, clone_to_dir=tmp)
+            apply_overlay(tmp, ".")
+
 
-    if tmp_zip:
-        with ZipFile(tmp_zip, "r") as zipf:
-            zipf.extractall(tmp)
-            local_path = tmp
+def _read_dir(source):
+    files = {}
+    for dirpath, _dirnames, filenames in os.walk(source):
+        for name in filenames:
+            path = Path(dirpath, name)
+            relative = path.relative_to(source).as_posix()
+            if relative != MANIFEST_NAME:
+                files[relative] = path.read_bytes()
+    return files
 
-    # write whatever the user supplied into the project
-    copytree(local_path, ".")
 
-    tmp.cleanup()
+def read_custom_config(user_input_config, base="."):
+    """The files of a custom config overlay, by relative POSIX path, for a
+    project generated in memory; relative paths are resolved against ``base``.
+    """
+    if not user_input_config.startswith("/"):
+        test_path = Path(base) / user_input_config
+    else:
+        test_path = Path(user_input_config)
+
+    if test_path.exists() and test_path.is_dir():
+        return _read_dir(test_path)
+    elif test_path.exists() and test_path.suffix == ".zip":
+        return _read_dir(OverlayCache().resolve_local(test_path))
+    elif user_input_config.startswith("http") and (
+        user_input_config.split(".")[-1] in ["zip"]
+    ):
+        return _read_dir(OverlayCache().resolve_url(user_input_config))
+    else:
+        with TemporaryDirectory() as tmp:
+            clone(user_input_config, clone_to_dir=tmp)
+            return _read_dir(tmp)
@@ -1,5 +1,17 @@
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
 import tomlkit
 
+# the packages the template installs for each option, as listed in the docs;
+# the dependency files themselves are rendered by the template
+
 packages = [
     "python-dotenv",
 ]
@@ -19,6 +31,15 @@ basic = [
     "scikit-learn",
 ]
 
+# on top of basic
+performance = [
+    "duckdb",
+    "joblib",
+    "numba",
+    "polars",
+    "pyarrow",
+]
+
 scaffold = [
     "typer",
     "loguru",
@@ -60,6 +81,78 @@ def resolve_python_version_specifier(python_version):
     return f"{operator}{resolved_python_version}"
 
 
+def _archive_hash(download_info):
+    """The sha256 of a distribution from a pip installation report."""
+    archive_info = download_info.get("archive_info", {})
+    if "sha256" in archive_info.get("hashes", {}):
+        return archive_info["hashes"]["sha256"]
+    if archive_info.get("hash", "").startswith("sha256="):
+        return archive_info["hash"][len("sha256=") :]
+
+    # pip doesn't always report the hash of a local file
+    url = urlparse(download_info["url"])
+    if url.scheme != "file":
+        raise ValueError(f"no sha256 reported for {download_info['url']}")
+    return hashlib.sha256(Path(url2pathname(url.path)).read_bytes()).hexdigest()
+
+
+def lock_requirements(requirements, python_version, index_url=None, find_links=None):
+    """Resolve ``requirements`` once for ``python_version`` with pip.
+
+    Nothing is installed: pip only reports what it would install. Unless the
+    running interpreter is that Python version, only wheels are considered,
+    since pip can't build source distributions for another interpreter. With
+    ``find_links`` and no ``index_url`` the resolution is done against that
+    directory (a local wheelhouse) alone.
+
+    Returns sorted ``(name, version, sha256)`` tuples.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        requirements_in = Path(tmp) / "requirements.in"
+        requirements_in.write_text("\n".join(requirements) + "\n")
+        report = Path(tmp) / "report.json"
+
+        command = [sys.executable, "-m", "pip", "install", "--dry-run", "--quiet"]
+        command += ["--ignore-installed", "--report", str(report)]
+        running_version = "{}.{}".format(*sys.version_info[:2])
+        if python_version.split(".")[:2] != running_version.split("."):
+            # --target is never written to with --dry-run, but pip only accepts
+            # a --python-version for installations into a target directory
+            command += ["--target", str(Path(tmp) / "target")]
+            command += ["--python-version", python_version, "--only-binary=:all:"]
+        if index_url:
+            command += ["--index-url", index_url]
+        if find_links:
+            command += ["--find-links", find_links]
+            if not index_url:
+                command.append("--no-index")
+        command += ["-r", str(requirements_in)]
+
+        subprocess.run(command, check=True)
+        installs = json.loads(report.read_text())["install"]
+
+    return sorted(
+        (
+            item["metadata"]["name"],
+            item["metadata"]["version"],
+            _archive_hash(item["download_info"]),
+        )
+        for item in installs
+    )
+
+
+def format_lockfile(locked, python_version):
+    """A requirements file pinning ``locked``, for ``pip install --require-hashes``."""
+    lines = [
+        f"# Resolved by ccds for Python {python_version}; install with",
+        "#   pip install --no-deps --require-hashes -r requirements.lock",
+        "# and then the project itself with pip install --no-deps -e .",
+    ]
+    for name, version, sha256 in locked:
+        lines += [f"{name}=={version} \\", f"    --hash=sha256:{sha256}"]
+    return "\n".join(lines) + "\n"
+
+
 def write_python_version(python_version):
     with open("pyproject.toml", "r") as f:
         doc = tomlkit.parse(f.read())
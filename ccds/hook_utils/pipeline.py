@@ -0,0 +1,279 @@
+"""Post-generation steps shared by the cookiecutter and copier hooks.
+
+Both hooks collect the answers they need into a dict of options and call
+:func:`run_post_gen` from the root of the generated project. Only the files of
+the selected options are rendered (see :mod:`ccds.subtrees`); the first step
+still removes the others, for templates rendered without the ccds patches, and
+the rest do what rendering cannot. They run in order; ``pyproject.toml`` is
+parsed into a tomlkit document the first time a step needs it, every step
+changes that document in memory, and it is written once at the end. A custom
+config overlay may replace ``pyproject.toml``, so when one is given the
+document is written before the overlay is applied and parsed again afterwards.
+
+The steps only change the project through its tree (see
+:mod:`ccds.hook_utils.tree`), so they apply equally to a project on disk and to
+one rendered in memory.
+
+Set ``CCDS_HOOK_TIMINGS=1`` to print how long each step took. When the
+dependencies are locked, ``CCDS_LOCK_INDEX_URL`` and ``CCDS_LOCK_FIND_LINKS``
+set the package index or local wheelhouse they are resolved against.
+"""
+
+import os
+import sys
+import time
+
+import tomlkit
+
+from ccds.hook_utils.dependencies import (
+    format_lockfile,
+    lock_requirements,
+    resolve_python_version_specifier,
+)
+from ccds.hook_utils.tree import DiskTree
+
+# the answers the steps need, as the hooks pass them
+OPTION_KEYS = [
+    "linting_and_formatting",
+    "testing_framework",
+    "docs",
+    "dependency_file",
+    "environment_manager",
+    "python_version_number",
+    "custom_config",
+    "open_source_license",
+    "include_code_scaffold",
+    "module_name",
+    "docker_support",
+    "lock_dependencies",
+]
+
+# the environment managers that install from requirements.lock, as in the
+# lock_dependencies constraint of ccds.json
+LOCKING_MANAGERS = ("uv", "virtualenv")
+
+# the variants of the tests and docs folders, each in a folder of its own
+TEST_VARIANTS = ("pytest", "unittest")
+DOCS_VARIANTS = ("mkdocs",)
+
+
+class PostGenProject:
+    """A generated project and its ``pyproject.toml`` document.
+
+    The project is the directory ``root``, unless another ``tree`` is given.
+    """
+
+    def __init__(self, root=".", tree=None):
+        self.tree = tree if tree is not None else DiskTree(root)
+        self._pyproject = None
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def pyproject(self):
+        """The parsed ``pyproject.toml``, or None if the project has none."""
+        if self._pyproject is None and self.tree.exists("pyproject.toml"):
+            self._pyproject = tomlkit.parse(self.tree.read_text("pyproject.toml"))
+            self.reads += 1
+        return self._pyproject
+
+    def write_pyproject(self):
+        """Write the document if it was parsed, and forget it."""
+        if self._pyproject is None:
+            return
+        # Make single quotes prettier
+        # Jinja tojson escapes single-quotes with \u0027 since it's meant for HTML/JS
+        text = tomlkit.dumps(self._pyproject).replace(r"\u0027", "'")
+        self.tree.write_text("pyproject.toml", text)
+        self._pyproject = None
+        self.writes += 1
+
+
+def remove_unselected(project, options):
+    # ccds does not render these in the first place (see the _subtrees of
+    # ccds.json), but a template rendered without its patches -- by plain
+    # cookiecutter, or by copier without the _exclude list -- has them all;
+    # removing them is a no-op otherwise
+    tree = project.tree
+    if options["linting_and_formatting"] == "ruff":
+        tree.remove("setup.cfg")
+
+    if options["testing_framework"] == "none":
+        tree.remove("tests")
+    for variant in TEST_VARIANTS:
+        if variant != options["testing_framework"]:
+            tree.remove(f"tests/{variant}")
+    for variant in DOCS_VARIANTS:
+        if variant != options["docs"]:
+            tree.remove(f"docs/{variant}")
+
+    # see docs/docs/env-management.md for the dependency file matrix
+    if options["dependency_file"] != "environment.yml":
+        tree.remove("environment.yml")
+    if options["dependency_file"] in ("pyproject.toml", "environment.yml"):
+        tree.remove("requirements.txt")
+        tree.remove("requirements-dev.txt")
+    elif options["environment_manager"] == "none":
+        # no environment manager means no dev dependencies
+        tree.remove("requirements-dev.txt")
+
+    if options["open_source_license"] == "No license file":
+        tree.remove("LICENSE")
+
+    module = options["module_name"]
+    if options["include_code_scaffold"] == "No" and tree.is_dir(module):
+        # an empty package; its __init__.py is blank by template
+        for name in tree.listdir(module):
+            if name != "__init__.py":
+                tree.remove(f"{module}/{name}")
+
+    if options["docker_support"] == "No":
+        tree.remove("docker")
+
+
+def _select_variant(project, path, variant):
+    # only the selected variant is rendered (see the _subtrees of ccds.json);
+    # its contents replace the folder it was rendered in
+    subpath = f"{path}/{variant}"
+    if project.tree.is_dir(subpath):
+        project.tree.move_contents(subpath, path)
+        project.tree.remove(subpath)
+
+
+def select_tests(project, options):
+    _select_variant(project, "tests", options["testing_framework"])
+
+
+def select_docs(project, options):
+    _select_variant(project, "docs", options["docs"])
+
+
+def set_python_version(project, options):
+    doc = project.pyproject
+    if doc is not None:
+        doc["project"]["requires-python"] = resolve_python_version_specifier(
+            options["python_version_number"]
+        )
+
+
+def apply_custom_config(project, options):
+    if not options.get("custom_config"):
+        return
+    from ccds.hook_utils.custom_config import read_custom_config, write_custom_config
+
+    # the overlay may bring its own pyproject.toml, which replaces ours
+    project.write_pyproject()
+    if not isinstance(project.tree, DiskTree):
+        # relative overlays are found from the working directory, which is
+        # where a project generated on disk would be created
+        for path, data in read_custom_config(options["custom_config"]).items():
+            project.tree.write_bytes(path, data)
+        return
+    cwd = os.getcwd()
+    os.chdir(project.tree.root)
+    try:
+        write_custom_config(options["custom_config"])
+    finally:
+        os.chdir(cwd)
+
+
+def _project_requirements(project, options):
+    """The requirements of the project and its dev tools, without the project."""
+    if options["dependency_file"] == "pyproject.toml":
+        doc = project.pyproject["project"]
+        extras = doc.get("optional-dependencies", {})
+        return list(doc.get("dependencies", [])) + list(extras.get("dev", []))
+
+    requirements = []
+    for name in ("requirements.txt", "requirements-dev.txt"):
+        if project.tree.exists(name):
+            lines = project.tree.read_text(name).splitlines()
+            requirements += [
+                line.strip()
+                for line in lines
+                if line.strip() and not line.lstrip().startswith(("#", "-"))
+            ]
+    return requirements
+
+
+def lock_dependencies(project, options):
+    # resolve once now, so that creating the environment installs the pinned
+    # versions from requirements.lock without resolving them again
+    if options.get("lock_dependencies") != "Yes":
+        return
+    if options["environment_manager"] not in LOCKING_MANAGERS:
+        return
+    locked = lock_requirements(
+        _project_requirements(project, options),
+        options["python_version_number"],
+        index_url=os.environ.get("CCDS_LOCK_INDEX_URL"),
+        find_links=os.environ.get("CCDS_LOCK_FIND_LINKS"),
+    )
+    project.tree.write_text(
+        "requirements.lock",
+        format_lockfile(locked, options["python_version_number"]),
+    )
+
+
+def write_pyproject(project, options):
+    # parse it now if only the custom config overlay needed the file on disk,
+    # so that its single quotes are made prettier as well
+    if project.pyproject is not None:
+        project.write_pyproject()
+
+
+def clean_copier_files(project, options):
+    project.tree.remove(".ipynb_checkpoints")
+
+    # Rename .copier-answers.yml.jinja to .copier-answers.yml
+    # (needed because _templates_suffix: "" doesn't strip .jinja suffix)
+    if project.tree.exists(".copier-answers.yml.jinja"):
+        project.tree.remove(".copier-answers.yml")
+        project.tree.rename(".copier-answers.yml.jinja", ".copier-answers.yml")
+
+
+STEPS = [
+    ("unselected", remove_unselected),
+    ("tests", select_tests),
+    ("docs", select_docs),
+    ("python_version", set_python_version),
+    ("custom_config", apply_custom_config),
+    ("lock_dependencies", lock_dependencies),
+    ("write_pyproject", write_pyproject),
+    ("copier_files", clean_copier_files),
+]
+
+
+def print_timings(timings, file=None):
+    file = file or sys.stderr
+    total = sum(seconds for _, seconds in timings)
+    width = max(len(name) for name, _ in timings)
+    print("post-generation steps:", file=file)
+    for name, seconds in timings:
+        print(f"  {name:<{width}}  {seconds * 1000:8.2f} ms", file=file)
+    print(f"  {'total':<{width}}  {total * 1000:8.2f} ms", file=file)
+
+
+def options_from_context(cookiecutter):
+    """The options of :func:`run_post_gen` from a cookiecutter context, as the
+    cookiecutter hook renders them.
+    """
+    return {key: str(cookiecutter.get(key, "")) for key in OPTION_KEYS}
+
+
+def run_post_gen(options, root=".", tree=None):
+    """Run every post-generation step on the project at ``root``, or on
+    ``tree`` if one is given.
+
+    Returns ``(step, seconds)`` for each step in the order they ran.
+    """
+    project = PostGenProject(root, tree)
+    timings = []
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step(project, options)
+        timings.append((name, time.perf_counter() - start))
+
+    if os.environ.get("CCDS_HOOK_TIMINGS"):
+        print_timings(timings)
+    return timings
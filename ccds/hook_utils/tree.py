@@ -0,0 +1,147 @@
+"""The file operations the post-generation steps perform on a project.
+
+:class:`DiskTree` applies them to a directory, as the hooks do after
+cookiecutter or copier have written the project. :class:`MemoryTree` applies
+them to a mapping of relative POSIX paths to file contents, so that a project
+rendered in memory can go through the same steps without touching the disk.
+"""
+
+import shutil
+from pathlib import Path, PurePosixPath
+
+
+def _key(path):
+    """Normalize a relative path to the POSIX form MemoryTree is keyed by."""
+    return PurePosixPath(path).as_posix()
+
+
+class DiskTree:
+    """A generated project in the directory ``root``."""
+
+    def __init__(self, root="."):
+        self.root = Path(root)
+
+    def _path(self, path):
+        return self.root / path
+
+    def exists(self, path):
+        return self._path(path).exists()
+
+    def is_dir(self, path):
+        return self._path(path).is_dir()
+
+    def listdir(self, path):
+        return [child.name for child in self._path(path).iterdir()]
+
+    def read_text(self, path):
+        return self._path(path).read_text()
+
+    def write_text(self, path, text):
+        self._path(path).write_text(text)
+
+    def remove(self, path):
+        path = self._path(path)
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        elif path.exists() or path.is_symlink():
+            path.unlink()
+
+    def rename(self, src, dst):
+        self._path(src).rename(self._path(dst))
+
+    def move_contents(self, subpath, path):
+        """Move everything in ``subpath`` up into ``path``, replacing what is there."""
+        for name in self.listdir(subpath):
+            self.remove(f"{path}/{name}")
+            shutil.move(str(self._path(subpath) / name), str(self._path(path)))
+
+
+class MemoryTree:
+    """A generated project held in memory.
+
+    ``files`` maps relative POSIX paths to bytes; ``dirs`` holds every
+    directory, including empty ones, with ``"."`` for the project root.
+    """
+
+    def __init__(self, files=None, dirs=()):
+        self.files = {}
+        self.dirs = {"."}
+        for path in dirs:
+            self.add_dir(path)
+        for path, data in (files or {}).items():
+            self.write_bytes(path, data)
+
+    def add_dir(self, path):
+        path = PurePosixPath(_key(path))
+        self.dirs.update(
+            parent.as_posix() for parent in (path, *path.parents) if parent.parts
+        )
+
+    def exists(self, path):
+        path = _key(path)
+        return path in self.files or path in self.dirs
+
+    def is_dir(self, path):
+        return _key(path) in self.dirs
+
+    def _under(self, path):
+        """Every file and directory below ``path``."""
+        prefix = "" if path == "." else path + "/"
+        return [key for key in (*self.files, *self.dirs) if key.startswith(prefix)]
+
+    def listdir(self, path):
+        path = _key(path)
+        if path not in self.dirs:
+            raise NotADirectoryError(path)
+        prefix = "" if path == "." else path + "/"
+        return sorted(
+            {
+                key[len(prefix) :].split("/", 1)[0]
+                for key in self._under(path)
+                if key != "."
+            }
+        )
+
+    def read_bytes(self, path):
+        return self.files[_key(path)]
+
+    def read_text(self, path):
+        return self.read_bytes(path).decode("utf-8")
+
+    def write_bytes(self, path, data):
+        path = _key(path)
+        self.add_dir(PurePosixPath(path).parent)
+        self.files[path] = data
+
+    def write_text(self, path, text):
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def remove(self, path):
+        path = _key(path)
+        self.files.pop(path, None)
+        if path in self.dirs:
+            for key in self._under(path):
+                self.files.pop(key, None)
+                self.dirs.discard(key)
+            self.dirs.discard(path)
+
+    def rename(self, src, dst):
+        src, dst = _key(src), _key(dst)
+        if src in self.files:
+            self.write_bytes(dst, self.files.pop(src))
+            return
+        for key in self._under(src):
+            moved = dst + key[len(src) :]
+            if key in self.files:
+                self.write_bytes(moved, self.files.pop(key))
+            else:
+                self.add_dir(moved)
+                self.dirs.discard(key)
+        self.add_dir(dst)
+        self.dirs.discard(src)
+
+    def move_contents(self, subpath, path):
+        """Move everything in ``subpath`` up into ``path``, replacing what is there."""
+        for name in self.listdir(subpath):
+            self.remove(f"{path}/{name}")
+            self.rename(f"{subpath}/{name}", f"{path}/{name}")
@@ -1,34 +1,169 @@
+import heapq
+import json
+import os
+import re
 from collections import OrderedDict
 from pathlib import Path
 
 from cookiecutter.environment import StrictEnvironment
 from cookiecutter.exceptions import UndefinedVariableInTemplate
-from cookiecutter.generate import generate_context
+from cookiecutter.find import find_template
+from cookiecutter.generate import (
+    generate_context,
+    generate_file,
+    generate_files,
+    render_and_create_dir,
+)
 from cookiecutter.prompt import (
-    prompt_choice_for_config,
     read_user_choice,
+    read_user_dict,
     read_user_variable,
     render_variable,
 )
+from cookiecutter.utils import create_env_with_context
 from jinja2.exceptions import UndefinedError
 
+from ccds import render_cache
+from ccds.bytecode_cache import get_bytecode_cache
+from ccds.constraints import Constraints, declared_defaults
+from ccds.raw_files import copy_raw_file, raw_hashes, read_raw_file
+from ccds.subtrees import excluded_paths, is_excluded, template_path
+
+_REFERENCE_RE = re.compile(r"cookiecutter\.(\w+)")
+
+# resolution plans for the contexts seen so far, keyed by their JSON dump
+_PLAN_CACHE_SIZE = 64
+_plan_cache = {}
+
+# the defaults declared in ccds.json, kept by generate_context_wrapper in the
+# context before the extra context moves other options to the front
+DEFAULTS_KEY = "_ccds_defaults"
+
+
+def _render(env, raw, cookiecutter_dict):
+    """render_variable, skipping Jinja entirely for plain strings."""
+    if isinstance(raw, str) and "{" not in raw:
+        return raw
+    return render_variable(env, raw, cookiecutter_dict)
+
+
+def _variable_kind(key, raw):
+    if key.startswith("_"):
+        return "private"
+    if isinstance(raw, list):
+        if raw and isinstance(raw[0], dict):
+            return "choice_with_subitems"
+        return "choice"
+    if isinstance(raw, dict):
+        return "dict"
+    return "variable"
+
+
+def _resolution_order(items, constraints):
+    """Order the variables so that each comes after the variables it refers to.
+
+    Ties keep the declaration order of ccds.json, so prompts appear in the same
+    order as before; variables in a dependency cycle keep their declared order.
+    """
+    keys = list(items)
+    position = {key: index for index, key in enumerate(keys)}
+    non_dict_keys = {key for key, raw in items.items() if not isinstance(raw, dict)}
+
+    dependencies = {}
+    for key, raw in items.items():
+        if key.startswith("_"):
+            dependencies[key] = set()
+            continue
+
+        text = raw if isinstance(raw, str) else json.dumps(raw, default=str)
+        refs = set(_REFERENCE_RE.findall(text))
+        # constrained options depend on variables they do not reference
+        refs.update(constraints.dependencies(key))
+        if isinstance(raw, dict):
+            # dict keys and values may refer to any other variable
+            refs.update(non_dict_keys)
+        dependencies[key] = {ref for ref in refs if ref in position and ref != key}
+
+    dependents = {key: [] for key in keys}
+    for key, refs in dependencies.items():
+        for ref in refs:
+            dependents[ref].append(key)
+
+    waiting = {key: len(refs) for key, refs in dependencies.items()}
+    ready = [position[key] for key in keys if not waiting[key]]
+    heapq.heapify(ready)
 
-def _prompt_choice_and_subitems(cookiecutter_dict, env, key, options, no_input):
+    order = []
+    while ready:
+        key = keys[heapq.heappop(ready)]
+        order.append(key)
+        for dependent in dependents[key]:
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                heapq.heappush(ready, position[dependent])
+
+    resolved = set(order)
+    order.extend(key for key in keys if key not in resolved)
+    return order
+
+
+def _build_resolution_plan(items):
+    constraints = Constraints.from_context(items)
+    steps = []
+    for key in _resolution_order(items, constraints):
+        raw = items[key]
+        kind = _variable_kind(key, raw)
+
+        choice_index = None
+        if kind == "choice_with_subitems":
+            # choice name -> sub-item, so a selection is a dict lookup
+            choice_index = OrderedDict(
+                (name, subitem) for option in raw for name, subitem in option.items()
+            )
+        steps.append((key, kind, raw, choice_index))
+    return constraints, steps
+
+
+def _resolution_plan(items):
+    """Return the cached resolution plan for a context's variables.
+
+    The plan is the compiled ``_constraints`` table and the list of
+    ``(key, kind, raw, choice_index)`` steps in dependency order.
+    """
+    cache_key = json.dumps(items, default=str)
+    plan = _plan_cache.get(cache_key)
+    if plan is None:
+        if len(_plan_cache) >= _PLAN_CACHE_SIZE:
+            _plan_cache.clear()
+        plan = _plan_cache[cache_key] = _build_resolution_plan(items)
+    return plan
+
+
+def _prompt_choice(cookiecutter_dict, env, key, options, no_input):
+    rendered_options = [_render(env, raw, cookiecutter_dict) for raw in options]
+    if no_input:
+        if not rendered_options:
+            raise ValueError("The list of choices is empty")
+        return rendered_options[0]
+    return read_user_choice(key, rendered_options)
+
+
+def _prompt_choice_and_subitems(cookiecutter_dict, env, key, choice_index, no_input):
     result = {}
 
     # first, get the selection
-    rendered_options = [
-        render_variable(env, list(raw.keys())[0], cookiecutter_dict) for raw in options
-    ]
+    rendered_options = [_render(env, name, cookiecutter_dict) for name in choice_index]
 
     if no_input:
         selected = rendered_options[0]
     else:
         selected = read_user_choice(key, rendered_options)
 
-    selected_item = [
-        list(c.values())[0] for c in options if list(c.keys())[0] == selected
-    ][0]
+    if selected in choice_index:
+        selected_item = choice_index[selected]
+    else:
+        # choice names are templates themselves; match on the rendered names
+        selected_item = dict(zip(rendered_options, choice_index.values()))[selected]
 
     result[selected] = {}
 
@@ -36,16 +171,14 @@ def _prompt_choice_and_subitems(cookiecutter_dict, env, key, options, no_input):
     if isinstance(selected_item, dict):
         for subkey, raw in selected_item.items():
             # We are dealing with a regular variable
-            val = render_variable(env, raw, cookiecutter_dict)
+            val = _render(env, raw, cookiecutter_dict)
 
             if not no_input:
                 val = read_user_variable(subkey, val)
 
             result[selected][subkey] = val
     elif isinstance(selected_item, list):
-        val = prompt_choice_for_config(
-            cookiecutter_dict, env, selected, selected_item, no_input
-        )
+        val = _prompt_choice(cookiecutter_dict, env, selected, selected_item, no_input)
         result[selected] = val
     elif isinstance(selected_item, str):
         result[selected] = selected_item
@@ -57,81 +190,78 @@ def prompt_for_config(context, no_input=False):
     """
     Prompts the user to enter new config, using context as a source for the
     field names and sample values.
+
+    Variables are resolved in a single pass, in dependency order, so each value
+    is rendered exactly once.
     :param no_input: Prompt the user at command line for manual configuration?
     """
     cookiecutter_dict = OrderedDict([])
     env = StrictEnvironment(context=context)
 
-    # First pass: Handle simple and raw variables, plus choices.
-    # These must be done first because the dictionaries keys and
-    # values might refer to them.
-    for key, raw in context["cookiecutter"].items():
-        if key.startswith("_"):
+    constraints, steps = _resolution_plan(context["cookiecutter"])
+    defaults = context.get(DEFAULTS_KEY, constraints.defaults)
+    for key, kind, raw, choice_index in steps:
+        if kind == "private":
             cookiecutter_dict[key] = raw
             continue
 
-        # Skip env_location for non-conda environments (only conda has global option)
-        if (
-            key == "env_location"
-            and cookiecutter_dict.get("environment_manager") != "conda"
-        ):
-            cookiecutter_dict[key] = "local"
-            continue
+        # Variables ruled out by the constraints in ccds.json (e.g. env_location
+        # for non-conda environments) take their declared default without
+        # prompting, even if the extra context asked for another value
+        ruled_out = not constraints.applies(key, cookiecutter_dict)
+        skip_prompt = no_input or ruled_out
+        if ruled_out and key in defaults:
+            default = defaults[key]
+            if kind == "choice_with_subitems" and default in choice_index:
+                choice_index = OrderedDict([(default, choice_index[default])])
+            elif kind == "choice":
+                raw = [option for option in raw if option == default] or raw
+            elif kind in ("dict", "variable"):
+                raw = default
 
         try:
-            if isinstance(raw, list):
-                if isinstance(raw[0], dict):
-                    val = _prompt_choice_and_subitems(
-                        cookiecutter_dict, env, key, raw, no_input
+            if kind == "choice_with_subitems":
+                allowed = constraints.options(
+                    key, list(choice_index), cookiecutter_dict
+                )
+                if len(allowed) < len(choice_index):
+                    choice_index = OrderedDict(
+                        (name, choice_index[name]) for name in allowed
                     )
-                    cookiecutter_dict[key] = val
-                else:
-                    # Filter dependency_file options: environment.yml only for conda
-                    if key == "dependency_file":
-                        if cookiecutter_dict.get("environment_manager") != "conda":
-                            raw = [opt for opt in raw if opt != "environment.yml"]
-
-                    # Skip docker_package_manager if docker_support is No
-                    if key == "docker_package_manager":
-                        if cookiecutter_dict.get("docker_support") != "Yes":
-                            cookiecutter_dict[key] = raw[0]  # Use default (uv)
-                            continue
-
-                    # We are dealing with a choice variable
-                    val = prompt_choice_for_config(
-                        cookiecutter_dict, env, key, raw, no_input
-                    )
-                    cookiecutter_dict[key] = val
-            elif not isinstance(raw, dict):
-                # We are dealing with a regular variable
-                val = render_variable(env, raw, cookiecutter_dict)
-
-                if not no_input:
-                    val = read_user_variable(key, val)
-
-                cookiecutter_dict[key] = val
-        except UndefinedError as err:
-            msg = "Unable to render variable '{}'".format(key)
-            raise UndefinedVariableInTemplate(msg, err, context)
+                val = _prompt_choice_and_subitems(
+                    cookiecutter_dict, env, key, choice_index, skip_prompt
+                )
+            elif kind == "choice":
+                # Drop the options ruled out by the constraints in ccds.json
+                # (e.g. environment.yml for non-conda environments)
+                raw = constraints.options(key, raw, cookiecutter_dict)
 
-    # Second pass; handle the dictionaries.
-    for key, raw in context["cookiecutter"].items():
-        try:
-            if isinstance(raw, dict):
+                # We are dealing with a choice variable
+                val = _prompt_choice(cookiecutter_dict, env, key, raw, skip_prompt)
+            elif kind == "dict":
                 # We are dealing with a dict variable
                 val = render_variable(env, raw, cookiecutter_dict)
 
-                if not no_input:
-                    val = read_user_dict(  # noqa: F821 referencable in patched context
-                        key, val
-                    )
+                if not skip_prompt:
+                    val = read_user_dict(key, val)
+            else:
+                # We are dealing with a regular variable
+                val = _render(env, raw, cookiecutter_dict)
+
+                if not skip_prompt:
+                    val = read_user_variable(key, val)
 
-                cookiecutter_dict[key] = val
+            cookiecutter_dict[key] = val
         except UndefinedError as err:
             msg = "Unable to render variable '{}'".format(key)
             raise UndefinedVariableInTemplate(msg, err, context)
 
-    return cookiecutter_dict
+    # report the variables in the order they are declared in
+    return OrderedDict(
+        (key, cookiecutter_dict[key])
+        for key in context["cookiecutter"]
+        if key in cookiecutter_dict
+    )
 
 
 def generate_context_wrapper(*args, **kwargs):
@@ -146,4 +276,116 @@ def generate_context_wrapper(*args, **kwargs):
     # replace key
     parsed_context["cookiecutter"] = parsed_context["ccds"]
     del parsed_context["ccds"]
+
+    with open(kwargs["context_file"], encoding="utf-8") as f:
+        parsed_context[DEFAULTS_KEY] = declared_defaults(json.load(f))
     return parsed_context
+
+
+def create_env_with_context_wrapper(context):
+    """Attach the persistent bytecode cache to the environment used for rendering
+    the template files, so repeated bakes skip lexing and compiling them.
+    """
+    env = create_env_with_context(context)
+    env.bytecode_cache = get_bytecode_cache()
+    return env
+
+
+# the subtrees excluded for the project being generated and the raw files of
+# its template, worked out once by generate_files_wrapper and passed down to
+# the wrappers below in the context
+EXCLUDED_KEY = "_ccds_excluded_subtrees"
+RAW_FILES_KEY = "_ccds_raw_files"
+
+
+def _excluded(context):
+    excluded = context.get(EXCLUDED_KEY)
+    if excluded is None:  # generate_files was called without the wrapper
+        excluded = excluded_paths(context["cookiecutter"])
+    return excluded
+
+
+def render_and_create_dir_wrapper(
+    dirname, context, output_dir, environment, overwrite_if_exists=False
+):
+    """Skip the directories ruled out by the ``_subtrees`` in ccds.json.
+
+    ``generate_files`` still walks into a skipped directory, but every file in
+    it is skipped by :func:`generate_file_wrapper`.
+    """
+    path = template_path(dirname)
+    if path is not None and is_excluded(path, _excluded(context)):
+        return Path(dirname), False
+    return render_and_create_dir(
+        dirname, context, output_dir, environment, overwrite_if_exists
+    )
+
+
+def generate_file_wrapper(project_dir, infile, context, env, skip_if_file_exists=False):
+    """Skip the files ruled out by the ``_subtrees`` in ccds.json, and copy the
+    files listed in its raw-file manifest instead of rendering them.
+    """
+    if is_excluded(infile, _excluded(context)):
+        return
+    data = read_raw_file(infile, context.get(RAW_FILES_KEY, {}))
+    if data is not None:
+        copy_raw_file(project_dir, infile, data, context, env, skip_if_file_exists)
+        return
+    generate_file(project_dir, infile, context, env, skip_if_file_exists)
+
+
+def generate_files_wrapper(
+    repo_dir,
+    context=None,
+    output_dir=".",
+    overwrite_if_exists=False,
+    skip_if_file_exists=False,
+    accept_hooks=True,
+    keep_project_on_failure=False,
+):
+    """Serve identical projects from the render cache, when it is enabled (see
+    :mod:`ccds.render_cache`), and work out the excluded subtrees of the
+    project once for all of its files.
+    """
+    kwargs = dict(
+        overwrite_if_exists=overwrite_if_exists,
+        skip_if_file_exists=skip_if_file_exists,
+        accept_hooks=accept_hooks,
+        keep_project_on_failure=keep_project_on_failure,
+    )
+    cookiecutter = (context or {}).get("cookiecutter", {})
+    context = dict(
+        context or {},
+        **{
+            EXCLUDED_KEY: excluded_paths(cookiecutter),
+            # with _new_lines every file is rendered to rewrite its newlines
+            RAW_FILES_KEY: (
+                {} if cookiecutter.get("_new_lines") else raw_hashes(repo_dir)
+            ),
+        },
+    )
+    if not (
+        render_cache.enabled()
+        and accept_hooks
+        and render_cache.is_cacheable(cookiecutter)
+    ):
+        return generate_files(repo_dir, context, output_dir, **kwargs)
+
+    env = create_env_with_context(context)
+    template_dir = find_template(repo_dir, env)
+    name = env.from_string(os.path.basename(template_dir)).render(**context)
+    # only whole projects are cached, not files generated into an existing one
+    if os.path.exists(os.path.join(output_dir, name)):
+        return generate_files(repo_dir, context, output_dir, **kwargs)
+
+    cache = render_cache.RenderCache()
+    key = render_cache.render_key(
+        render_cache.template_digest(repo_dir, template_dir), cookiecutter
+    )
+    cached = cache.lookup(key)
+    if cached is not None and cached.name == name:
+        return cache.materialize(cached, output_dir)
+
+    project_dir = generate_files(repo_dir, context, output_dir, **kwargs)
+    cache.store(key, project_dir)
+    return project_dir
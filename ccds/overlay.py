@@ -0,0 +1,152 @@
+"""Apply a custom config overlay to a generated project, writing only what differs.
+
+Each overlay file is compared with the file the template generated by size and
+then by hash, and only differing files are written. The result is recorded in
+``.ccds-overlay.json`` in the project, with the size, hash and modification
+time of every overlay file, so applying the overlay again skips files whose
+source and target did not change since without reading either of them.
+
+Files are written by reflinking them from the overlay where the filesystem
+supports it and copied otherwise, or hard-linked with
+``CCDS_OVERLAY_LINK=hardlink``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+MANIFEST_NAME = ".ccds-overlay.json"
+
+_CHUNK_SIZE = 1 << 16
+
+# ioctl request cloning a whole file on Linux (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src, dst):
+    import fcntl
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.unlink(dst)
+            raise
+
+
+class _FileWriter:
+    """Write files by hard link, reflink or copy, falling back to copying once
+    linking failed.
+    """
+
+    def __init__(self, mode=None):
+        self.mode = mode or os.environ.get("CCDS_OVERLAY_LINK", "reflink")
+        self.can_link = self.mode in ("reflink", "hardlink")
+
+    def write(self, src, dst):
+        # replace rather than write through files that may be links
+        if dst.is_symlink() or dst.exists():
+            dst.unlink()
+
+        if self.can_link:
+            try:
+                if self.mode == "hardlink":
+                    os.link(src, dst)
+                else:
+                    _reflink(src, dst)
+                return
+            except (OSError, ImportError):
+                # not supported here, don't try again for every file
+                self.can_link = False
+        shutil.copyfile(src, dst)
+
+
+def load_manifest(target):
+    try:
+        with (Path(target) / MANIFEST_NAME).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"files": {}}
+
+
+def _unchanged_since(recorded, source_stat, target_stat):
+    """Whether source and target are as recorded by the last application."""
+    return (
+        recorded is not None
+        and target_stat is not None
+        and source_stat.st_size == recorded["size"]
+        and source_stat.st_mtime_ns == recorded["source_mtime_ns"]
+        and target_stat.st_size == recorded["size"]
+        and target_stat.st_mtime_ns == recorded["mtime_ns"]
+    )
+
+
+def apply_overlay(source, target=".", mode=None):
+    """Write the files below ``source`` that differ from ``target`` into it.
+
+    ``mode`` is ``"reflink"`` (default), ``"hardlink"`` or ``"copy"``. Returns
+    the number of files written and left unchanged.
+    """
+    source, target = Path(source), Path(target)
+    previous = load_manifest(target)["files"]
+    writer = _FileWriter(mode)
+
+    files = {}
+    counts = {"written": 0, "unchanged": 0}
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames.sort()
+        relative_dir = Path(dirpath).relative_to(source)
+        (target / relative_dir).mkdir(parents=True, exist_ok=True)
+
+        for name in sorted(filenames):
+            relative = (relative_dir / name).as_posix()
+            if relative == MANIFEST_NAME:
+                continue
+            src = Path(dirpath, name)
+            dst = target / relative
+            source_stat = src.stat()
+            try:
+                target_stat = dst.stat()
+            except FileNotFoundError:
+                target_stat = None
+
+            recorded = previous.get(relative)
+            if _unchanged_since(recorded, source_stat, target_stat):
+                files[relative] = recorded
+                counts["unchanged"] += 1
+                continue
+
+            source_hash = _sha256_file(src)
+            if (
+                target_stat is not None
+                and target_stat.st_size == source_stat.st_size
+                and _sha256_file(dst) == source_hash
+            ):
+                counts["unchanged"] += 1
+            else:
+                writer.write(src, dst)
+                target_stat = dst.stat()
+                counts["written"] += 1
+
+            files[relative] = {
+                "size": source_stat.st_size,
+                "sha256": source_hash,
+                "mtime_ns": target_stat.st_mtime_ns,
+                "source_mtime_ns": source_stat.st_mtime_ns,
+            }
+
+    with (target / MANIFEST_NAME).open("w", encoding="utf-8") as f:
+        json.dump({"files": files}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return counts
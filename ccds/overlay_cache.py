@@ -0,0 +1,208 @@
+"""Persistent cache of custom config overlays distributed as zip files.
+
+Overlays are stored extracted, once per hash of the zip, under
+``$CCDS_CACHE_DIR/overlays``. Remote zips are revalidated with a conditional
+request carrying the ETag / Last-Modified of the previous download; local zips
+are looked up by path, modification time and size, so an unchanged file is not
+even read. The cached tree is applied to the project with
+:func:`ccds.overlay.apply_overlay`, which writes only the files that differ,
+reflinking them from the cache where the filesystem supports it.
+
+Hard links are only used with ``CCDS_OVERLAY_LINK=hardlink``: the post
+generation steps rewrite files such as ``pyproject.toml`` in place, which would
+also change the cached copy and every other project linked to it. Set
+``CCDS_NO_OVERLAY_CACHE=1`` to extract overlays straight into the project.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import zlib
+from pathlib import Path, PurePosixPath
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from zipfile import ZipFile
+
+from ccds.cache import CacheIndex, cache_dir
+from ccds.overlay import _sha256_file, apply_overlay
+
+DEFAULT_MAX_ENTRIES = 20
+
+_CHUNK_SIZE = 1 << 16
+
+
+def _member_path(name):
+    """Relative path of a zip member, or None if it would escape the target."""
+    path = PurePosixPath(name.replace("\\", "/"))
+    if path.is_absolute() or ".." in path.parts or not path.parts:
+        return None
+    return Path(*path.parts)
+
+
+def _same_crc(path, info):
+    """Whether the file at ``path`` has the size and CRC of zip member ``info``."""
+    try:
+        if path.stat().st_size != info.file_size:
+            return False
+    except FileNotFoundError:
+        return False
+    crc = 0
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc == info.CRC
+
+
+def stream_extract(archive, target, skip_identical=False):
+    """Extract the members of the zip ``archive`` into ``target`` one at a time.
+
+    With ``skip_identical``, members whose size and CRC match the file already
+    in ``target`` are not written.
+    """
+    target = Path(target)
+    with ZipFile(archive, "r") as zipf:
+        for info in zipf.infolist():
+            relative = _member_path(info.filename)
+            if relative is None:
+                continue
+
+            path = target / relative
+            if info.is_dir():
+                path.mkdir(parents=True, exist_ok=True)
+                continue
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if skip_identical and _same_crc(path, info):
+                continue
+            # replace rather than write through files that may be links
+            if path.is_symlink() or path.exists():
+                path.unlink()
+            with zipf.open(info) as src, path.open("wb") as dst:
+                shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+
+
+class OverlayCache:
+    """Extracted overlay zips keyed by the hash of their content."""
+
+    def __init__(self, root=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.index = CacheIndex(root or cache_dir("overlays"))
+        self.max_entries = max_entries
+
+    def _lookup(self, source):
+        """Return ``(key, validators)`` of the entry ``source`` last resolved to."""
+        for key, entry in self.index.load().items():
+            validators = entry.get("sources", {}).get(source)
+            if validators is not None and self.index.entry_path(key).exists():
+                return key, validators
+        return None, None
+
+    def _store(self, archive, digest, source, validators):
+        """Extract ``archive`` unless its content is cached already and record
+        that ``source`` resolves to it.
+        """
+        target = self.index.entry_path(digest)
+        staging = None
+        try:
+            if self.index.get(digest) is None:
+                staging = Path(tempfile.mkdtemp(prefix="extract-", dir=self.index.root))
+                stream_extract(archive, staging)
+
+            with self.index.lock():
+                if staging is not None and self.index.get(digest) is None:
+                    # first writer wins: a complete entry is never replaced,
+                    # and a directory the index does not know was left by an
+                    # interrupted run
+                    shutil.rmtree(target, ignore_errors=True)
+                    staging.rename(target)
+
+                entries = self.index.load()
+                for entry in entries.values():
+                    entry.get("sources", {}).pop(source, None)
+                self.index.save(entries)
+
+                sources = dict(entries.get(digest, {}).get("sources", {}))
+                sources[source] = validators
+                self.index.add(digest, sources=sources)
+                self.index.prune(max_entries=self.max_entries)
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+        return target
+
+    def resolve_local(self, path):
+        """Return the cached, extracted tree of the local zip at ``path``."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        validators = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+        key, known = self._lookup(str(path))
+        if key is not None and known == validators:
+            self.index.touch(key)
+            return self.index.entry_path(key)
+
+        return self._store(path, _sha256_file(path), str(path), validators)
+
+    def resolve_url(self, url):
+        """Return the cached, extracted tree of the zip at ``url``.
+
+        The server is asked whether the zip changed since the cached download;
+        when it cannot be reached the cached tree is used as is.
+        """
+        key, known = self._lookup(url)
+        headers = {}
+        if key is not None:
+            if known.get("etag"):
+                headers["If-None-Match"] = known["etag"]
+            if known.get("last_modified"):
+                headers["If-Modified-Since"] = known["last_modified"]
+
+        try:
+            response = urlopen(Request(url, headers=headers))
+        except HTTPError as err:
+            if err.code == 304 and key is not None:
+                self.index.touch(key)
+                return self.index.entry_path(key)
+            raise
+        except (URLError, OSError):
+            if key is None:
+                raise
+            self.index.touch(key)
+            return self.index.entry_path(key)
+
+        self.index.root.mkdir(parents=True, exist_ok=True)
+        fd, download = tempfile.mkstemp(suffix=".zip", dir=self.index.root)
+        try:
+            digest = hashlib.sha256()
+            with response, os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: response.read(_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+            return self._store(download, digest.hexdigest(), url, validators)
+        finally:
+            os.unlink(download)
+
+
+def apply_zip_overlay(zip_source, target="."):
+    """Write the overlay in the local or remote zip ``zip_source`` into ``target``."""
+    is_url = str(zip_source).startswith("http")
+
+    if os.environ.get("CCDS_NO_OVERLAY_CACHE"):
+        if not is_url:
+            stream_extract(zip_source, target, skip_identical=True)
+            return
+        with urlopen(zip_source) as response, tempfile.TemporaryFile() as download:
+            shutil.copyfileobj(response, download, _CHUNK_SIZE)
+            stream_extract(download, target, skip_identical=True)
+        return
+
+    overlay_cache = OverlayCache()
+    if is_url:
+        tree = overlay_cache.resolve_url(zip_source)
+    else:
+        tree = overlay_cache.resolve_local(zip_source)
+    apply_overlay(tree, target)
@@ -0,0 +1,165 @@
+"""Template files that are copied instead of rendered.
+
+A template file without Jinja syntax renders to its own contents, so rendering
+it only costs decoding, compiling and encoding. ``ccds-raw-files.json``, next to
+``ccds.json``, lists those files with their size and hash; it is built with the
+copier template (``copier/scripts/build_copier_template.py``), which fails when
+a file marked raw has gained template syntax since, and checked by the tests.
+
+While generating, the manifest is read once per project from the template's
+repository. A listed file whose content still has the recorded hash is written
+byte for byte and only its path is rendered; any other file is rendered, so a
+template edit that the manifest has not caught up with is never copied as is.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+
+MANIFEST_NAME = "ccds-raw-files.json"
+
+# the delimiters of Jinja blocks, variables and comments
+TEMPLATE_SYNTAX = (b"{{", b"{%", b"{#")
+
+
+def is_raw(data):
+    """Whether a template file renders to exactly ``data``.
+
+    Files with ``\\r`` are rendered, since cookiecutter rewrites their newlines.
+    """
+    if any(s in data for s in TEMPLATE_SYNTAX) or b"\r" in data:
+        return False
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def scan_template(template_dir):
+    """Size and sha256 of every raw file in ``template_dir``, by POSIX path."""
+    template_dir = Path(template_dir)
+    files = {}
+    for path in sorted(template_dir.rglob("*")):
+        if not path.is_file() or "__pycache__" in path.parts:
+            continue
+        data = path.read_bytes()
+        if is_raw(data):
+            files[path.relative_to(template_dir).as_posix()] = {
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+    return files
+
+
+def load_manifest(manifest_path):
+    path = Path(manifest_path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))["files"]
+
+
+def templated_raw_files(template_dir, manifest_path):
+    """The files marked raw in the manifest that now contain template syntax."""
+    template_dir = Path(template_dir)
+    return [
+        relative
+        for relative in load_manifest(manifest_path)
+        if (template_dir / relative).is_file()
+        and any(s in (template_dir / relative).read_bytes() for s in TEMPLATE_SYNTAX)
+    ]
+
+
+def build_manifest(template_dir, manifest_path, reclassify=False):
+    """Write the manifest of ``template_dir``; return the files it lists.
+
+    Raises ValueError, without writing, when files marked raw now contain
+    template syntax, unless ``reclassify`` is set.
+    """
+    templated = templated_raw_files(template_dir, manifest_path)
+    if templated and not reclassify:
+        raise ValueError(
+            "files marked raw now contain template syntax: " + ", ".join(templated)
+        )
+    files = scan_template(template_dir)
+    Path(manifest_path).write_text(
+        json.dumps({"files": files}, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+    return files
+
+
+def check_manifest(template_dir, manifest_path):
+    """List how the manifest is out of date; an empty list means it is current."""
+    templated = set(templated_raw_files(template_dir, manifest_path))
+    listed = load_manifest(manifest_path)
+    current = scan_template(template_dir)
+    problems = []
+    for relative in sorted(set(listed) | set(current)):
+        if relative in templated:
+            problems.append(f"Marked raw but contains template syntax: {relative}")
+        elif relative not in listed:
+            problems.append(f"Raw file not in manifest: {relative}")
+        elif relative not in current:
+            if (Path(template_dir) / relative).is_file():
+                problems.append(f"No longer raw: {relative}")
+            else:
+                problems.append(f"Raw file removed: {relative}")
+        elif listed[relative] != current[relative]:
+            problems.append(f"Raw file changed: {relative}")
+    return problems
+
+
+@lru_cache(maxsize=8)
+def _raw_hashes(manifest_path, mtime_ns):
+    return {
+        os.path.normpath(relative): entry["sha256"]
+        for relative, entry in load_manifest(manifest_path).items()
+    }
+
+
+def raw_hashes(repo_dir):
+    """The recorded sha256 of the raw files of the template in ``repo_dir``, by
+    their native path relative to the template directory.
+    """
+    manifest_path = os.path.join(repo_dir, MANIFEST_NAME)
+    try:
+        mtime_ns = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        return {}
+    return _raw_hashes(manifest_path, mtime_ns)
+
+
+def read_raw_file(infile, hashes):
+    """The contents of ``infile`` if it is listed and still has its recorded
+    hash, else None.
+    """
+    recorded = hashes.get(infile)
+    if recorded is None:
+        return None
+    with open(infile, "rb") as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != recorded:
+        return None
+    return data
+
+
+def copy_raw_file(project_dir, infile, data, context, env, skip_if_file_exists=False):
+    """``generate_file`` for a raw file: render its path, write its contents
+    ``data`` as they are.
+    """
+    outfile = infile
+    if "{" in infile:
+        outfile = env.from_string(infile).render(**context)
+    outfile = os.path.join(project_dir, outfile)
+    # a file whose name renders empty is skipped
+    if os.path.isdir(outfile):
+        return
+    if skip_if_file_exists and os.path.exists(outfile):
+        return
+    with open(outfile, "wb") as f:
+        f.write(data)
+    shutil.copymode(infile, outfile)
@@ -0,0 +1,119 @@
+"""Render a project into memory instead of onto the disk.
+
+:func:`render_tree` does what ``cookiecutter.generate.generate_files`` does with
+the ccds patches -- render the path and the contents of every template file,
+copy binary, raw (see :mod:`ccds.raw_files`) and ``_copy_without_render`` files
+as they are, keep the newlines of each template file, skip the ``_subtrees`` the
+answers rule out -- but into a :class:`~ccds.hook_utils.tree.MemoryTree`,
+without running the template's hooks. :func:`render_project_tree` then applies
+the post-generation steps of the ccds hook to that tree, which gives the files a
+generated project would have on disk (file permissions aside).
+"""
+
+import os
+
+from cookiecutter import generate
+from cookiecutter.find import find_template
+from cookiecutter.utils import work_in
+from jinja2 import FileSystemLoader
+
+from ccds import __main__ as ccds_main
+from ccds.hook_utils.pipeline import options_from_context, run_post_gen
+from ccds.hook_utils.tree import MemoryTree
+from ccds.raw_files import raw_hashes, read_raw_file
+from ccds.subtrees import excluded_paths, is_excluded
+
+
+def _newline(infile, context):
+    """The newline cookiecutter writes a rendered ``infile`` with."""
+    if context["cookiecutter"].get("_new_lines", False):
+        return context["cookiecutter"]["_new_lines"]
+    with open(infile, encoding="utf-8") as rd:
+        rd.readline()  # Read only the first line to load a 'newlines' value.
+    newline = rd.newlines[0] if isinstance(rd.newlines, tuple) else rd.newlines
+    return newline or os.linesep
+
+
+def _copy_dir(tree, indir, outdir):
+    for root, _dirs, files in os.walk(indir):
+        target = os.path.join(outdir, os.path.relpath(root, indir))
+        tree.add_dir(target)
+        for name in files:
+            with open(os.path.join(root, name), "rb") as f:
+                tree.write_bytes(os.path.join(target, name), f.read())
+
+
+def render_tree(repo_dir, context, env=None):
+    """Render the template in ``repo_dir`` with ``context`` into a MemoryTree.
+
+    Paths in the tree are relative to the generated project directory. ``env``
+    may be the environment of an earlier render of the same template, whose
+    compiled templates are then reused.
+    """
+    ccds_main.install_patches()
+    if env is None:
+        env = generate.create_env_with_context(context)
+    template_dir = find_template(repo_dir, env)
+
+    def render(path):
+        return os.path.normpath(env.from_string(path).render(**context))
+
+    excluded = excluded_paths(context["cookiecutter"])
+    hashes = {}
+    if not context["cookiecutter"].get("_new_lines"):
+        hashes = raw_hashes(repo_dir)
+    tree = MemoryTree()
+    with work_in(template_dir):
+        if env.loader is None:
+            env.loader = FileSystemLoader([".", "../templates"])
+
+        for root, dirs, files in os.walk("."):
+            render_dirs = []
+            for d in sorted(dirs):
+                indir = os.path.normpath(os.path.join(root, d))
+                if is_excluded(indir, excluded):
+                    continue
+                if generate.is_copy_only_path(indir, context):
+                    _copy_dir(tree, indir, render(indir))
+                else:
+                    render_dirs.append(d)
+
+            # only walk the rendered directories, like generate_files
+            dirs[:] = render_dirs
+            for d in dirs:
+                tree.add_dir(render(os.path.join(root, d)))
+
+            for f in sorted(files):
+                infile = os.path.normpath(os.path.join(root, f))
+                if is_excluded(infile, excluded):
+                    continue
+                outfile = render(infile)
+                # a file whose name renders empty is skipped
+                if tree.is_dir(outfile):
+                    continue
+
+                data = read_raw_file(infile, hashes)
+                if data is not None:
+                    tree.write_bytes(outfile, data)
+                    continue
+                if generate.is_copy_only_path(infile, context) or generate.is_binary(
+                    infile
+                ):
+                    with open(infile, "rb") as fh:
+                        tree.write_bytes(outfile, fh.read())
+                    continue
+
+                tmpl = env.get_template(infile.replace(os.path.sep, "/"))
+                rendered = tmpl.render(**context)
+                newline = _newline(infile, context)
+                if newline != "\n":
+                    rendered = rendered.replace("\n", newline)
+                tree.write_text(outfile, rendered)
+    return tree
+
+
+def render_project_tree(repo_dir, context, env=None):
+    """Render a ccds project in memory, post-generation steps included."""
+    tree = render_tree(repo_dir, context, env)
+    run_post_gen(options_from_context(context["cookiecutter"]), tree=tree)
+    return tree
@@ -0,0 +1,188 @@
+"""Opt-in cache of whole generated projects.
+
+With ``CCDS_RENDER_CACHE=1``, the first generation of a project stores the
+project, post-generation steps included, under ``$CCDS_CACHE_DIR/renders``.
+The entry is keyed by the digest of the template, of its hooks and of the ccds
+code the hooks run, the resolved answers and the date (templates may render
+it, e.g. the LICENSE year). A template served from the template cache is
+identified by its commit rather than by reading its files. A later identical
+request is written from the cache without rendering anything: files are
+reflinked where the filesystem supports it and copied otherwise, or hard-linked
+with ``CCDS_RENDER_CACHE_LINK=hardlink`` (only safe if nothing edits the
+generated files in place).
+
+Projects that depend on more than the answers are not cached: custom config
+overlays and locked dependencies, which are resolved against a package index.
+The cache keeps at most ``CCDS_RENDER_CACHE_MAX_SIZE`` MiB (default 256),
+evicting the least recently used projects; pass ``--no-render-cache`` to
+``ccds`` to bypass it for one run.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from ccds.cache import CacheIndex, cache_dir
+from ccds.overlay import _FileWriter
+from ccds.template_cache import TemplateCache
+
+DEFAULT_MAX_SIZE = 256  # MiB
+
+# bumped when the layout of the entries changes
+_FORMAT = 1
+
+# answers that only say where the template and the project are
+LOCATION_KEYS = frozenset({"_template", "_output_dir", "_repo_dir", "_checkout"})
+
+# set by ``ccds --no-render-cache``
+_disabled = False
+
+
+def disable():
+    global _disabled
+    _disabled = True
+
+
+def enabled():
+    return not _disabled and os.environ.get("CCDS_RENDER_CACHE", "") not in ("", "0")
+
+
+def is_cacheable(cookiecutter):
+    return not cookiecutter.get("custom_config") and (
+        cookiecutter.get("lock_dependencies") != "Yes"
+    )
+
+
+def _update_tree(digest, root, exclude=()):
+    root = Path(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in exclude)
+        relative_dir = Path(dirpath).relative_to(root).as_posix()
+        digest.update(f"d {relative_dir}\n".encode())
+        for name in sorted(filenames):
+            path = Path(dirpath, name)
+            digest.update(f"f {relative_dir}/{name} {path.stat().st_mode:o}\n".encode())
+            digest.update(path.read_bytes())
+
+
+@lru_cache(maxsize=None)
+def _package_digest():
+    """Digest of the ccds package the hooks import, once per process."""
+    digest = hashlib.sha256()
+    _update_tree(digest, Path(__file__).parent, exclude={"__pycache__"})
+    return digest.hexdigest()
+
+
+def template_digest(repo_dir, template_dir):
+    """Digest of everything a generated project is made from, besides the
+    answers: the template directory, the context and hook files next to it and
+    the ccds package the hooks import.
+
+    A checkout from the template cache stands for its commit, so its files are
+    not read again.
+    """
+    repo_dir = Path(repo_dir)
+    digest = hashlib.sha256(f"format {_FORMAT}\n".encode())
+    digest.update(f"ccds {_package_digest()}\n".encode())
+
+    checkout = TemplateCache().checkout_key(repo_dir)
+    if checkout is not None:
+        template = os.path.relpath(template_dir, repo_dir)
+        digest.update(f"checkout {checkout} {template}\n".encode())
+        return digest.hexdigest()
+
+    for name in ("ccds.json", "cookiecutter.json"):
+        if (repo_dir / name).is_file():
+            digest.update(f"{name}\n".encode())
+            digest.update((repo_dir / name).read_bytes())
+    for root in (Path(template_dir), repo_dir / "hooks"):
+        if root.is_dir():
+            _update_tree(digest, root, exclude={"__pycache__"})
+    return digest.hexdigest()
+
+
+def render_key(template_hash, cookiecutter):
+    """The cache key of a project; the answers that only locate the template
+    and the output (:data:`LOCATION_KEYS`) don't change what is generated.
+    """
+    answers = {k: v for k, v in cookiecutter.items() if k not in LOCATION_KEYS}
+    payload = json.dumps(
+        {
+            "template": template_hash,
+            "answers": answers,
+            "date": time.strftime("%Y-%m-%d", time.gmtime()),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def copy_tree(source, target, mode="copy"):
+    """Write the directories and files below ``source`` into ``target``."""
+    source, target = Path(source), Path(target)
+    writer = _FileWriter(mode)
+    for dirpath, _dirnames, filenames in os.walk(source):
+        relative_dir = Path(dirpath).relative_to(source)
+        (target / relative_dir).mkdir(parents=True, exist_ok=True)
+        for name in filenames:
+            src, dst = Path(dirpath, name), target / relative_dir / name
+            writer.write(src, dst)
+            if writer.mode != "hardlink" or not writer.can_link:
+                shutil.copymode(src, dst)
+
+
+class RenderCache:
+    """Generated projects keyed by :func:`render_key`; each entry holds the
+    project directory under its rendered name.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.index = CacheIndex(root or cache_dir("renders"))
+        if max_bytes is None:
+            max_size = os.environ.get("CCDS_RENDER_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)
+            max_bytes = int(max_size) * 1024 * 1024
+        self.max_bytes = max_bytes
+
+    def lookup(self, key):
+        """The cached project directory of ``key``, or None."""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        self.index.touch(key)
+        return self.index.entry_path(key) / entry["name"]
+
+    def store(self, key, project_dir):
+        """Copy the generated ``project_dir`` into the cache."""
+        project_dir = Path(project_dir)
+        if self.index.get(key) is not None:
+            return
+        self.index.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix="store-", dir=self.index.root))
+        try:
+            copy_tree(project_dir, staging / project_dir.name)
+            with self.index.lock():
+                if self.index.get(key) is not None:
+                    # first writer wins; a complete entry is never replaced
+                    return
+                # a directory the index does not know was left by an
+                # interrupted run
+                target = self.index.entry_path(key)
+                shutil.rmtree(target, ignore_errors=True)
+                staging.rename(target)
+                self.index.add(key, name=project_dir.name)
+                self.index.prune(max_bytes=self.max_bytes)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def materialize(self, cached, output_dir):
+        """Write the cached project into ``output_dir``; return its directory."""
+        project_dir = Path(output_dir, Path(cached).name).resolve()
+        mode = os.environ.get("CCDS_RENDER_CACHE_LINK", "reflink")
+        copy_tree(cached, project_dir, mode)
+        return str(project_dir)
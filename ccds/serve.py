@@ -0,0 +1,396 @@
+"""Generate projects from a long-running local service.
+
+Every ``ccds`` command pays for its start: the imports, reading ``ccds.json``,
+finding the template and compiling its files. ``ccds serve`` pays for them once.
+The template is loaded a single time (as by ``ccds batch``) and projects are
+rendered on a bounded pool of worker processes, which keep the imports and the
+compiled templates of the previous renders. Renders need separate processes
+rather than threads, since cookiecutter renders relative to the working
+directory. An asyncio front end answers HTTP requests on a local TCP port or a
+Unix socket:
+
+``GET /health``
+    ``{"status": "ok", "template": ...}``
+
+``POST /generate``
+    A JSON object (``Content-Type: application/json``) with the
+    ``extra_context`` answers. The response is the project as an archive (see
+    :mod:`ccds.archive`) in the given ``format``, zip by default. When the
+    server is started with an output root, an ``output_dir`` below that root
+    generates the project there as by ``ccds`` instead, and the response is
+    ``{"project_dir": ...}``. Private variables (starting with ``_``) and answers
+    naming paths or URLs to read from, such as ``custom_config``, are refused.
+
+Errors are answered with ``{"error": ...}`` and a 4xx or 5xx status.
+
+The service has no authentication; it only answers requests whose ``Host``
+(and ``Origin``, if any) is the local machine, and only JSON requests, so that
+web pages cannot reach it through the browser (a cross-site form post or DNS
+rebinding). Projects are only written on disk below the output root.
+"""
+
+import asyncio
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import click
+from cookiecutter import generate
+
+from ccds import __main__ as ccds_main
+from ccds.archive import FORMATS, archive_project, project_name
+from ccds.batch import load_template, project_context, render_project
+
+# requests are small JSON documents; anything larger is refused
+MAX_BODY_SIZE = 1024 * 1024
+
+CONTENT_TYPES = {
+    "zip": "application/zip",
+    "tar": "application/x-tar",
+    "tar.gz": "application/gzip",
+}
+
+# host names a request may be addressed to, besides the address listened on
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+# answers naming a directory, archive or repository that the post-generation
+# steps read from, which a request may not choose
+PATH_ANSWERS = ("custom_config",)
+
+# template and Jinja environment of a worker process, kept between renders
+_worker_template = None
+_worker_env = None
+
+
+def _init_worker(loaded):
+    global _worker_template, _worker_env
+    _worker_template = loaded
+    # built from the template context alone, so that no request's answers leak
+    # into the renders of the next ones
+    _worker_env = generate.create_env_with_context(loaded.context)
+    ccds_main.install_patches()
+
+
+def _generate_archive(extra_context, format):
+    stream = io.BytesIO()
+    name = archive_project(
+        _worker_template, extra_context, stream, format, env=_worker_env
+    )
+    return name, stream.getvalue()
+
+
+def _generate_project(extra_context, output_dir, overwrite_if_exists, output_root):
+    # the project name is an answer as well, so it may not leave the root either
+    context = project_context(_worker_template, extra_context, output_dir)
+    env = generate.create_env_with_context(context)
+    name = project_name(_worker_template, context, env)
+    resolve_output_dir(output_root, os.path.join(output_dir, name))
+    return str(
+        render_project(_worker_template, extra_context, output_dir, overwrite_if_exists)
+    )
+
+
+class RequestError(Exception):
+    """A request that is answered with ``status`` and ``{"error": message}``."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+    def __reduce__(self):
+        # raised in the worker processes as well
+        return type(self), (self.status, str(self))
+
+
+def resolve_output_dir(output_root, output_dir):
+    """The absolute path of ``output_dir``, relative to ``output_root``.
+
+    Raises RequestError for a path that resolves outside of the root.
+    """
+    root = os.path.realpath(output_root)
+    path = os.path.realpath(os.path.join(root, output_dir))
+    if os.path.commonpath([root, path]) != root:
+        raise RequestError(
+            HTTPStatus.FORBIDDEN, f"{output_dir} is outside of the output root"
+        )
+    return path
+
+
+def _host_name(host):
+    """The host name of a ``Host`` header value, without its port."""
+    return urlsplit(f"//{host}").hostname
+
+
+def check_headers(method, headers, allowed_hosts):
+    """Refuse requests that a web page may have made through the browser."""
+    if _host_name(headers.get("host", "")) not in allowed_hosts:
+        raise RequestError(HTTPStatus.FORBIDDEN, "Host is not the local machine")
+    origin = headers.get("origin")
+    if origin is not None and urlsplit(origin).hostname not in allowed_hosts:
+        raise RequestError(HTTPStatus.FORBIDDEN, "Origin is not the local machine")
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if method == "POST" and content_type != "application/json":
+        raise RequestError(
+            HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Content-Type must be application/json"
+        )
+
+
+def parse_request(body):
+    """Validate the JSON body of ``POST /generate``; return it as a dict."""
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError as err:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {err}")
+    if not isinstance(request, dict):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+
+    extra_context = request.setdefault("extra_context", {})
+    if not isinstance(extra_context, dict):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "extra_context must be an object")
+    for key in extra_context:
+        if key.startswith("_"):
+            raise RequestError(
+                HTTPStatus.BAD_REQUEST, f"{key} is private to the template"
+            )
+    for key in PATH_ANSWERS:
+        if extra_context.get(key):
+            raise RequestError(HTTPStatus.FORBIDDEN, f"{key} cannot be set by requests")
+    request.setdefault("format", "zip")
+    if request["format"] not in FORMATS:
+        raise RequestError(
+            HTTPStatus.BAD_REQUEST,
+            f"Unknown format {request['format']!r}, expected one of {list(FORMATS)}",
+        )
+    return request
+
+
+def _response(status, body, content_type="application/json", headers=None):
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class GenerationServer:
+    """HTTP front end of a pool of ``workers`` processes rendering ``loaded``.
+
+    Projects are only generated on disk below ``output_root``; without one,
+    only archives are served.
+    """
+
+    def __init__(self, loaded, workers=None, output_root=None):
+        self.loaded = loaded
+        self.workers = workers or os.cpu_count() or 1
+        self.output_root = output_root
+        self.allowed_hosts = set(LOCAL_HOSTS)
+        self._executor = None
+        self._server = None
+        self._path = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Listen on ``host`` and ``port``, or on the Unix socket ``path``;
+        return the address listened on.
+        """
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.loaded,),
+        )
+        if path is not None:
+            self._path = path
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self.allowed_hosts.add(host)
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._path is not None and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        try:
+            method, target, _version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, target.split("?", 1)[0], body, headers
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        except RequestError:
+            raise
+        except Exception as err:  # report render failures to the client
+            raise RequestError(
+                HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(err).__name__}: {err}"
+            )
+
+    async def dispatch(self, method, path, body, headers):
+        """Answer one request; return the bytes of the HTTP response."""
+        check_headers(method, headers, self.allowed_hosts)
+        if path == "/health":
+            if method != "GET":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+            return _response(
+                HTTPStatus.OK, {"status": "ok", "template": self.loaded.template}
+            )
+        if path != "/generate":
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+        if method != "POST":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+
+        request = parse_request(body)
+        if request.get("output_dir"):
+            if self.output_root is None:
+                raise RequestError(
+                    HTTPStatus.FORBIDDEN,
+                    "Generating on disk needs ccds serve --output-root",
+                )
+            output_dir = resolve_output_dir(self.output_root, request["output_dir"])
+            project_dir = await self._run(
+                _generate_project,
+                request["extra_context"],
+                output_dir,
+                bool(request.get("overwrite_if_exists")),
+                self.output_root,
+            )
+            return _response(HTTPStatus.OK, {"project_dir": project_dir})
+
+        format = request["format"]
+        name, data = await self._run(
+            _generate_archive, request["extra_context"], format
+        )
+        return _response(
+            HTTPStatus.OK,
+            data,
+            CONTENT_TYPES[format],
+            {"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+        )
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                response = await self.dispatch(*await self._read_request(reader))
+            except RequestError as err:
+                response = _response(err.status, {"error": str(err)})
+            except asyncio.IncompleteReadError:
+                return
+            writer.write(response)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def _serve(loaded, workers, output_root, host, port, path):
+    server = GenerationServer(loaded, workers, output_root)
+    address = await server.start(host, port, path)
+    where = path if path is not None else "http://{}:{}".format(*address[:2])
+    click.echo(f"Serving {loaded.template} on {where}", err=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+@click.command()
+@click.argument("template", required=False, default=ccds_main.DEFAULT_TEMPLATE)
+@click.option(
+    "-c",
+    "--checkout",
+    default=None,
+    help="branch, tag or commit to checkout after git clone "
+    "(defaults to the installed ccds release for the default template)",
+)
+@click.option(
+    "--directory",
+    help="Directory within repo that holds cookiecutter.json file "
+    "for advanced repositories with multi templates in it",
+)
+@click.option("--host", default="127.0.0.1", help="Address to listen on")
+@click.option("-p", "--port", default=8765, type=int, help="Port to listen on")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Listen on this Unix socket instead of a TCP port",
+)
+@click.option(
+    "-j",
+    "--workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of projects rendered concurrently (defaults to the CPU count)",
+)
+@click.option(
+    "--output-root",
+    type=click.Path(file_okay=False, exists=True),
+    default=None,
+    help="Allow requests to generate projects on disk, below this directory",
+)
+@click.option(
+    "--no-template-cache",
+    is_flag=True,
+    help="Clone remote templates directly instead of using the local template cache",
+)
+def serve(
+    template,
+    checkout,
+    directory,
+    host,
+    port,
+    socket_path,
+    workers,
+    output_root,
+    no_template_cache,
+):
+    """Serve project generation from TEMPLATE over a local HTTP API."""
+    if checkout is None and template == ccds_main.DEFAULT_TEMPLATE:
+        checkout = ccds_main.DEFAULT_CHECKOUT
+
+    loaded = load_template(
+        template,
+        checkout=checkout,
+        directory=directory,
+        use_template_cache=not no_template_cache,
+    )
+    try:
+        asyncio.run(_serve(loaded, workers, output_root, host, port, socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loaded.cleanup()
@@ -0,0 +1,76 @@
+"""Declarative subtree selection from the ``_subtrees`` section of ccds.json.
+
+Each entry maps a path in the template -- relative to the project directory,
+as it is spelled in the template -- to the answers it is rendered for::
+
+    "_subtrees": {
+        "docker": {"docker_support": ["Yes"]},
+        "tests/pytest": {"testing_framework": ["pytest"]}
+    }
+
+Conditions have the form of those in ``_constraints``: all of the variables
+have to take one of the listed values. A path whose condition does not hold is
+neither rendered nor written, and neither is anything below it, so the
+post-generation steps no longer have to delete it again.
+"""
+
+import os
+from pathlib import PurePath
+
+from ccds.constraints import _compile_condition
+
+
+class Subtrees:
+    """Compiled subtree table of a ccds.json context."""
+
+    def __init__(self, table):
+        self._conditions = {
+            PurePath(path).as_posix(): _compile_condition(condition, {})
+            for path, condition in table.items()
+        }
+
+    @classmethod
+    def from_context(cls, context):
+        """Compile the ``_subtrees`` table of a ccds.json context."""
+        return cls(context.get("_subtrees", {}))
+
+    def excluded(self, answers):
+        """The template paths that are not rendered for ``answers``."""
+        return frozenset(
+            path
+            for path, condition in self._conditions.items()
+            if not condition(answers)
+        )
+
+
+def is_excluded(path, excluded):
+    """Whether the template path ``path`` is in, or below, an excluded path."""
+    if not excluded:
+        return False
+    path = PurePath(path)
+    return any(
+        parent.as_posix() in excluded
+        for parent in (path, *path.parents)
+        if parent.parts
+    )
+
+
+def excluded_paths(cookiecutter):
+    """The excluded template paths for the answers in a cookiecutter context.
+
+    Callers compute them once per project and pass them along.
+    """
+    return Subtrees.from_context(cookiecutter).excluded(cookiecutter)
+
+
+def template_path(unrendered_dir):
+    """The template path of a directory as ``generate_files`` passes it to
+    ``render_and_create_dir``: joined to the project directory from the
+    ``os.walk('.')`` of the template, so the template path follows the ``.``.
+
+    The project directory itself has no template path and gives None.
+    """
+    marker = f"{os.sep}.{os.sep}"
+    if marker not in unrendered_dir:
+        return None
+    return os.path.normpath(unrendered_dir.split(marker, 1)[1])
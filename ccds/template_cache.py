@@ -0,0 +1,235 @@
+"""Persistent cache of remote template checkouts.
+
+Checkouts are stored once per (repository URL, commit SHA). Tags and commit
+SHAs that were resolved before are served from the cache without touching the
+network; branches are re-resolved with a single ``git ls-remote`` and only
+cloned again when they moved.
+"""
+
+import hashlib
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from ccds.cache import CacheIndex, cache_dir
+
+DEFAULT_MAX_ENTRIES = 20
+
+_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+def _git(*args, cwd=None):
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def _entry_key(url, sha):
+    url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return f"{url_hash}/{sha}"
+
+
+def ls_remote(url, ref):
+    """Resolve ``ref`` on the remote to ``(sha, kind)`` or ``(None, None)``.
+
+    ``kind`` is ``"tag"``, ``"branch"`` or ``"head"``.
+    """
+    lines = _git("ls-remote", url, ref or "HEAD").splitlines()
+    refs = dict(reversed(line.split("\t", 1)) for line in lines if "\t" in line)
+
+    if not ref:
+        return refs.get("HEAD"), "head"
+
+    # annotated tags are peeled to the commit they point at
+    for name, kind in (
+        (f"refs/tags/{ref}^{{}}", "tag"),
+        (f"refs/tags/{ref}", "tag"),
+        (f"refs/heads/{ref}", "branch"),
+    ):
+        if name in refs:
+            return refs[name], kind
+    return None, None
+
+
+class TemplateCache:
+    """Checkouts of git templates keyed by repository URL and commit SHA."""
+
+    def __init__(self, root=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.index = CacheIndex(root or cache_dir("templates"))
+        self.max_entries = max_entries
+
+    def _lookup_ref(self, url, ref):
+        """Return ``(key, kind)`` of the cached entry ``ref`` last resolved to."""
+        for key, entry in self.index.load().items():
+            if entry["url"] == url and ref in entry.get("refs", {}):
+                if self.index.entry_path(key).exists():
+                    return key, entry["refs"][ref]
+        return None, None
+
+    def resolve(self, url, ref=None):
+        """Return a local directory holding ``url`` checked out at ``ref``."""
+        ref_name = ref or "HEAD"
+
+        key, kind = self._lookup_ref(url, ref_name)
+        if key is not None and kind in ("tag", "sha"):
+            self.index.touch(key)
+            return self.index.entry_path(key)
+
+        if ref and _SHA_RE.match(ref):
+            sha, kind = ref, "sha"
+        else:
+            try:
+                sha, kind = ls_remote(url, ref)
+            except (OSError, subprocess.CalledProcessError):
+                if key is None:
+                    raise
+                # offline: fall back to the commit the branch pointed at last time
+                self.index.touch(key)
+                return self.index.entry_path(key)
+
+        if sha is not None:
+            key = _entry_key(url, sha)
+            if self.index.get(key) is not None:
+                self._record_ref(key, ref_name, kind)
+                return self.index.entry_path(key)
+
+        key = self._clone(url, ref, shallow=kind in ("tag", "branch", "head"))
+        self._record_ref(key, ref_name, kind or "sha")
+        self.index.prune(max_entries=self.max_entries)
+        return self.index.entry_path(key)
+
+    def _record_ref(self, key, ref_name, kind):
+        with self.index.lock():
+            entry = self.index.load()[key]
+            refs = dict(entry.get("refs", {}))
+            refs[ref_name] = kind
+            self.index.touch(key, refs=refs)
+
+    def _clone(self, url, ref, shallow):
+        self.index.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix="clone-", dir=self.index.root))
+        try:
+            checkout = tmp_dir / "checkout"
+            if shallow:
+                branch_args = ["--branch", ref] if ref else []
+                _git(
+                    "clone", "--quiet", "--depth", "1", *branch_args, url, str(checkout)
+                )
+            else:
+                _git("clone", "--quiet", "--no-checkout", url, str(checkout))
+                _git("checkout", "--quiet", ref, cwd=checkout)
+            sha = _git("rev-parse", "HEAD", cwd=checkout).strip()
+
+            key = _entry_key(url, sha)
+            target = self.index.entry_path(key)
+            if not target.exists():
+                shutil.rmtree(checkout / ".git")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                checkout.rename(target)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        with self.index.lock():
+            entry = self.index.get(key) or {}
+            self.index.add(key, url=url, sha=sha, refs=entry.get("refs", {}))
+        return key
+
+    def checkout_key(self, path):
+        """The key of the cached checkout at ``path``, or None if ``path`` is
+        not one. A checkout is keyed by its commit and never changes.
+        """
+        try:
+            key = Path(path).resolve().relative_to(self.index.root.resolve())
+        except ValueError:
+            return None
+        key = key.as_posix()
+        entry = self.index.get(key)
+        return key if entry is not None and entry.get("sha") else None
+
+    def entries(self):
+        return self.index.load()
+
+    def prune(self, max_entries=None, max_bytes=None):
+        return self.index.prune(max_entries=max_entries, max_bytes=max_bytes)
+
+
+def cached_template(template, checkout, abbreviations):
+    """Point a remote git ``template`` at its cached checkout.
+
+    Returns the ``(template, checkout)`` pair to hand to cookiecutter: a local
+    directory and no checkout when the template could be served from the cache,
+    the original arguments otherwise (local paths, zip files, hg repositories or
+    when git is unavailable).
+    """
+    from cookiecutter.repository import expand_abbreviations, is_repo_url, is_zip_file
+    from cookiecutter.vcs import identify_repo
+
+    url = expand_abbreviations(template, abbreviations)
+    if is_zip_file(url) or not is_repo_url(url):
+        return template, checkout
+
+    try:
+        repo_type, url = identify_repo(url)
+    except Exception:
+        return template, checkout
+    if repo_type != "git":
+        return template, checkout
+
+    try:
+        return str(TemplateCache().resolve(url, checkout)), None
+    except (OSError, subprocess.CalledProcessError) as err:
+        click.echo(f"Template cache unavailable ({err}), cloning directly", err=True)
+        return template, checkout
+
+
+@click.group()
+def cache():
+    """Inspect and prune the cache of remote template checkouts."""
+
+
+@cache.command("ls")
+def ls_command():
+    """List cached template checkouts, most recently used first."""
+    template_cache = TemplateCache()
+    entries = template_cache.entries()
+    for key in sorted(entries, key=lambda k: -entries[k].get("last_used", 0)):
+        entry = entries[key]
+        refs = ", ".join(sorted(entry.get("refs", {}))) or "-"
+        last_used = time.strftime(
+            "%Y-%m-%d %H:%M", time.localtime(entry.get("last_used", 0))
+        )
+        click.echo(
+            f"{entry['sha'][:12]}  {entry.get('size', 0) / 1024:8.0f} KiB  "
+            f"{last_used}  {entry['url']} ({refs})"
+        )
+    click.echo(f"{len(entries)} cached template(s) in {template_cache.index.root}")
+
+
+@cache.command("prune")
+@click.option(
+    "--max-entries",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_ENTRIES,
+    show_default=True,
+    help="Number of most recently used checkouts to keep",
+)
+@click.option(
+    "--max-size",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Maximum total size of the cache in MiB",
+)
+@click.option("--all", "prune_all", is_flag=True, help="Remove every cached checkout")
+def prune_command(max_entries, max_size, prune_all):
+    """Evict least recently used template checkouts."""
+    if prune_all:
+        max_entries = 0
+    max_bytes = max_size * 1024 * 1024 if max_size is not None else None
+    removed = TemplateCache().prune(max_entries=max_entries, max_bytes=max_bytes)
+    click.echo(f"Removed {len(removed)} cached template(s)")
@@ -9,9 +9,37 @@ This script:
 4. Transforms nested dataset_storage dict to flat variables
 
 Run this script whenever the cookiecutter templates change.
+
+Builds are incremental: copier/template-manifest.json maps every source file
+to the hash of its content and of the output generated from it, so only
+changed files are transformed again and outputs whose sources disappeared are
+deleted. Changing this script invalidates the manifest.
+
+It also writes ccds-raw-files.json, the cookiecutter template files without
+Jinja syntax that ccds copies instead of rendering (see ccds.raw_files). The
+build fails if a file listed there has gained template syntax since, unless
+--reclassify is given.
+
+Usage:
+    python copier/scripts/build_copier_template.py          # incremental build
+    python copier/scripts/build_copier_template.py --full   # transform every file
+    python copier/scripts/build_copier_template.py -j 0     # one process per CPU
+    python copier/scripts/build_copier_template.py --check  # verify, don't write
 """
+
+import argparse
+import hashlib
+import json
+import os
 import re
 import shutil
+import sys
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
 from pathlib import Path
 
 # Paths
@@ -19,88 +47,139 @@ SCRIPT_DIR = Path(__file__).parent
 REPO_ROOT = SCRIPT_DIR.parent.parent
 COOKIECUTTER_TEMPLATE = REPO_ROOT / "{{ cookiecutter.repo_name }}"
 COPIER_TEMPLATE = SCRIPT_DIR.parent / "template"
+MANIFEST = SCRIPT_DIR.parent / "template-manifest.json"
 
+# the raw-file manifest of the cookiecutter template is built alongside
+sys.path.insert(0, str(REPO_ROOT))
+from ccds import raw_files  # noqa: E402
 
-def transform_cookiecutter_to_copier(content: str) -> str:
-    """Transform cookiecutter Jinja2 syntax to copier syntax."""
+RAW_MANIFEST = REPO_ROOT / raw_files.MANIFEST_NAME
+
+# Files that only exist in the copier template and are not built from a source
+COPIER_ONLY_FILES = {".copier-answers.yml.jinja"}
 
-    # Step 1: Transform dataset_storage nested dict patterns BEFORE removing cookiecutter. prefix
-    # This is critical - we need to handle the complex nested structures first
 
-    # Transform value access patterns:
+# Transformation rules as (name, pattern, replacement), tried in this order.
+# They are compiled into a single alternation and dispatched on the name of the
+# rule that matched; the specific dataset_storage rules must precede the
+# generic cookiecutter.var rules.
+_RULES = [
     # {{ cookiecutter.dataset_storage.s3.bucket }} -> {{ s3_bucket }}
     # {{ cookiecutter.dataset_storage.s3.aws_profile }} -> {{ s3_aws_profile }}
     # {{ cookiecutter.dataset_storage.azure.container }} -> {{ azure_container }}
     # {{ cookiecutter.dataset_storage.gcs.bucket }} -> {{ gcs_bucket }}
-    content = re.sub(
-        r"\{\{\s*cookiecutter\.dataset_storage\.s3\.bucket\s*\}\}",
-        "{{ s3_bucket }}",
-        content,
-    )
-    content = re.sub(
-        r"\{\{\s*cookiecutter\.dataset_storage\.s3\.aws_profile\s*\}\}",
-        "{{ s3_aws_profile }}",
-        content,
-    )
-    content = re.sub(
-        r"\{\{\s*cookiecutter\.dataset_storage\.azure\.container\s*\}\}",
-        "{{ azure_container }}",
-        content,
-    )
-    content = re.sub(
-        r"\{\{\s*cookiecutter\.dataset_storage\.gcs\.bucket\s*\}\}",
-        "{{ gcs_bucket }}",
-        content,
-    )
-
-    # Transform conditional check patterns (in if/elif statements):
-    # {%- if cookiecutter.dataset_storage.s3 %} -> {%- if dataset_storage == 's3' %}
-    # {%- if cookiecutter.dataset_storage.azure %} -> {%- if dataset_storage == 'azure' %}
-    # {%- if cookiecutter.dataset_storage.gcs %} -> {%- if dataset_storage == 'gcs' %}
-    # {%- if cookiecutter.dataset_storage.none %} -> {%- if dataset_storage == 'none' %}
+    (
+        "storage_value",
+        r"\{\{\s*cookiecutter\.dataset_storage\."
+        r"(?P<storage_path>s3\.bucket|s3\.aws_profile|azure\.container|gcs\.bucket)"
+        r"\s*\}\}",
+        lambda m: "{{ " + m["storage_path"].replace(".", "_") + " }}",
+    ),
     # {%- if not cookiecutter.dataset_storage.none %} -> {%- if dataset_storage != 'none' %}
-    # Preserve the whitespace control character (-) if present
-    content = re.sub(
-        r"\{%([-]?)\s*if\s+not\s+cookiecutter\.dataset_storage\.none\s*%\}",
-        r"{%\1 if dataset_storage != 'none' %}",
-        content,
-    )
-    content = re.sub(
-        r"\{%([-]?)\s*if\s+cookiecutter\.dataset_storage\.(s3|azure|gcs|none)\s*%\}",
-        r"{%\1 if dataset_storage == '\2' %}",
-        content,
-    )
-    content = re.sub(
-        r"\{%([-]?)\s*elif\s+cookiecutter\.dataset_storage\.(s3|azure|gcs|none)\s*%\}",
-        r"{%\1 elif dataset_storage == '\2' %}",
-        content,
-    )
-
-    # Transform comparison patterns (e.g., aws_profile != 'default'):
+    # The whitespace control character (-) is preserved if present
+    (
+        "storage_not_none",
+        r"\{%(?P<not_none_dash>[-]?)\s*if\s+not\s+cookiecutter\.dataset_storage\.none"
+        r"\s*%\}",
+        lambda m: "{%" + m["not_none_dash"] + " if dataset_storage != 'none' %}",
+    ),
+    # {%- if cookiecutter.dataset_storage.s3 %} -> {%- if dataset_storage == 's3' %}
+    # {%- elif cookiecutter.dataset_storage.gcs %} -> {%- elif dataset_storage == 'gcs' %}
+    (
+        "storage_choice",
+        r"\{%(?P<choice_dash>[-]?)\s*(?P<choice_tag>if|elif)\s+"
+        r"cookiecutter\.dataset_storage\.(?P<choice>s3|azure|gcs|none)\s*%\}",
+        lambda m: "{%"
+        + m["choice_dash"]
+        + " "
+        + m["choice_tag"]
+        + " dataset_storage == '"
+        + m["choice"]
+        + "' %}",
+    ),
     # {%- if cookiecutter.dataset_storage.s3.aws_profile != 'default' %}
     # -> {%- if s3_aws_profile != 'default' %}
-    content = re.sub(
-        r"\{%([-]?)\s*if\s+cookiecutter\.dataset_storage\.s3\.aws_profile\s*!=\s*['\"]default['\"]\s*%\}",
-        r"{%\1 if s3_aws_profile != 'default' %}",
-        content,
-    )
+    (
+        "storage_profile",
+        r"\{%(?P<profile_dash>[-]?)\s*if\s+cookiecutter\.dataset_storage\.s3\."
+        r"aws_profile\s*!=\s*['\"]default['\"]\s*%\}",
+        lambda m: "{%" + m["profile_dash"] + " if s3_aws_profile != 'default' %}",
+    ),
+    # {{ cookiecutter.var }} -> {{ var }}
+    (
+        "variable",
+        r"\{\{\s*cookiecutter\.(?P<variable_name>\w+)\s*\}\}",
+        lambda m: "{{ " + m["variable_name"] + " }}",
+    ),
+    # {%- if cookiecutter.var -> {%- if var (and elif)
+    (
+        "condition",
+        r"\{%(?P<condition_dash>[-]?)\s*(?P<condition_tag>if|elif)\s+"
+        r"cookiecutter\.(?P<condition_name>\w+)",
+        lambda m: "{%"
+        + m["condition_dash"]
+        + " "
+        + m["condition_tag"]
+        + " "
+        + m["condition_name"],
+    ),
+    # any remaining cookiecutter.var in expressions -> var
+    (
+        "expression",
+        r"cookiecutter\.(?P<expression_name>\w+)",
+        lambda m: m["expression_name"],
+    ),
+]
 
-    # Step 2: Now transform all remaining {{ cookiecutter.var }} to {{ var }}
-    content = re.sub(r"\{\{\s*cookiecutter\.(\w+)\s*\}\}", r"{{ \1 }}", content)
+_TRANSFORM_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in _RULES)
+)
+_REPLACEMENTS = {name: replacement for name, _, replacement in _RULES}
 
-    # Step 3: Transform if/elif statements with cookiecutter.var
-    # Preserve the whitespace control character (-) if present
-    content = re.sub(
-        r"\{%([-]?)\s*if\s+cookiecutter\.(\w+)", r"{%\1 if \2", content
-    )
-    content = re.sub(
-        r"\{%([-]?)\s*elif\s+cookiecutter\.(\w+)", r"{%\1 elif \2", content
-    )
 
-    # Step 4: Handle any remaining cookiecutter.var in expressions
-    content = re.sub(r"cookiecutter\.(\w+)", r"\1", content)
+_MARKER = "cookiecutter."
+
 
-    return content
+def _match_at(content: str, pos: int, index: int):
+    """Match a rule covering the ``cookiecutter.`` found at ``index``.
+
+    Every rule contains ``cookiecutter.``, preceded either by nothing or by a
+    ``{{``/``{%`` delimiter with only whitespace, ``-``, ``if``, ``elif`` and
+    ``not`` in between, so a match can only start at the last ``{`` before it,
+    the ``{`` before that, or at ``index`` itself.
+    """
+    brace = content.rfind("{", pos, index)
+    if brace != -1:
+        for start in (brace - 1, brace):
+            if start >= pos:
+                match = _TRANSFORM_RE.match(content, start)
+                if match is not None and match.end() > index:
+                    return match
+    return _TRANSFORM_RE.match(content, index)
+
+
+def transform_cookiecutter_to_copier(content: str) -> str:
+    """Transform cookiecutter Jinja2 syntax to copier syntax in a single scan.
+
+    The content is scanned for ``cookiecutter.`` only, and the rules are tried
+    at the few positions where a match can start.
+    """
+    parts = []
+    pos = 0
+    index = content.find(_MARKER)
+    while index != -1:
+        match = _match_at(content, pos, index)
+        if match is None:
+            index = content.find(_MARKER, index + 1)
+            continue
+        parts.append(content[pos : match.start()])
+        parts.append(_REPLACEMENTS[match.lastgroup](match))
+        pos = match.end()
+        index = content.find(_MARKER, pos)
+    if not parts:
+        return content
+    parts.append(content[pos:])
+    return "".join(parts)
 
 
 def transform_filename(name: str) -> str:
@@ -135,20 +214,328 @@ def copy_and_transform_tree(src: Path, dst: Path):
                 print(f"  Copied (binary): {item.name} -> {new_name}")
 
 
-def main():
-    print("Building Copier template from Cookiecutter source...")
-    print(f"  Source: {COOKIECUTTER_TEMPLATE}")
-    print(f"  Destination: {COPIER_TEMPLATE}")
-    print()
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def transform_hash() -> str:
+    """Hash of the transformation rules, i.e. of this script."""
+    return _sha256(Path(__file__).read_bytes())
+
+
+def transform_file(data: bytes) -> tuple:
+    """Transform the content of a source file, returning ``(output, is_binary)``."""
+    try:
+        content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data, True
+    # universal newlines, as when reading the file in text mode
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return transform_cookiecutter_to_copier(content).encode("utf-8"), False
+
+
+def output_path(relative: str) -> str:
+    """Path of the output generated from the source file at ``relative``."""
+    return "/".join(transform_filename(part) for part in relative.split("/"))
+
+
+def source_files(src: Path) -> list:
+    """Paths of the files under ``src``, relative to it, in a stable order."""
+    files = []
+    for root, dirs, names in os.walk(src):
+        dirs.sort()
+        relative_root = Path(root).relative_to(src)
+        files.extend((relative_root / name).as_posix() for name in sorted(names))
+    return files
+
+
+def load_manifest(manifest_path: Path) -> dict:
+    try:
+        return json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {"transform": None, "files": {}}
+
+
+def _output_hash(path: Path):
+    try:
+        return _sha256(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _remove_empty_parents(path: Path, root: Path):
+    parent = path.parent
+    while parent != root and parent.is_dir() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def _build_file(src: Path, dst: Path, relative: str, entry) -> tuple:
+    """Bring the output of one source file up to date.
+
+    Returns ``(relative, entry, action)`` with the new manifest entry and one
+    of ``"transformed"``, ``"copied"`` or ``"unchanged"``.
+    """
+    data = (src / relative).read_bytes()
+    source_hash = _sha256(data)
+    target = output_path(relative)
+
+    if (
+        entry is not None
+        and entry["source"] == source_hash
+        and entry["output"] == target
+        and _output_hash(dst / target) == entry["output_hash"]
+    ):
+        return relative, entry, "unchanged"
+
+    output, is_binary = transform_file(data)
+    dst_item = dst / target
+    dst_item.parent.mkdir(parents=True, exist_ok=True)
+    if is_binary:
+        shutil.copy2(src / relative, dst_item)
+    else:
+        dst_item.write_bytes(output)
+
+    entry = {"source": source_hash, "output": target, "output_hash": _sha256(output)}
+    return relative, entry, "copied" if is_binary else "transformed"
+
+
+def _run_bounded(executor, tasks, limit: int):
+    """Run ``_build_file`` over ``tasks`` with at most ``limit`` pending at once,
+    yielding results as they complete.
+    """
+    pending = set()
+    for task in tasks:
+        pending.add(executor.submit(_build_file, *task))
+        if len(pending) >= limit:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in as_completed(pending):
+        yield future.result()
+
+
+class _Progress:
+    """Single progress line, rewritten in place when writing to a terminal."""
+
+    def __init__(self, total: int, stream=None):
+        self.total = total
+        self.done = 0
+        self.stream = stream or sys.stdout
+        self.enabled = self.stream.isatty()
+
+    def update(self, counts: dict):
+        self.done += 1
+        if self.enabled:
+            self.stream.write(
+                f"\r  [{self.done}/{self.total}] {counts['transformed']} transformed, "
+                f"{counts['unchanged']} unchanged"
+            )
+            self.stream.flush()
+
+    def close(self):
+        if self.enabled and self.done:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def build_incremental(
+    src: Path,
+    dst: Path,
+    manifest_path: Path,
+    full: bool = False,
+    jobs: int = 1,
+    verbose: bool = False,
+) -> dict:
+    """Bring ``dst`` in sync with ``src``, transforming only changed files.
+
+    A file is transformed again when its source hash differs from the manifest,
+    when its output is missing or was modified, when this script changed, or
+    when ``full`` is set. Outputs of sources that no longer exist are deleted.
+
+    The source tree is walked once and, with ``jobs`` > 1, the files are
+    transformed on a process pool fed through a bounded queue. Progress is a
+    single line; with ``verbose`` every written or removed file is listed
+    afterwards, in source order, so the output does not depend on scheduling.
+    Returns the number of transformed, unchanged and removed files.
+    """
+    manifest = load_manifest(manifest_path)
+    current_transform = transform_hash()
+    previous = manifest["files"]
+    if full or manifest["transform"] != current_transform:
+        previous = {}
+
+    sources = source_files(src)
+    tasks = [(src, dst, relative, previous.get(relative)) for relative in sources]
+
+    results = {}
+    counts = {"transformed": 0, "unchanged": 0, "removed": 0}
+    progress = _Progress(len(tasks))
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for relative, entry, action in _run_bounded(executor, tasks, 2 * jobs):
+                results[relative] = (entry, action)
+                counts["unchanged" if action == "unchanged" else "transformed"] += 1
+                progress.update(counts)
+    else:
+        for task in tasks:
+            relative, entry, action = _build_file(*task)
+            results[relative] = (entry, action)
+            counts["unchanged" if action == "unchanged" else "transformed"] += 1
+            progress.update(counts)
+    progress.close()
+
+    files = {relative: results[relative][0] for relative in sources}
+    report = []
+    for relative in sources:
+        entry, action = results[relative]
+        if action == "transformed":
+            report.append(f"  Transformed: {relative} -> {entry['output']}")
+        elif action == "copied":
+            report.append(f"  Copied (binary): {relative} -> {entry['output']}")
+
+    # delete outputs whose sources disappeared
+    outputs = {entry["output"] for entry in files.values()}
+    for relative, entry in sorted(manifest["files"].items()):
+        if relative in files or entry["output"] in outputs:
+            continue
+        stale = dst / entry["output"]
+        if stale.is_file():
+            stale.unlink()
+            _remove_empty_parents(stale, dst)
+            report.append(f"  Removed: {entry['output']}")
+        counts["removed"] += 1
+
+    if verbose:
+        for line in report:
+            print(line)
+
+    manifest_path.write_text(
+        json.dumps({"transform": current_transform, "files": files}, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    return counts
+
+
+def check_manifest(src: Path, dst: Path, manifest_path: Path) -> list:
+    """List how ``dst`` is out of sync with ``src`` according to the manifest.
+
+    Nothing is written; an empty list means the copier template is up to date.
+    """
+    manifest = load_manifest(manifest_path)
+    if not manifest["files"]:
+        return [f"No build manifest at {manifest_path}"]
+
+    problems = []
+    if manifest["transform"] != transform_hash():
+        problems.append("Build script changed since the last build")
+
+    files = manifest["files"]
+    sources = source_files(src)
+    for relative in sources:
+        entry = files.get(relative)
+        if entry is None:
+            problems.append(f"New source file: {relative}")
+            continue
+        if _sha256((src / relative).read_bytes()) != entry["source"]:
+            problems.append(f"Source changed: {relative}")
+        output_hash = _output_hash(dst / entry["output"])
+        if output_hash is None:
+            problems.append(f"Output missing: {entry['output']}")
+        elif output_hash != entry["output_hash"]:
+            problems.append(f"Output modified: {entry['output']}")
+
+    for relative in sorted(set(files) - set(sources)):
+        problems.append(f"Source removed: {relative}")
+
+    expected = {entry["output"] for entry in files.values()}
+    for relative in source_files(dst):
+        if relative not in expected and Path(relative).name not in COPIER_ONLY_FILES:
+            problems.append(f"Unexpected output: {relative}")
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Transform every file, ignoring the build manifest",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes transforming files (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="List every file written or removed",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Verify the copier template is in sync without writing anything",
+    )
+    parser.add_argument(
+        "--reclassify",
+        action="store_true",
+        help="Rebuild the raw-file manifest even if files marked raw have "
+        "gained template syntax",
+    )
+    args = parser.parse_args(argv)
 
     if not COOKIECUTTER_TEMPLATE.exists():
         print(f"ERROR: Source directory not found: {COOKIECUTTER_TEMPLATE}")
         return 1
 
-    copy_and_transform_tree(COOKIECUTTER_TEMPLATE, COPIER_TEMPLATE)
+    if args.check:
+        problems = check_manifest(COOKIECUTTER_TEMPLATE, COPIER_TEMPLATE, MANIFEST)
+        problems += raw_files.check_manifest(COOKIECUTTER_TEMPLATE, RAW_MANIFEST)
+        for problem in problems:
+            print(f"  {problem}")
+        if problems:
+            print()
+            print("Copier template is out of sync, run:")
+            print("  python copier/scripts/build_copier_template.py")
+            return 1
+        print("Copier template is in sync with the cookiecutter source.")
+        return 0
 
+    try:
+        raw = raw_files.build_manifest(
+            COOKIECUTTER_TEMPLATE, RAW_MANIFEST, reclassify=args.reclassify
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        print("If the template syntax is intended, rebuild with --reclassify.")
+        return 1
+    print(f"{len(raw)} raw files listed in {RAW_MANIFEST.name}")
+    print()
+
+    print("Building Copier template from Cookiecutter source...")
+    print(f"  Source: {COOKIECUTTER_TEMPLATE}")
+    print(f"  Destination: {COPIER_TEMPLATE}")
     print()
-    print("Done! Copier template created at:", COPIER_TEMPLATE)
+
+    counts = build_incremental(
+        COOKIECUTTER_TEMPLATE,
+        COPIER_TEMPLATE,
+        MANIFEST,
+        full=args.full,
+        jobs=args.jobs or os.cpu_count() or 1,
+        verbose=args.verbose,
+    )
+
+    print()
+    print(
+        f"Done! {counts['transformed']} transformed, {counts['unchanged']} unchanged, "
+        f"{counts['removed']} removed. Copier template at: {COPIER_TEMPLATE}"
+    )
     return 0
 
 
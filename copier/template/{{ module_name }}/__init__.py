@@ -1 +1,3 @@
+{% if include_code_scaffold == 'Yes' -%}
 from {{ module_name }} import config  # noqa: F401
+{% endif -%}
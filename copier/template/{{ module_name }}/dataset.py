@@ -1,3 +1,35 @@
+{% if pydata_packages == 'performance' -%}
+from pathlib import Path
+
+from loguru import logger
+import polars as pl
+import typer
+
+from {{ module_name }}.config import PROCESSED_DATA_DIR, RAW_DATA_DIR
+
+app = typer.Typer()
+
+
+@app.command()
+def main(
+    # ---- REPLACE DEFAULT PATHS AS APPROPRIATE ----
+    input_path: Path = RAW_DATA_DIR / "dataset.csv",
+    output_path: Path = PROCESSED_DATA_DIR / "dataset.parquet",
+    # ----------------------------------------------
+):
+    # ---- REPLACE THIS WITH YOUR OWN CODE ----
+    logger.info("Processing dataset...")
+    # scan the CSV lazily and stream it to Parquet (via pyarrow), so only the rows
+    # and columns the query needs are held in memory at any time
+    dataset = pl.scan_csv(input_path).drop_nulls()
+    dataset.sink_parquet(output_path)
+    logger.success("Processing dataset complete.")
+    # -----------------------------------------
+
+
+if __name__ == "__main__":
+    app()
+{% else -%}
 from pathlib import Path
 
 from loguru import logger
@@ -27,3 +59,4 @@ def main(
 
 if __name__ == "__main__":
     app()
+{% endif -%}
@@ -2,7 +2,7 @@ import json
 import re
 from pathlib import Path
 
-from ccds.hook_utils.dependencies import basic
+from ccds.hook_utils.dependencies import basic, performance
 
 PROJECT_ROOT = Path(__file__).parents[2]
 
@@ -62,6 +62,10 @@ def _ccds_help_to_lookups(help, prefix="", out=None):
 def build_help_table_rows(data, help_lookup, lookup_prefix=""):
     body_items = []
     for top_key, top_value in data.items():
+        # private keys such as _constraints are not options
+        if top_key.startswith("_"):
+            continue
+
         # top value is string, so it is just user entry
         if isinstance(top_value, str):
             item_help = help_lookup[f"{lookup_prefix}{top_key}"]
@@ -96,10 +100,9 @@ def build_help_table_rows(data, help_lookup, lookup_prefix=""):
             for ix, choice in enumerate(top_value):
                 if isinstance(choice, str):
                     item_help = help_lookup[f"{lookup_prefix}{top_key}.{choice}"]
-                    more_info = (
-                        item_help["more_information"]
-                        if choice != "basic"
-                        else item_help["more_information"] + (", ".join(basic))
+                    tier = {"basic": basic, "performance": basic + performance}
+                    more_info = item_help["more_information"] + ", ".join(
+                        tier.get(choice, [])
                     )
 
                     section.append(
@@ -27,8 +27,8 @@ function finish {
     fi
 
     # Remove Jupyter kernel if registered
-    if [ -d "$HOME/.local/share/jupyter/kernels/$ENV_NAME" ]; then
-        rm -rf "$HOME/.local/share/jupyter/kernels/$ENV_NAME"
+    if [ -d "${JUPYTER_DATA_DIR:-$HOME/.local/share/jupyter}/kernels/$ENV_NAME" ]; then
+        rm -rf "${JUPYTER_DATA_DIR:-$HOME/.local/share/jupyter}/kernels/$ENV_NAME"
     fi
 }
 trap finish EXIT
@@ -46,6 +46,14 @@ then
 fi
 
 make
+
+# Restore a snapshot of an environment with the same dependencies, if any
+if [[ "$ENV_LOCATION" == "local" ]]; then
+    ENV_CACHE_TARGET=(--prefix ".venv/$ENV_NAME")
+else
+    ENV_CACHE_TARGET=(--name "$ENV_NAME")
+fi
+env_cache restore "$1" conda "${ENV_CACHE_TARGET[@]}"
 make create_environment
 
 # Activate based on environment location
@@ -71,6 +79,9 @@ if [ -d "__pycache__" ]; then
     exit 1
 fi
 
+# Snapshot the environment for configs with the same dependencies
+env_cache save "$1" conda "${ENV_CACHE_TARGET[@]}"
+
 # Test remove_environment (must deactivate first)
 conda deactivate
 make remove_environment
@@ -1,4 +1,6 @@
+import atexit
 import json
+import os
 import shutil
 import sys
 import tempfile
@@ -9,9 +11,39 @@ from pathlib import Path
 import pytest
 
 from ccds.__main__ import api_main
+from ccds.constraints import Constraints
 
 CCDS_ROOT = Path(__file__).parents[1].resolve()
 
+# set in the worker processes when the tests run in parallel with pytest-xdist
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER")
+
+
+def _temporary_dir(variable, suffix):
+    os.environ[variable] = tempfile.mkdtemp(suffix=suffix)
+    atexit.register(shutil.rmtree, os.environ[variable], True)
+
+
+# keep the ccds caches used by the test session out of the user's cache directory
+if "CCDS_CACHE_DIR" not in os.environ:
+    _temporary_dir("CCDS_CACHE_DIR", "ccds-cache")
+
+# Jupyter kernels registered by the harnesses go to a directory of this process
+_temporary_dir("JUPYTER_DATA_DIR", "jupyter-data")
+
+if WORKER_ID:
+    # workers don't share caches, which are not safe for concurrent writers
+    os.environ["CCDS_CACHE_DIR"] = os.path.join(os.environ["CCDS_CACHE_DIR"], WORKER_ID)
+    # one conda package cache per worker, kept between runs to reuse downloads
+    os.environ["CONDA_PKGS_DIRS"] = os.path.join(
+        tempfile.gettempdir(), "ccds-conda-pkgs", WORKER_ID
+    )
+
+# relative time it takes to verify a baked project with each environment
+# manager; the slowest configs of a module are collected first so that
+# parallel workers start on them instead of finishing with them
+ENV_MANAGER_COST = {"conda": 3, "virtualenv": 2, "uv": 1, "none": 0}
+
 
 default_args = {
     "project_name": "my_test_project",
@@ -29,36 +61,20 @@ def config_generator(fast=False):
     # python versions for the created environment; match the root
     # python version since Pipenv needs to be able to find an executable
     running_py_version = f"{sys.version_info.major}.{sys.version_info.minor}"
-    py_version = [("python_version_number", v) for v in [running_py_version]]
-
-    configs = product(
-        py_version,
-        [
-            ("environment_manager", opt)
-            for opt in cookiecutter_json["environment_manager"]
-        ],
-        [("env_location", opt) for opt in cookiecutter_json["env_location"]],
-        [("dependency_file", opt) for opt in cookiecutter_json["dependency_file"]],
-        [("pydata_packages", opt) for opt in cookiecutter_json["pydata_packages"]],
+    py_version = [running_py_version]
+
+    # search only the combinations allowed by the _constraints in ccds.json
+    constraints = Constraints.from_context(cookiecutter_json)
+    configs = constraints.enumerate(
+        {
+            "python_version_number": py_version,
+            "environment_manager": cookiecutter_json["environment_manager"],
+            "env_location": cookiecutter_json["env_location"],
+            "dependency_file": cookiecutter_json["dependency_file"],
+            "pydata_packages": cookiecutter_json["pydata_packages"],
+        }
     )
 
-    def _is_valid(config):
-        config = dict(config)
-        # env_location only applies to conda (global is invalid for non-conda)
-        if (config["environment_manager"] != "conda") and (
-            config["env_location"] == "global"
-        ):
-            return False
-        # environment.yml only valid for conda
-        if (config["environment_manager"] != "conda") and (
-            config["dependency_file"] == "environment.yml"
-        ):
-            return False
-        return True
-
-    # remove invalid configs
-    configs = [c for c in configs if _is_valid(c)]
-
     # ensure linting and formatting options are run on code scaffold
     # otherwise, linting "passes" because one linter never runs on any code during tests
     code_format_cycler = cycle(
@@ -121,6 +137,18 @@ def pytest_addoption(parser):
         default=0,
         help="Speed up tests by skipping configs and/or Makefile validation",
     )
+    parser.addoption(
+        "--update-snapshots",
+        action="store_true",
+        default=False,
+        help="Store the digests of the rendered configs as the new snapshots",
+    )
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Also run the tests marked benchmark, which assert on timings",
+    )
 
 
 @pytest.fixture
@@ -128,12 +156,13 @@ def fast(request):
     return request.config.getoption("--fast")
 
 
+def make_test_id(config):
+    env_loc = config.get("env_location", "local")
+    return f"{config['environment_manager']}-{env_loc}-{config['dependency_file']}-{config['pydata_packages']}"
+
+
 def pytest_generate_tests(metafunc):
     # setup config fixture to get all of the results from config_generator
-    def make_test_id(config):
-        env_loc = config.get("env_location", "local")
-        return f"{config['environment_manager']}-{env_loc}-{config['dependency_file']}-{config['pydata_packages']}"
-
     if "config" in metafunc.fixturenames:
         metafunc.parametrize(
             "config",
@@ -142,6 +171,31 @@ def pytest_generate_tests(metafunc):
         )
 
 
+def pytest_collection_modifyitems(config, items):
+    def cost(item):
+        callspec = getattr(item, "callspec", None)
+        if callspec is None or "config" not in callspec.params:
+            return 0
+        return ENV_MANAGER_COST.get(callspec.params["config"]["environment_manager"], 0)
+
+    # within each module, so that module-scoped fixtures are set up once, and
+    # stable, so the order is otherwise unchanged and the same on every worker
+    modules = {}
+    for item in items:
+        modules.setdefault(item.nodeid.partition("::")[0], []).append(item)
+    items[:] = [
+        item
+        for module_items in modules.values()
+        for item in sorted(module_items, key=cost, reverse=True)
+    ]
+
+    if not config.getoption("--benchmark"):
+        skip = pytest.mark.skip(reason="benchmark, run with --benchmark")
+        for item in items:
+            if "benchmark" in item.keywords:
+                item.add_marker(skip)
+
+
 @contextmanager
 def bake_project(config):
     temp = Path(tempfile.mkdtemp(suffix="data-project")).resolve()
@@ -0,0 +1,256 @@
+"""
+Environment snapshot cache for the test harnesses.
+
+Baked projects with the same dependency set build identical environments, so
+the harnesses snapshot the environment of the first one and restore it for the
+others before running `make create_environment`, which then finds the
+environment in place and skips creating it; `make requirements` only has to
+reinstall the project itself.
+
+Snapshots are keyed by a hash of the environment manager, the Python version
+and the dependencies declared in the generated project (`requirements*.txt`,
+the dependency tables of `pyproject.toml` and `environment.yml` without its
+`name:`). Virtual environments are hard-linked into the project, with the
+files that contain their absolute path rewritten; conda environments are
+cloned with `conda create --clone`, which relocates them.
+
+When CCDS_TEST_WHEELHOUSE is set, the wheels of every snapshot are also
+collected into that directory and the harnesses pass it to pip and uv as a
+package source; with CCDS_TEST_OFFLINE=1 it stands in for the index entirely.
+
+Usage (from the harness scripts):
+
+    python env_cache.py restore <project_dir> <env_manager> [--prefix P | --name N]
+    python env_cache.py save <project_dir> <env_manager> [--prefix P | --name N]
+
+Set CCDS_TEST_NO_ENV_CACHE=1 to disable the cache; CCDS_TEST_ENV_CACHE sets its
+location (by default `ccds-env-cache` in the temp directory, kept between runs).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import tomlkit
+
+REQUIREMENTS_FILES = ["requirements.txt", "requirements-dev.txt"]
+
+# directories of a virtual environment whose files may contain its path
+SCRIPT_DIRS = [(), ("bin",), ("Scripts",)]
+
+
+def cache_root():
+    return Path(
+        os.environ.get("CCDS_TEST_ENV_CACHE")
+        or Path(tempfile.gettempdir()) / "ccds-env-cache"
+    )
+
+
+def _requirement_lines(text):
+    lines = (line.strip() for line in text.splitlines())
+    return sorted(line for line in lines if line and not line.startswith("#"))
+
+
+def dependency_spec(project_dir, env_manager):
+    """What the environment of a generated project is built from."""
+    project_dir = Path(project_dir)
+    spec = {
+        "env_manager": env_manager,
+        "python": "{}.{}".format(*sys.version_info[:2]),
+    }
+
+    for name in REQUIREMENTS_FILES:
+        path = project_dir / name
+        if path.exists():
+            spec[name] = _requirement_lines(path.read_text())
+
+    environment_yml = project_dir / "environment.yml"
+    if environment_yml.exists():
+        lines = environment_yml.read_text().splitlines()
+        spec["environment.yml"] = [
+            line.rstrip() for line in lines if not line.startswith("name:")
+        ]
+
+    pyproject = tomlkit.parse((project_dir / "pyproject.toml").read_text()).unwrap()
+    project = pyproject.get("project", {})
+    spec["pyproject.toml"] = {
+        "requires-python": project.get("requires-python"),
+        "dependencies": sorted(project.get("dependencies", [])),
+        "optional-dependencies": {
+            extra: sorted(requirements)
+            for extra, requirements in project.get("optional-dependencies", {}).items()
+        },
+        "build-system": pyproject.get("build-system"),
+    }
+    return spec
+
+
+def dependency_key(project_dir, env_manager):
+    spec = json.dumps(dependency_spec(project_dir, env_manager), sort_keys=True)
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()[:24]
+
+
+def _is_text_with(path, needle):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return False
+    return b"\0" not in data and needle in data
+
+
+def _relink_tree(src, dst, old_prefix, new_prefix):
+    """Recreate the tree ``src`` at ``dst`` with hard links, rewriting the text
+    files that refer to ``old_prefix``.
+    """
+    old, new = os.fsencode(old_prefix), os.fsencode(new_prefix)
+    for dirpath, dirnames, filenames in os.walk(src):
+        relative = Path(dirpath).relative_to(src)
+        target_dir = Path(dst, relative)
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+        for name in dirnames + filenames:
+            source = Path(dirpath, name)
+            target = target_dir / name
+            if source.is_symlink():
+                link = os.readlink(source)
+                if link.startswith(old_prefix):
+                    link = new_prefix + link[len(old_prefix) :]
+                os.symlink(link, target)
+                if name in dirnames:
+                    dirnames.remove(name)
+            elif name in filenames:
+                # scripts, activate and pyvenv.cfg hold the absolute prefix
+                if relative.parts[:1] in SCRIPT_DIRS and _is_text_with(source, old):
+                    target.write_bytes(source.read_bytes().replace(old, new))
+                    shutil.copymode(source, target)
+                    continue
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copy2(source, target)
+
+
+def _conda(*args):
+    conda = os.environ.get("CONDA_EXE", "conda")
+    subprocess.run([conda, *args], check=True, stdout=subprocess.DEVNULL)
+
+
+def _conda_target(args):
+    if args.prefix:
+        return ["-p", str(Path(args.project_dir, args.prefix).resolve())]
+    return ["-n", args.name]
+
+
+def restore(args):
+    entry = cache_root() / dependency_key(args.project_dir, args.env_manager)
+    if not (entry / "complete").exists():
+        print(f"env cache: no snapshot at {entry}")
+        return
+
+    prefix = (entry / "prefix").read_text()
+    if args.env_manager == "conda":
+        _conda("create", "-q", "-y", *_conda_target(args), "--clone", prefix)
+    else:
+        venv = Path(args.project_dir, ".venv").resolve()
+        _relink_tree(entry / "env", venv, prefix, str(venv))
+    print(f"env cache: restored {entry}")
+
+
+def _frozen_requirements(args, env_path):
+    if args.env_manager == "uv":
+        command = ["uv", "pip", "freeze", "--python", str(env_path)]
+    else:
+        command = [str(env_path / "bin" / "python"), "-m", "pip", "freeze"]
+    frozen = subprocess.run(command, check=True, capture_output=True, text=True)
+    # the project itself is installed in editable mode
+    return [
+        line
+        for line in frozen.stdout.splitlines()
+        if line and not line.startswith("-e ") and " @ file:" not in line
+    ]
+
+
+def _fill_wheelhouse(args, env_path):
+    wheelhouse = os.environ.get("CCDS_TEST_WHEELHOUSE")
+    if not wheelhouse:
+        return
+    requirements = _frozen_requirements(args, env_path)
+    if requirements:
+        subprocess.run(
+            [sys.executable, "-m", "pip", "wheel", "-q", "--no-deps"]
+            + ["-w", wheelhouse, *requirements],
+            check=True,
+        )
+
+
+def save(args):
+    root = cache_root()
+    key = dependency_key(args.project_dir, args.env_manager)
+    entry = root / key
+    if (entry / "complete").exists():
+        return
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix="staging-", dir=root))
+    clone = None
+    try:
+        if args.env_manager == "conda":
+            # conda environments can't be moved, so the clone stays where it
+            # is created and the entry records its path
+            (root / "conda-envs").mkdir(exist_ok=True)
+            clone = Path(tempfile.mkdtemp(prefix=f"{key}-", dir=root / "conda-envs"))
+            clone.rmdir()
+            _conda(
+                "create",
+                "-q",
+                "-y",
+                "-p",
+                str(clone),
+                "--clone",
+                _conda_target(args)[1],
+            )
+            env_path = clone
+        else:
+            env_path = Path(args.project_dir, ".venv").resolve()
+            _relink_tree(env_path, staging / "env", str(env_path), str(env_path))
+        (staging / "prefix").write_text(str(env_path))
+        _fill_wheelhouse(args, env_path)
+
+        (staging / "complete").touch()
+        staging.rename(entry)
+        clone = None
+    except OSError:
+        # another worker saved the same environment meanwhile
+        if not (entry / "complete").exists():
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        if clone is not None:
+            shutil.rmtree(clone, ignore_errors=True)
+    print(f"env cache: saved {entry}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["restore", "save"])
+    parser.add_argument("project_dir")
+    parser.add_argument("env_manager")
+    location = parser.add_mutually_exclusive_group()
+    location.add_argument("--prefix", help="conda environment path in the project")
+    location.add_argument("--name", help="name of a global conda environment")
+    args = parser.parse_args(argv)
+
+    if os.environ.get("CCDS_TEST_NO_ENV_CACHE"):
+        return
+    {"restore": restore, "save": save}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
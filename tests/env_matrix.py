@@ -230,6 +230,9 @@ def get_expected_files(config: dict) -> list:
     if config.get("testing_framework", "pytest") != "none":
         expected.append("tests/test_data.py")
 
+    if config.get("lock_dependencies") == "Yes":
+        expected.append("requirements.lock")
+
     return expected
 
 
@@ -0,0 +1,169 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+from click.testing import CliRunner
+from conftest import CCDS_ROOT
+
+from ccds.__main__ import api_main
+from ccds.archive import (
+    _archive_stdout,
+    archive,
+    cookiecutter_archive,
+    write_archive,
+)
+from ccds.hook_utils.tree import MemoryTree
+
+
+class Unseekable(io.RawIOBase):
+    """A write-only stream, like a pipe or a socket."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def _zip_files(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {
+            info.filename: zf.read(info) for info in zf.infolist() if not info.is_dir()
+        }
+
+
+def _disk_files(project_dir):
+    files = {}
+    root = os.path.dirname(project_dir)
+    for dirpath, _dirnames, filenames in os.walk(project_dir):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                files[relative] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("format", ["zip", "tar", "tar.gz"])
+def test_write_archive(format):
+    tree = MemoryTree({"README.md": b"# readme\n", "src/pkg/__init__.py": b""})
+    tree.add_dir("data/raw")
+    stream = Unseekable()
+
+    write_archive(tree, stream, format, prefix="project")
+
+    data = bytes(stream.data)
+    if format == "zip":
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            names = zf.namelist()
+            assert zf.read("project/README.md") == b"# readme\n"
+    else:
+        with tarfile.open(fileobj=io.BytesIO(data)) as tf:
+            names = [
+                member.name + ("/" if member.isdir() else "")
+                for member in tf.getmembers()
+            ]
+            assert tf.extractfile("project/README.md").read() == b"# readme\n"
+    assert names == [
+        "project/",
+        "project/README.md",
+        "project/data/",
+        "project/data/raw/",
+        "project/src/",
+        "project/src/pkg/",
+        "project/src/pkg/__init__.py",
+    ]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="rar"):
+        write_archive(MemoryTree(), io.BytesIO(), "rar")
+
+
+@pytest.mark.parametrize(
+    "extra_context",
+    [
+        {},
+        {
+            "testing_framework": "unittest",
+            "docs": "none",
+            "python_version_number": "3.11",
+        },
+    ],
+)
+def test_archive_matches_generated_project(tmp_path, extra_context):
+    stream = io.BytesIO()
+    name = cookiecutter_archive(str(CCDS_ROOT), stream, extra_context=extra_context)
+
+    project_dir = api_main.cookiecutter(
+        str(CCDS_ROOT),
+        no_input=True,
+        extra_context=extra_context,
+        output_dir=str(tmp_path),
+    )
+    assert name == os.path.basename(project_dir)
+    assert _zip_files(stream.getvalue()) == _disk_files(project_dir)
+
+
+def test_custom_config_overlay_in_memory(tmp_path, monkeypatch):
+    overlay = tmp_path / "overlay"
+    (overlay / "configs").mkdir(parents=True)
+    (overlay / "configs" / "settings.toml").write_text("a = 1\n")
+    (overlay / "README.md").write_text("from the overlay\n")
+    monkeypatch.chdir(tmp_path)
+
+    stream = io.BytesIO()
+    name = cookiecutter_archive(
+        str(CCDS_ROOT), stream, extra_context={"custom_config": "overlay"}
+    )
+
+    files = _zip_files(stream.getvalue())
+    assert files[f"{name}/README.md"] == b"from the overlay\n"
+    assert files[f"{name}/configs/settings.toml"] == b"a = 1\n"
+    assert f"{name}/pyproject.toml" in files
+
+
+def test_archive_command(tmp_path):
+    output = tmp_path / "project.tar.gz"
+
+    result = CliRunner().invoke(
+        archive, [str(CCDS_ROOT), "repo_name=my-project", "-o", str(output)]
+    )
+
+    assert result.exit_code == 0, result.output
+    with tarfile.open(output) as tf:
+        assert "my-project/pyproject.toml" in tf.getnames()
+    assert not (tmp_path / "my-project").exists()
+
+
+def test_archive_stdout_keeps_other_output_out(capfd):
+    with _archive_stdout() as fileobj:
+        subprocess.run([sys.executable, "-c", "print('from pip')"], check=True)
+        print("from a step")
+        fileobj.write(b"archive")
+
+    out, err = capfd.readouterr()
+    assert out == "archive"
+    assert "from pip" in err and "from a step" in err
+
+
+def test_template_hooks_not_run(tmp_path):
+    template = tmp_path / "template"
+    shutil.copytree(CCDS_ROOT, template, ignore=shutil.ignore_patterns(".git", "data"))
+    (template / "hooks" / "pre_prompt.py").write_text(
+        "raise SystemExit('pre_prompt ran')\n"
+    )
+
+    stream = io.BytesIO()
+    name = cookiecutter_archive(str(template), stream)
+
+    assert f"{name}/pyproject.toml" in _zip_files(stream.getvalue())
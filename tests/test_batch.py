@@ -0,0 +1,64 @@
+import json
+import shutil
+import tempfile
+from itertools import islice
+from pathlib import Path
+
+import pytest
+from conftest import CCDS_ROOT, config_generator
+
+from ccds.batch import load_manifest, load_template, run_batch
+
+
+@pytest.fixture
+def output_dir():
+    temp = Path(tempfile.mkdtemp(suffix="batch-projects")).resolve()
+    yield temp
+    shutil.rmtree(temp)
+
+
+def test_load_manifest_json_and_yaml(tmp_path):
+    entries = [{"project_name": "one"}, {"project_name": "two"}]
+
+    json_manifest = tmp_path / "manifest.json"
+    json_manifest.write_text(json.dumps({"projects": entries}))
+    assert load_manifest(json_manifest) == entries
+
+    yaml_manifest = tmp_path / "manifest.yaml"
+    yaml_manifest.write_text("- project_name: one\n- project_name: two\n")
+    assert load_manifest(yaml_manifest) == entries
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_renders_all_projects(output_dir, workers):
+    configs = list(islice(config_generator(), 3))
+    loaded = load_template(str(CCDS_ROOT))
+    try:
+        results = run_batch(loaded, configs, output_dir=output_dir, workers=workers)
+    finally:
+        loaded.cleanup()
+
+    assert [r.name for r in results] == [c["repo_name"] for c in configs]
+    for config, result in zip(configs, results):
+        assert result.ok, result.error
+        project_dir = Path(result.project_dir)
+        assert project_dir == output_dir / config["repo_name"]
+        assert (project_dir / config["module_name"] / "__init__.py").exists()
+
+
+def test_batch_reports_failures_per_project(output_dir):
+    good, bad = islice(config_generator(), 2)
+    # invalid python version makes the post-generation hook fail
+    bad = dict(bad, python_version_number="3")
+
+    loaded = load_template(str(CCDS_ROOT))
+    try:
+        results = run_batch(loaded, [good, bad], output_dir=output_dir, workers=2)
+    finally:
+        loaded.cleanup()
+
+    assert results[0].ok
+    assert not results[1].ok
+    assert "FailedHookException" in results[1].error
+    assert (output_dir / good["repo_name"]).exists()
+    assert not (output_dir / bad["repo_name"]).exists()
@@ -0,0 +1,97 @@
+import hashlib
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from conftest import CCDS_ROOT, config_generator
+from jinja2 import DictLoader, Environment
+
+from ccds.__main__ import api_main
+from ccds.bytecode_cache import TemplateBytecodeCache
+
+
+def _tree_digest(root):
+    digest = hashlib.sha256()
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        digest.update(str(path.relative_to(root)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _bake_matrix(configs):
+    """Render every config, returning the total time and the output digests.
+
+    Hooks are skipped: they run in a subprocess that the bytecode cache does not
+    affect and would dominate the timings.
+    """
+    digests = {}
+    elapsed = 0.0
+    for config in configs:
+        temp = Path(tempfile.mkdtemp(suffix="data-project")).resolve()
+        start = time.perf_counter()
+        api_main.cookiecutter(
+            str(CCDS_ROOT),
+            no_input=True,
+            extra_context=config,
+            output_dir=temp,
+            accept_hooks=False,
+        )
+        elapsed += time.perf_counter() - start
+        digests[config["repo_name"]] = _tree_digest(temp / config["repo_name"])
+        shutil.rmtree(temp)
+    return elapsed, digests
+
+
+def test_bytecode_cache_cold_vs_warm(fast, tmp_path, monkeypatch):
+    """Benchmark rendering the config matrix without, with an empty and with a
+    warm bytecode cache.
+    """
+    monkeypatch.setenv("CCDS_CACHE_DIR", str(tmp_path / "cache"))
+    bytecode_dir = tmp_path / "cache" / "bytecode"
+    configs = list(config_generator(fast))
+
+    monkeypatch.setenv("CCDS_NO_BYTECODE_CACHE", "1")
+    uncached_time, uncached_digests = _bake_matrix(configs)
+    monkeypatch.delenv("CCDS_NO_BYTECODE_CACHE")
+
+    cold_time, cold_digests = _bake_matrix(configs)
+    cached = {p: p.stat().st_mtime_ns for p in bytecode_dir.iterdir()}
+    assert cached, "no compiled templates were written to the bytecode cache"
+
+    warm_time, warm_digests = _bake_matrix(configs)
+
+    print(
+        f"\nrendered {len(configs)} configs: no cache {uncached_time:.2f}s, "
+        f"cold cache {cold_time:.2f}s, warm cache {warm_time:.2f}s "
+        f"({len(cached)} compiled templates cached)"
+    )
+    # warm bakes load the bytecode instead of rewriting it, and render the same output
+    assert {p: p.stat().st_mtime_ns for p in bytecode_dir.iterdir()} == cached
+    assert uncached_digests == cold_digests == warm_digests
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"trim_blocks": True},
+        {"variable_start_string": "[[", "variable_end_string": "]]"},
+        {"autoescape": True},
+    ],
+)
+def test_environment_options_change_the_key(tmp_path, options):
+    cache = TemplateBytecodeCache(str(tmp_path))
+    source = "{% if true %}\n{{ '<b>' }} [[ 1 ]]\n{% endif %}\n"
+
+    rendered = []
+    for env_options in ({}, options):
+        env = Environment(
+            loader=DictLoader({"template": source}),
+            bytecode_cache=cache,
+            **env_options,
+        )
+        rendered.append(env.get_template("template").render())
+
+    assert len(list(tmp_path.iterdir())) == 2
+    assert rendered[0] != rendered[1]
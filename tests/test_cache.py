@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import time
+
+from ccds import cache
+from ccds.cache import CacheIndex
+
+
+def _add_entries(root, worker, count):
+    index = CacheIndex(root)
+    for i in range(count):
+        key = f"{worker}-{i}"
+        index.entry_path(key).mkdir(parents=True)
+        index.add(key, worker=worker)
+
+
+def test_concurrent_adds_are_all_recorded(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_add_entries, args=(tmp_path, worker, 20))
+        for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    assert len(CacheIndex(tmp_path).load()) == 80
+
+
+def test_lock_is_reentrant(tmp_path):
+    index = CacheIndex(tmp_path)
+    (tmp_path / "key").mkdir()
+
+    with index.lock():
+        entries = index.load()
+        index.save(entries)
+        index.add("key")
+
+    assert index.get("key") is not None
+
+
+def test_prune_removes_old_orphans(tmp_path, monkeypatch):
+    index = CacheIndex(tmp_path)
+    for key in ("kept", "repo/sha"):
+        index.entry_path(key).mkdir(parents=True)
+        index.add(key)
+    for orphan in ("store-interrupted", "repo/other-sha", "fresh"):
+        index.entry_path(orphan).mkdir(parents=True)
+    old = time.time() - cache.ORPHAN_AGE - 10
+    for orphan in ("store-interrupted", "repo/other-sha"):
+        os.utime(index.entry_path(orphan), (old, old))
+
+    assert index.prune() == []
+
+    assert index.entry_path("kept").exists()
+    assert index.entry_path("repo/sha").exists()
+    assert index.entry_path("fresh").exists()
+    assert not index.entry_path("store-interrupted").exists()
+    assert not index.entry_path("repo/other-sha").exists()
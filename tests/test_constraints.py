@@ -0,0 +1,129 @@
+import json
+from itertools import product
+
+import jinja2
+import pytest
+import yaml
+from conftest import CCDS_ROOT
+
+from ccds import monkey_patch
+from ccds.constraints import Constraints
+from ccds.monkey_patch import generate_context_wrapper, prompt_for_config
+
+CCDS_JSON = json.loads((CCDS_ROOT / "ccds.json").read_text())
+
+MATRIX_FIELDS = [
+    "environment_manager",
+    "env_location",
+    "dependency_file",
+    "docker_support",
+    "docker_package_manager",
+]
+
+
+@pytest.fixture
+def constraints():
+    return Constraints.from_context(CCDS_JSON)
+
+
+def test_enumerate_matches_filtered_product(constraints):
+    fields = {field: CCDS_JSON[field] for field in MATRIX_FIELDS}
+
+    enumerated = [dict(c) for c in constraints.enumerate(fields)]
+    filtered = [
+        config
+        for config in (
+            dict(zip(fields, values)) for values in product(*fields.values())
+        )
+        if constraints.is_valid(config)
+    ]
+
+    assert enumerated == filtered
+    assert {"environment_manager": "uv", "env_location": "global"} not in [
+        {k: c[k] for k in ("environment_manager", "env_location")} for c in enumerated
+    ]
+    assert not [
+        c
+        for c in enumerated
+        if c["dependency_file"] == "environment.yml"
+        and c["environment_manager"] != "conda"
+    ]
+
+
+def test_constraint_dependencies(constraints):
+    assert constraints.dependencies("env_location") == ("environment_manager",)
+    assert constraints.dependencies("dependency_file") == ("environment_manager",)
+    assert constraints.dependencies("docker_package_manager") == ("docker_support",)
+    assert constraints.dependencies("project_name") == ()
+
+
+@pytest.mark.parametrize("environment_manager", CCDS_JSON["environment_manager"])
+def test_prompt_applies_constraints(monkeypatch, environment_manager):
+    prompted = {}
+
+    def _read_choice(key, options):
+        prompted[key] = options
+        return environment_manager if key == "environment_manager" else options[0]
+
+    monkeypatch.setattr(monkey_patch, "read_user_choice", _read_choice)
+    monkeypatch.setattr(monkey_patch, "read_user_variable", lambda key, val: val)
+
+    context = generate_context_wrapper(
+        context_file=str(CCDS_ROOT / "cookiecutter.json")
+    )
+    result = prompt_for_config(context, no_input=False)
+
+    conda = environment_manager == "conda"
+    assert ("env_location" in prompted) == conda
+    assert result["env_location"] == "local"
+    assert ("environment.yml" in prompted["dependency_file"]) == conda
+    # docker_support defaults to No, so its package manager is not asked for
+    assert "docker_package_manager" not in prompted
+    assert result["docker_package_manager"] == "uv"
+
+
+@pytest.mark.parametrize(
+    "extra_context, expected",
+    [
+        (
+            {"environment_manager": "uv", "env_location": "global"},
+            {"env_location": "local"},
+        ),
+        (
+            {"environment_manager": "conda", "lock_dependencies": "Yes"},
+            {"lock_dependencies": "No"},
+        ),
+        (
+            {"environment_manager": "conda", "env_location": "global"},
+            {"env_location": "global"},
+        ),
+    ],
+)
+def test_extra_context_cannot_set_ruled_out_variables(extra_context, expected):
+    context = generate_context_wrapper(
+        context_file=str(CCDS_ROOT / "cookiecutter.json"),
+        extra_context=extra_context,
+    )
+    result = prompt_for_config(context, no_input=True)
+
+    assert {key: result[key] for key in expected} == expected
+
+
+def test_copier_questions_agree_with_constraints(constraints):
+    """copier.yml expresses the same rules as ``when`` and ``choices`` templates."""
+    questions = yaml.safe_load((CCDS_ROOT / "copier.yml").read_text())
+    env = jinja2.Environment()
+
+    for answers in product(CCDS_JSON["environment_manager"], ["Yes", "No"]):
+        answers = dict(zip(["environment_manager", "docker_support"], answers))
+
+        for variable in ("env_location", "docker_package_manager"):
+            when = env.from_string(questions[variable]["when"]).render(answers)
+            assert (when == "True") == constraints.applies(variable, answers)
+
+        choices = env.from_string(questions["dependency_file"]["choices"]).render(
+            answers
+        )
+        assert yaml.safe_load(choices) == constraints.options(
+            "dependency_file", CCDS_JSON["dependency_file"], answers
+        )
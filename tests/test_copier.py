@@ -15,7 +15,9 @@ from itertools import cycle, product
 from pathlib import Path
 
 import pytest
-from env_matrix import get_absent_files, get_expected_files
+from tree_verifier import verify_tree
+
+from ccds.constraints import Constraints
 
 CCDS_ROOT = Path(__file__).parents[1].resolve()
 COPIER_DIR = CCDS_ROOT  # copier.yml is now at repo root
@@ -59,33 +61,20 @@ def copier_config_generator(fast=False):
 
     # Python version - match the running version
     running_py_version = f"{sys.version_info.major}.{sys.version_info.minor}"
-    py_version = [("python_version_number", v) for v in [running_py_version]]
-
-    configs = product(
-        py_version,
-        [("environment_manager", opt) for opt in ccds_json["environment_manager"]],
-        [("env_location", opt) for opt in ccds_json["env_location"]],
-        [("dependency_file", opt) for opt in ccds_json["dependency_file"]],
-        [("pydata_packages", opt) for opt in ccds_json["pydata_packages"]],
+    py_version = [running_py_version]
+
+    # search only the combinations allowed by the _constraints in ccds.json
+    constraints = Constraints.from_context(ccds_json)
+    configs = constraints.enumerate(
+        {
+            "python_version_number": py_version,
+            "environment_manager": ccds_json["environment_manager"],
+            "env_location": ccds_json["env_location"],
+            "dependency_file": ccds_json["dependency_file"],
+            "pydata_packages": ccds_json["pydata_packages"],
+        }
     )
 
-    def _is_valid(config):
-        config = dict(config)
-        # env_location only applies to conda
-        if (config["environment_manager"] != "conda") and (
-            config["env_location"] == "global"
-        ):
-            return False
-        # environment.yml only valid for conda
-        if (config["environment_manager"] != "conda") and (
-            config["dependency_file"] == "environment.yml"
-        ):
-            return False
-        return True
-
-    # Filter invalid configs
-    configs = [c for c in configs if _is_valid(c)]
-
     # Cycle through linting and code scaffold options
     code_format_cycler = cycle(
         product(
@@ -201,100 +190,19 @@ def pytest_generate_tests(metafunc):
         )
 
 
-def no_curlies(filepath):
-    """Verify no unrendered Jinja templates in file."""
-    data = filepath.open("r").read()
-    template_strings = ["{{", "}}", "{%", "%}"]
-    template_strings_in_file = [s in data for s in template_strings]
-    return not any(template_strings_in_file)
-
-
 def test_copier_baking_configs(copier_config, fast):
     """Test Copier project generation for various configurations."""
     print("using copier config", json.dumps(copier_config, indent=2))
 
     with bake_copier_project(copier_config) as project_directory:
-        verify_copier_folders(project_directory, copier_config)
-        verify_copier_files(project_directory, copier_config)
-
-
-def verify_copier_folders(root, config):
-    """Verify expected directories exist."""
-    expected_dirs = [
-        ".",
-        "data",
-        "data/external",
-        "data/interim",
-        "data/processed",
-        "data/raw",
-        "docs",
-        "models",
-        "notebooks",
-        "references",
-        "reports",
-        "reports/figures",
-        config["module_name"],
-    ]
-
-    if config["include_code_scaffold"] == "Yes":
-        expected_dirs += [f"{config['module_name']}/modeling"]
-
-    if config["docs"] == "mkdocs":
-        expected_dirs += ["docs/docs"]
-
-    if config.get("testing_framework", "pytest") != "none":
-        expected_dirs += ["tests"]
-
-    expected_dirs = [Path(d) for d in expected_dirs]
-
-    # Exclude system directories
-    excluded_dirs = {".ipynb_checkpoints", "__pycache__"}
-    existing_dirs = [
-        d.resolve().relative_to(root)
-        for d in root.glob("**")
-        if d.is_dir() and d.name not in excluded_dirs
-    ]
-
-    assert sorted(existing_dirs) == sorted(expected_dirs), (
-        f"Directory mismatch for copier {config['environment_manager']} + {config['dependency_file']}\n"
-        f"Missing: {set(expected_dirs) - set(existing_dirs)}\n"
-        f"Extra: {set(existing_dirs) - set(expected_dirs)}"
-    )
-
-
-def verify_copier_files(root, config):
-    """Verify expected files exist and no unexpected files present."""
-    # Get expected files using the same matrix as cookiecutter
-    expected_files = get_expected_files(config)
-
-    # Copier adds .copier-answers.yml
-    expected_files.append(".copier-answers.yml")
-
-    expected_files = [Path(f) for f in expected_files]
-
-    existing_files = [f.relative_to(root) for f in root.glob("**/*") if f.is_file()]
-
-    assert sorted(existing_files) == sorted(set(expected_files)), (
-        f"File mismatch for copier {config['environment_manager']} + {config['dependency_file']}\n"
-        f"Missing: {set(expected_files) - set(existing_files)}\n"
-        f"Extra: {set(existing_files) - set(expected_files)}"
-    )
-
-    # Verify files that should NOT exist
-    absent_files = get_absent_files(config)
-    for absent_file in absent_files:
-        assert not (root / absent_file).exists(), (
-            f"{absent_file} should not exist for copier "
-            f"{config['environment_manager']} + {config['dependency_file']}"
+        # .copier-answers.yml contains template syntax documentation
+        verify_tree(
+            project_directory,
+            copier_config,
+            extra_files=[".copier-answers.yml"],
+            ignore_residue=[".copier-answers.yml"],
         )
 
-    # Verify no unrendered Jinja templates
-    for f in existing_files:
-        # Skip .copier-answers.yml as it contains template syntax documentation
-        if f.name == ".copier-answers.yml":
-            continue
-        assert no_curlies(root / f), f"Unrendered Jinja template in {f}"
-
 
 def test_copier_answers_file_created(fast):
     """Test that .copier-answers.yml is created with correct content."""
@@ -5,7 +5,7 @@ from pathlib import Path
 from subprocess import PIPE, run
 
 from conftest import bake_project
-from env_matrix import get_absent_files, get_expected_files
+from tree_verifier import verify_tree
 
 BASH_EXECUTABLE = os.getenv("BASH_EXECUTABLE", "bash")
 
@@ -30,109 +30,18 @@ def _decode_print_stdout_stderr(result):
     return stdout, stderr
 
 
-def no_curlies(filepath):
-    """Utility to make sure no curly braces appear in a file.
-    That is, was Jinja able to render everything?
-    """
-    data = filepath.open("r").read()
-
-    template_strings = ["{{", "}}", "{%", "%}"]
-
-    template_strings_in_file = [s in data for s in template_strings]
-    return not any(template_strings_in_file)
-
-
 def test_baking_configs(config, fast):
     """For every generated config in the config_generator, run all
     of the tests.
     """
     print("using config", json.dumps(config, indent=2))
     with bake_project(config) as project_directory:
-        verify_folders(project_directory, config)
-        verify_files(project_directory, config)
+        verify_tree(project_directory, config)
 
         if fast < 2:
             verify_makefile_commands(project_directory, config)
 
 
-def verify_folders(root, config):
-    """Tests that expected folders and only expected folders exist."""
-    expected_dirs = [
-        ".",
-        "data",
-        "data/external",
-        "data/interim",
-        "data/processed",
-        "data/raw",
-        "docs",
-        "models",
-        "notebooks",
-        "references",
-        "reports",
-        "reports/figures",
-        config["module_name"],
-    ]
-
-    if config["include_code_scaffold"] == "Yes":
-        expected_dirs += [
-            f"{config['module_name']}/modeling",
-        ]
-
-    if config["docs"] == "mkdocs":
-        expected_dirs += ["docs/docs"]
-
-    # Tests folder is created when testing_framework != "none"
-    if config.get("testing_framework", "pytest") != "none":
-        expected_dirs += ["tests"]
-
-    expected_dirs = [
-        #  (root / d).resolve().relative_to(root) for d in expected_dirs
-        Path(d)
-        for d in expected_dirs
-    ]
-
-    # Exclude .ipynb_checkpoints and __pycache__ directories
-    excluded_dirs = {".ipynb_checkpoints", "__pycache__"}
-    existing_dirs = [
-        d.resolve().relative_to(root)
-        for d in root.glob("**")
-        if d.is_dir() and d.name not in excluded_dirs
-    ]
-
-    assert sorted(existing_dirs) == sorted(expected_dirs)
-
-
-def verify_files(root, config):
-    """Test that expected files and only expected files exist.
-
-    Uses the ENV_MATRIX from env_matrix.py for environment-specific file expectations.
-    See docs/docs/env-management.md for the full matrix documentation.
-    """
-    # Get expected files from the env_matrix
-    expected_files = get_expected_files(config)
-    expected_files = [Path(f) for f in expected_files]
-
-    existing_files = [f.relative_to(root) for f in root.glob("**/*") if f.is_file()]
-
-    assert sorted(existing_files) == sorted(set(expected_files)), (
-        f"File mismatch for {config['environment_manager']} + {config['dependency_file']}\n"
-        f"Missing: {set(expected_files) - set(existing_files)}\n"
-        f"Extra: {set(existing_files) - set(expected_files)}"
-    )
-
-    # Verify files that should NOT exist (from env_matrix)
-    absent_files = get_absent_files(config)
-    for absent_file in absent_files:
-        assert not (root / absent_file).exists(), (
-            f"{absent_file} should not exist for "
-            f"{config['environment_manager']} + {config['dependency_file']}"
-        )
-
-    # Verify no unrendered Jinja templates
-    for f in existing_files:
-        assert no_curlies(root / f), f"Unrendered Jinja template in {f}"
-
-
 def verify_makefile_commands(root, config):
     """Actually shell out to bash and run the make commands for:
     - blank command listing commands
@@ -177,6 +86,8 @@ def verify_makefile_commands(root, config):
         cmd_args,
         stderr=PIPE,
         stdout=PIPE,
+        # the environment cache of the harnesses runs with the test interpreter
+        env=dict(os.environ, CCDS_TEST_PYTHON=sys.executable),
     )
 
     stdout_output, stderr_output = _decode_print_stdout_stderr(result)
@@ -0,0 +1,31 @@
+import pytest
+import tomlkit
+from conftest import CCDS_ROOT, config_generator
+
+from ccds.batch import load_template, project_context
+from ccds.hook_utils.dependencies import basic, performance
+from ccds.render import render_project_tree
+
+
+@pytest.mark.parametrize("dependency_file", ["requirements.txt", "pyproject.toml"])
+def test_render_performance_tier(dependency_file):
+    config = dict(
+        next(config_generator()),
+        dependency_file=dependency_file,
+        pydata_packages="performance",
+        include_code_scaffold="Yes",
+    )
+    loaded = load_template(str(CCDS_ROOT), accept_hooks=False, use_template_cache=False)
+
+    tree = render_project_tree(loaded.repo_dir, project_context(loaded, config))
+
+    if dependency_file == "pyproject.toml":
+        doc = tomlkit.parse(tree.read_text("pyproject.toml")).unwrap()
+        requirements = doc["project"]["dependencies"]
+    else:
+        requirements = tree.read_text("requirements.txt").splitlines()
+    assert set(basic + performance) <= set(requirements)
+    module = config["module_name"]
+    assert "sink_parquet" in tree.read_text(f"{module}/dataset.py")
+    assert "prange" in tree.read_text(f"{module}/features.py")
+    assert "Parallel(n_jobs=-1)" in tree.read_text(f"{module}/modeling/train.py")
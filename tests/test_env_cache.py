@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import env_cache
+import pytest
+from conftest import bake_project, config_generator
+
+
+@pytest.fixture(autouse=True)
+def isolated_env_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CCDS_TEST_ENV_CACHE", str(tmp_path / "env-cache"))
+    monkeypatch.delenv("CCDS_TEST_NO_ENV_CACHE", raising=False)
+    monkeypatch.delenv("CCDS_TEST_WHEELHOUSE", raising=False)
+
+
+def test_key_ignores_project_names():
+    config = next(config_generator())
+    renamed = dict(config, repo_name="other-repo", env_name="other_env")
+    other_packages = dict(
+        config,
+        pydata_packages="basic" if config["pydata_packages"] == "none" else "none",
+    )
+
+    with bake_project(config) as first, bake_project(renamed) as second:
+        key = env_cache.dependency_key(first, "uv")
+        assert env_cache.dependency_key(second, "uv") == key
+        assert env_cache.dependency_key(first, "virtualenv") != key
+
+    with bake_project(other_packages) as third:
+        assert env_cache.dependency_key(third, "uv") != key
+
+
+def test_venv_snapshot_restored_with_hard_links(tmp_path):
+    config = next(config_generator())
+    with bake_project(config) as first, bake_project(config) as second:
+        subprocess.run(
+            [sys.executable, "-m", "venv", "--without-pip", str(first / ".venv")],
+            check=True,
+        )
+        (first / ".venv" / "installed.py").write_text("")
+        env_cache.main(["save", str(first), "virtualenv"])
+        env_cache.main(["restore", str(second), "virtualenv"])
+
+        venv = second / ".venv"
+        activate = (venv / "bin" / "activate").read_text()
+        assert str(venv) in activate
+        assert str(first / ".venv") not in activate
+
+        # everything else is shared with the snapshot
+        key = env_cache.dependency_key(first, "virtualenv")
+        snapshot = env_cache.cache_root() / key / "env"
+        assert os.path.samefile(snapshot / "installed.py", venv / "installed.py")
+        python = subprocess.run(
+            [str(venv / "bin" / "python"), "-c", "import sys; print(sys.prefix)"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        assert python.stdout.strip() == str(venv)
+
+
+def test_restore_without_snapshot_is_a_no_op(tmp_path, capsys):
+    config = next(config_generator())
+    with bake_project(config) as project:
+        env_cache.main(["restore", str(project), "uv"])
+        assert not (project / ".venv").exists()
+    assert "no snapshot" in capsys.readouterr().out
@@ -16,4 +16,22 @@ function run_tests () {
     if [ -f "$2/config.py" ]; then
         python -c "from $2 import config"
     fi
-}
\ No newline at end of file
+}
+
+
+# Restore / save the environment snapshot of the project in $1, see env_cache.py
+function env_cache () {
+    "${CCDS_TEST_PYTHON:-python3}" "$CCDS_ROOT/env_cache.py" "$@"
+}
+
+# A local wheelhouse as package source for pip and uv, instead of the index
+# with CCDS_TEST_OFFLINE=1
+if [ -n "$CCDS_TEST_WHEELHOUSE" ]; then
+    mkdir -p "$CCDS_TEST_WHEELHOUSE"
+    export PIP_FIND_LINKS="$CCDS_TEST_WHEELHOUSE"
+    export UV_FIND_LINKS="$CCDS_TEST_WHEELHOUSE"
+    if [ -n "$CCDS_TEST_OFFLINE" ]; then
+        export PIP_NO_INDEX=1
+        export UV_NO_INDEX=1
+    fi
+fi
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from conftest import bake_project, config_generator
+from cookiecutter import hooks
+from cookiecutter.exceptions import FailedHookException
+
+from ccds.hook_runner import exec_hook
+
+
+@pytest.fixture
+def popen_calls(monkeypatch):
+    """Record the hook subprocesses cookiecutter starts."""
+    calls = []
+    popen = subprocess.Popen
+
+    def recording_popen(command, *args, **kwargs):
+        calls.append(command)
+        return popen(command, *args, **kwargs)
+
+    monkeypatch.setattr(hooks.subprocess, "Popen", recording_popen)
+    return calls
+
+
+def test_hooks_run_in_process(popen_calls, monkeypatch):
+    monkeypatch.delenv("CCDS_HOOK_SUBPROCESS", raising=False)
+    config = next(config_generator())
+
+    with bake_project(config) as project_dir:
+        assert (project_dir / config["module_name"] / "__init__.py").exists()
+        assert not (project_dir / "tests" / "pytest").exists()
+
+    assert popen_calls == []
+
+
+def test_subprocess_fallback(popen_calls, monkeypatch):
+    monkeypatch.setenv("CCDS_HOOK_SUBPROCESS", "1")
+    config = next(config_generator())
+
+    with bake_project(config) as project_dir:
+        assert (project_dir / config["module_name"] / "__init__.py").exists()
+
+    # pre_prompt.py, then post_gen_project.py rendered to a temporary file
+    assert len(popen_calls) == 2
+    assert os.path.basename(popen_calls[0][-1]) == "pre_prompt.py"
+    assert all(command[0] == sys.executable for command in popen_calls)
+
+
+def test_exec_hook_scopes_cwd_and_argv(tmp_path):
+    cwd, argv = os.getcwd(), sys.argv
+    source = (
+        "import os, sys\n"
+        "assert __name__ == '__main__'\n"
+        "open('seen.txt', 'w').write(os.getcwd() + '\\n' + sys.argv[0])\n"
+    )
+
+    exec_hook(source, "/hooks/post_gen_project.py", tmp_path)
+
+    seen = (tmp_path / "seen.txt").read_text().splitlines()
+    assert seen == [str(tmp_path), "/hooks/post_gen_project.py"]
+    assert os.getcwd() == cwd
+    assert sys.argv is argv
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("import sys\nsys.exit(3)\n", "exit status: 3"),
+        ("import sys\nsys.exit('no python version')\n", "exit status: 1"),
+        ("raise ValueError('bad version')\n", "bad version"),
+        ("def broken(:\n", "invalid syntax"),
+    ],
+)
+def test_exec_hook_failures(tmp_path, source, message):
+    cwd = os.getcwd()
+
+    with pytest.raises(FailedHookException, match=message):
+        exec_hook(source, "post_gen_project.py", tmp_path)
+
+    assert os.getcwd() == cwd
+
+
+def test_exec_hook_clean_exit(tmp_path):
+    exec_hook("import sys\nsys.exit(0)\n", "post_gen_project.py", tmp_path)
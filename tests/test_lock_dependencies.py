@@ -0,0 +1,114 @@
+import hashlib
+import zipfile
+
+import pytest
+from conftest import CCDS_ROOT, config_generator
+from tree_verifier import index_memory_tree, verify_index
+
+from ccds.batch import load_template, project_context
+from ccds.hook_utils import pipeline
+from ccds.hook_utils.dependencies import format_lockfile, lock_requirements
+from ccds.hook_utils.tree import MemoryTree
+from ccds.render import render_project_tree
+
+
+def _wheel(wheelhouse, name, version, requires=()):
+    """Write a minimal pure-python wheel and return its sha256."""
+    dist = f"{name.replace('-', '_')}-{version}"
+    path = wheelhouse / f"{dist}-py3-none-any.whl"
+    metadata = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}"]
+    metadata += [f"Requires-Dist: {requirement}" for requirement in requires]
+    with zipfile.ZipFile(path, "w") as whl:
+        whl.writestr(f"{name.replace('-', '_')}/__init__.py", "")
+        whl.writestr(f"{dist}.dist-info/METADATA", "\n".join(metadata) + "\n")
+        whl.writestr(
+            f"{dist}.dist-info/WHEEL",
+            "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        )
+        whl.writestr(f"{dist}.dist-info/RECORD", "")
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+@pytest.fixture
+def wheelhouse(tmp_path):
+    wheelhouse = tmp_path / "wheelhouse"
+    wheelhouse.mkdir()
+    hashes = {
+        "ccds-lock-app": _wheel(wheelhouse, "ccds-lock-app", "1.0", ["ccds-lock-dep"]),
+        "ccds-lock-dep": _wheel(wheelhouse, "ccds-lock-dep", "2.1"),
+    }
+    _wheel(wheelhouse, "ccds-lock-dep", "1.0")
+    return wheelhouse, hashes
+
+
+@pytest.mark.parametrize("python_version", ["3.12", "3.9"])
+def test_lock_requirements(wheelhouse, python_version):
+    wheelhouse, hashes = wheelhouse
+
+    locked = lock_requirements(
+        ["ccds-lock-app"], python_version, find_links=str(wheelhouse)
+    )
+
+    assert locked == [
+        ("ccds-lock-app", "1.0", hashes["ccds-lock-app"]),
+        ("ccds-lock-dep", "2.1", hashes["ccds-lock-dep"]),
+    ]
+
+
+def test_format_lockfile():
+    text = format_lockfile([("numpy", "2.0.0", "ab" * 32)], "3.12")
+
+    assert text.startswith("# Resolved by ccds for Python 3.12")
+    assert f"numpy==2.0.0 \\\n    --hash=sha256:{'ab' * 32}\n" in text
+
+
+@pytest.mark.parametrize("dependency_file", ["requirements.txt", "pyproject.toml"])
+def test_render_with_lock(monkeypatch, dependency_file):
+    resolved = []
+
+    def fake_lock(requirements, python_version, index_url=None, find_links=None):
+        resolved.append((requirements, python_version, find_links))
+        return [("python-dotenv", "1.0.0", "00" * 32)]
+
+    monkeypatch.setattr(pipeline, "lock_requirements", fake_lock)
+    monkeypatch.setenv("CCDS_LOCK_FIND_LINKS", "/wheelhouse")
+    config = dict(
+        next(config_generator()),
+        environment_manager="virtualenv",
+        dependency_file=dependency_file,
+        lock_dependencies="Yes",
+    )
+    loaded = load_template(str(CCDS_ROOT), accept_hooks=False, use_template_cache=False)
+
+    tree = render_project_tree(loaded.repo_dir, project_context(loaded, config))
+
+    verify_index(index_memory_tree(tree), config)
+    [(requirements, python_version, find_links)] = resolved
+    assert "python-dotenv" in requirements
+    assert "ruff" in requirements  # dev dependencies are locked as well
+    assert not any(requirement.startswith("-") for requirement in requirements)
+    assert (python_version, find_links) == (
+        config["python_version_number"],
+        "/wheelhouse",
+    )
+    assert "python-dotenv==1.0.0" in tree.read_text("requirements.lock")
+    assert "--require-hashes -r requirements.lock" in tree.read_text("Makefile")
+
+
+def test_no_lock_for_other_environment_managers(monkeypatch):
+    def fake_lock(*args, **kwargs):
+        raise AssertionError("dependencies locked for conda")
+
+    monkeypatch.setattr(pipeline, "lock_requirements", fake_lock)
+    tree = MemoryTree({"requirements.txt": b"numpy\n"})
+    options = {key: "" for key in pipeline.OPTION_KEYS}
+    options.update(
+        environment_manager="conda",
+        dependency_file="requirements.txt",
+        lock_dependencies="Yes",
+        python_version_number="3.12",
+    )
+
+    pipeline.lock_dependencies(pipeline.PostGenProject(tree=tree), options)
+
+    assert not tree.exists("requirements.lock")
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+import pytest
+from conftest import CCDS_ROOT
+
+from ccds import monkey_patch
+from ccds.monkey_patch import (
+    _resolution_plan,
+    generate_context_wrapper,
+    prompt_for_config,
+)
+
+
+def _ccds_context(extra_context=None):
+    return generate_context_wrapper(
+        context_file=str(CCDS_ROOT / "cookiecutter.json"),
+        extra_context=extra_context,
+    )
+
+
+def test_no_input_resolves_defaults():
+    result = prompt_for_config(_ccds_context({"project_name": "My Project"}), True)
+
+    assert result["repo_name"] == "my_project"
+    assert result["env_name"] == "my_project"
+    assert result["module_name"] == "lib_my_project"
+    assert result["dataset_storage"] == {"none": "none"}
+    assert result["environment_manager"] == "uv"
+    assert result["env_location"] == "local"
+    assert result["dependency_file"] == "pyproject.toml"
+    assert result["docker_package_manager"] == "uv"
+    assert list(result) == list(_ccds_context()["cookiecutter"])
+
+
+def test_choice_subitems_follow_selection():
+    s3 = {"s3": {"bucket": "bucket-name", "aws_profile": "default"}}
+    context = _ccds_context({"dataset_storage": s3, "environment_manager": "conda"})
+    result = prompt_for_config(context, no_input=True)
+
+    assert result["dataset_storage"] == s3
+    assert result["environment_manager"] == "conda"
+
+
+def test_variables_resolve_in_dependency_order():
+    # repo_name refers to project_name, which is only declared after it
+    context = {
+        "cookiecutter": OrderedDict(
+            [
+                ("repo_name", "{{ cookiecutter.project_name.lower() }}"),
+                ("settings", {"repo": "{{ cookiecutter.repo_name }}"}),
+                ("project_name", "My Project"),
+            ]
+        )
+    }
+    result = prompt_for_config(context, no_input=True)
+
+    assert result == {
+        "repo_name": "my project",
+        "settings": {"repo": "my project"},
+        "project_name": "My Project",
+    }
+    assert list(result) == ["repo_name", "settings", "project_name"]
+
+
+def test_prompts_keep_declared_order(monkeypatch):
+    prompted = []
+
+    def _read_variable(key, default):
+        prompted.append(key)
+        return default
+
+    def _read_choice(key, options):
+        prompted.append(key)
+        return options[0]
+
+    monkeypatch.setattr(monkey_patch, "read_user_variable", _read_variable)
+    monkeypatch.setattr(monkey_patch, "read_user_choice", _read_choice)
+
+    context = _ccds_context()
+    prompt_for_config(context, no_input=False)
+
+    # env_location and docker_package_manager do not apply to the defaults
+    skipped = {"env_location", "docker_package_manager", "container"}
+    declared = [k for k in context["cookiecutter"] if k not in skipped and k[0] != "_"]
+    assert [k for k in prompted if k not in skipped] == declared
+
+
+def test_resolution_plan_is_built_once():
+    context = _ccds_context()
+    assert _resolution_plan(context["cookiecutter"]) is _resolution_plan(
+        _ccds_context()["cookiecutter"]
+    )
+
+    _constraints, steps = _resolution_plan(context["cookiecutter"])
+    (step,) = [s for s in steps if s[0] == "docs"]
+    assert step[1] == "choice"
+
+
+@pytest.mark.parametrize("selected", ["azure", "gcs"])
+def test_choice_index_lookup(selected):
+    _constraints, steps = _resolution_plan(_ccds_context()["cookiecutter"])
+    _key, kind, _raw, choice_index = [s for s in steps if s[0] == "dataset_storage"][0]
+
+    assert kind == "choice_with_subitems"
+    assert list(choice_index) == ["none", "azure", "s3", "gcs"]
+    assert "bucket" in choice_index[selected] or "container" in choice_index[selected]
@@ -0,0 +1,94 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from ccds.overlay import MANIFEST_NAME, apply_overlay
+from ccds.overlay_cache import stream_extract
+
+
+@pytest.fixture
+def trees(tmp_path):
+    """An overlay and a generated project sharing one identical file."""
+    overlay = tmp_path / "overlay"
+    (overlay / "notebooks").mkdir(parents=True)
+    (overlay / "README.md").write_text("same\n")
+    (overlay / "Makefile").write_text("from the overlay\n")
+    (overlay / "notebooks" / "intro.ipynb").write_text("{}\n")
+
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "README.md").write_text("same\n")
+    (project / "Makefile").write_text("from the template\n")
+    return overlay, project
+
+
+def _mtimes(root):
+    return {
+        p.relative_to(root).as_posix(): p.stat().st_mtime_ns
+        for p in root.rglob("*")
+        if p.is_file() and p.name != MANIFEST_NAME
+    }
+
+
+def test_only_differing_files_written(trees):
+    overlay, project = trees
+    os.utime(project / "README.md", ns=(10**9, 10**9))
+
+    counts = apply_overlay(overlay, project, mode="copy")
+
+    assert counts == {"written": 2, "unchanged": 1}
+    assert (project / "README.md").stat().st_mtime_ns == 10**9
+    assert (project / "Makefile").read_text() == "from the overlay\n"
+    assert (project / "notebooks" / "intro.ipynb").read_text() == "{}\n"
+
+    manifest = json.loads((project / MANIFEST_NAME).read_text())
+    assert sorted(manifest["files"]) == [
+        "Makefile",
+        "README.md",
+        "notebooks/intro.ipynb",
+    ]
+    assert manifest["files"]["Makefile"]["size"] == len("from the overlay\n")
+
+
+def test_reapplication_is_incremental(trees, monkeypatch):
+    overlay, project = trees
+    apply_overlay(overlay, project, mode="copy")
+    before = _mtimes(project)
+
+    # nothing changed: neither side is read again
+    with monkeypatch.context() as m:
+        m.setattr("ccds.overlay._sha256_file", pytest.fail)
+        assert apply_overlay(overlay, project, mode="copy") == {
+            "written": 0,
+            "unchanged": 3,
+        }
+    assert _mtimes(project) == before
+
+    # a file edited in the project and a file changed in the overlay are rewritten
+    (project / "README.md").write_text("edited\n")
+    (overlay / "Makefile").write_text("new overlay version\n")
+    assert apply_overlay(overlay, project, mode="copy") == {
+        "written": 2,
+        "unchanged": 1,
+    }
+    assert (project / "README.md").read_text() == "same\n"
+    assert (project / "Makefile").read_text() == "new overlay version\n"
+
+
+def test_uncached_zip_skips_identical_members(tmp_path):
+    archive = tmp_path / "overlay.zip"
+    with zipfile.ZipFile(archive, "w") as zipf:
+        zipf.writestr("README.md", "same\n")
+        zipf.writestr("Makefile", "from the overlay\n")
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "README.md").write_text("same\n")
+    (project / "Makefile").write_text("from the template\n")
+    os.utime(project / "README.md", ns=(10**9, 10**9))
+
+    stream_extract(archive, project, skip_identical=True)
+
+    assert (project / "README.md").stat().st_mtime_ns == 10**9
+    assert (project / "Makefile").read_text() == "from the overlay\n"
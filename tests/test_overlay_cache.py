@@ -0,0 +1,186 @@
+import os
+import shutil
+import threading
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ccds import overlay_cache
+from ccds.hook_utils.custom_config import write_custom_config
+from ccds.overlay_cache import OverlayCache, stream_extract
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, "w") as zipf:
+        for name, content in members.items():
+            zipf.writestr(name, content)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CCDS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("CCDS_NO_OVERLAY_CACHE", raising=False)
+    monkeypatch.delenv("CCDS_OVERLAY_LINK", raising=False)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """An empty project directory that the hook runs in."""
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "README.md").write_text("from the template\n")
+    monkeypatch.chdir(project_dir)
+    return project_dir
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Serve a directory over HTTP, recording the status of every request."""
+    served = tmp_path / "served"
+    served.mkdir()
+    statuses = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_request(self, code="-", size="-"):
+            statuses.append(int(code))
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=served))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", served, statuses, httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_url_overlay_revalidated(project, server):
+    base_url, served, statuses, _httpd = server
+    archive = _write_zip(
+        served / "overlay.zip",
+        {"README.md": "from the overlay\n", "configs/settings.toml": "a = 1\n"},
+    )
+
+    write_custom_config(f"{base_url}/overlay.zip")
+    assert (project / "README.md").read_text() == "from the overlay\n"
+    assert (project / "configs" / "settings.toml").read_text() == "a = 1\n"
+    assert statuses == [200]
+
+    (project / "configs" / "settings.toml").unlink()
+    write_custom_config(f"{base_url}/overlay.zip")
+    assert (project / "configs" / "settings.toml").read_text() == "a = 1\n"
+    # the second project is served from the cache after a conditional request
+    assert statuses == [200, 304]
+
+    _write_zip(archive, {"configs/settings.toml": "a = 2\n"})
+    os.utime(archive, (1e9 * 2, 1e9 * 2))
+    write_custom_config(f"{base_url}/overlay.zip")
+    assert (project / "configs" / "settings.toml").read_text() == "a = 2\n"
+    assert statuses == [200, 304, 200]
+
+
+def test_url_overlay_offline(project, server):
+    base_url, served, statuses, httpd = server
+    _write_zip(served / "overlay.zip", {"README.md": "from the overlay\n"})
+    tree = OverlayCache().resolve_url(f"{base_url}/overlay.zip")
+
+    httpd.shutdown()
+    httpd.server_close()
+
+    # the last download is used when the server cannot be reached
+    assert OverlayCache().resolve_url(f"{base_url}/overlay.zip") == tree
+    with pytest.raises(OSError):
+        OverlayCache().resolve_url(f"{base_url}/other.zip")
+    assert statuses == [200]
+
+
+def test_local_zip_keyed_by_mtime_and_size(project, tmp_path, monkeypatch):
+    archive = _write_zip(tmp_path / "overlay.zip", {"data/notes.txt": "one\n"})
+    overlay_cache = OverlayCache()
+
+    tree = overlay_cache.resolve_local(archive)
+    assert (tree / "data" / "notes.txt").read_text() == "one\n"
+
+    # unchanged zips are not read again
+    with monkeypatch.context() as m:
+        m.setattr("ccds.overlay_cache._sha256_file", pytest.fail)
+        assert overlay_cache.resolve_local(archive) == tree
+
+    _write_zip(archive, {"data/notes.txt": "second\n"})
+    changed = overlay_cache.resolve_local(archive)
+    assert changed != tree
+    assert (changed / "data" / "notes.txt").read_text() == "second\n"
+    # the entry the zip resolved to before is no longer used for it
+    entries = overlay_cache.index.load()
+    assert [key for key in entries if str(archive) in entries[key]["sources"]] == [
+        changed.name
+    ]
+
+    write_custom_config(str(archive))
+    assert (project / "data" / "notes.txt").read_text() == "second\n"
+
+
+@pytest.mark.parametrize("link_mode", ["reflink", "hardlink"])
+def test_linked_members(project, tmp_path, monkeypatch, link_mode):
+    monkeypatch.setenv("CCDS_OVERLAY_LINK", link_mode)
+    archive = _write_zip(tmp_path / "overlay.zip", {"README.md": "from the overlay\n"})
+
+    write_custom_config(str(archive))
+    cached = OverlayCache().resolve_local(archive) / "README.md"
+    written = project / "README.md"
+
+    assert written.read_text() == "from the overlay\n"
+    # hard links share the cached file; reflinks and copies are independent
+    assert os.path.samefile(cached, written) == (link_mode == "hardlink")
+
+
+def test_uncached_extraction(project, tmp_path, monkeypatch):
+    monkeypatch.setenv("CCDS_NO_OVERLAY_CACHE", "1")
+    archive = _write_zip(tmp_path / "overlay.zip", {"README.md": "from the overlay\n"})
+
+    write_custom_config(str(archive))
+
+    assert (project / "README.md").read_text() == "from the overlay\n"
+    assert not OverlayCache().index.load()
+
+
+def test_stream_extract_skips_unsafe_members(tmp_path):
+    archive = _write_zip(
+        tmp_path / "overlay.zip",
+        {"../escape.txt": "x", "/absolute.txt": "x", "dir/": "", "dir/ok.txt": "ok"},
+    )
+    target = tmp_path / "target"
+
+    stream_extract(archive, target)
+
+    assert (target / "dir" / "ok.txt").read_text() == "ok"
+    assert not (tmp_path / "escape.txt").exists()
+    assert sorted(p.name for p in target.rglob("*")) == ["dir", "ok.txt"]
+
+
+def test_concurrent_store_keeps_first_entry(tmp_path, monkeypatch):
+    first = _write_zip(tmp_path / "first.zip", {"README.md": "from the overlay\n"})
+    second = tmp_path / "second.zip"
+    shutil.copy(first, second)
+    extract = overlay_cache.stream_extract
+    published = []
+
+    def racing(archive, target):
+        extract(archive, target)
+        if not published:
+            # another process publishes the same overlay meanwhile
+            published.append(True)
+            other = OverlayCache().resolve_local(first)
+            published[:] = [other, (other / "README.md").stat().st_ino]
+
+    monkeypatch.setattr(overlay_cache, "stream_extract", racing)
+    tree = OverlayCache().resolve_local(second)
+
+    assert tree == published[0]
+    assert (tree / "README.md").stat().st_ino == published[1]
+    assert set(OverlayCache().index.load()[tree.name]["sources"]) == {
+        str(first),
+        str(second),
+    }
+    assert not list(tree.parent.glob("extract-*"))
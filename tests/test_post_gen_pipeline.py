@@ -0,0 +1,139 @@
+import runpy
+from pathlib import Path
+
+import pytest
+import tomlkit
+from jinja2 import Environment, StrictUndefined
+
+from ccds import monkey_patch
+from ccds.__main__ import api_main
+from ccds.hook_utils import pipeline
+from ccds.hook_utils.pipeline import STEPS, run_post_gen
+
+CCDS_ROOT = Path(__file__).parents[1].resolve()
+
+CONFIGS = [
+    {
+        "linting_and_formatting": "ruff",
+        "testing_framework": "pytest",
+        "docs": "mkdocs",
+        "dependency_file": "pyproject.toml",
+        "environment_manager": "uv",
+        "python_version_number": "3.11",
+        "open_source_license": "No license file",
+        "include_code_scaffold": "No",
+        "docker_support": "No",
+    },
+    {
+        "linting_and_formatting": "flake8+black+isort",
+        "testing_framework": "none",
+        "docs": "none",
+        "dependency_file": "requirements.txt",
+        "environment_manager": "none",
+        "python_version_number": "3.10.4",
+        "open_source_license": "MIT",
+        "include_code_scaffold": "Yes",
+        "docker_support": "Yes",
+    },
+]
+
+
+def _render(output_dir, config):
+    """Generate a project without running the post-generation hook."""
+    return Path(
+        api_main.cookiecutter(
+            str(CCDS_ROOT),
+            no_input=True,
+            extra_context=config,
+            output_dir=output_dir,
+            accept_hooks=False,
+        )
+    )
+
+
+def _tree(root):
+    return {
+        p.relative_to(root).as_posix(): p.read_bytes() if p.is_file() else None
+        for p in sorted(root.rglob("*"))
+    }
+
+
+def _run_hook(monkeypatch, script, options, project):
+    """Run a hook script on ``project`` the way cookiecutter or copier runs it."""
+    monkeypatch.chdir(project)
+    if script.name == "post_gen_project.py":
+        # the hook as cookiecutter renders it
+        hook = Environment(undefined=StrictUndefined).from_string(script.read_text())
+        hook_path = project.parent / script.name
+        hook_path.write_text(hook.render(cookiecutter=options))
+        runpy.run_path(str(hook_path))
+    else:
+        runpy.run_path(str(script), run_name="copier_post_gen")["run_post_gen"](options)
+
+
+@pytest.mark.parametrize("answers", CONFIGS, ids=lambda c: c["dependency_file"])
+def test_hooks_run_the_pipeline(answers, tmp_path, monkeypatch):
+    options = dict(answers, custom_config="", module_name="data_module")
+    config = dict(answers, module_name="data_module")
+    expected = _render(tmp_path / "expected", config)
+    run_post_gen(options, expected)
+
+    # as rendered without the ccds patches, every subtree included
+    monkeypatch.setattr(
+        monkey_patch, "excluded_paths", lambda cookiecutter: frozenset()
+    )
+    cookiecutter = _render(tmp_path / "cookiecutter", config)
+    copier = _render(tmp_path / "copier", config)
+    assert _tree(cookiecutter) != _tree(expected)
+
+    _run_hook(
+        monkeypatch, CCDS_ROOT / "hooks" / "post_gen_project.py", options, cookiecutter
+    )
+    _run_hook(
+        monkeypatch,
+        CCDS_ROOT / "copier" / "scripts" / "copier_post_gen.py",
+        options,
+        copier,
+    )
+
+    assert _tree(cookiecutter) == _tree(expected)
+    assert _tree(copier) == _tree(expected)
+    pyproject = tomlkit.parse((expected / "pyproject.toml").read_text())
+    assert pyproject["project"]["requires-python"].startswith(("~=3.11", "==3.10.4"))
+
+
+def test_pyproject_parsed_and_written_once(tmp_path, monkeypatch):
+    project = _render(tmp_path, dict(CONFIGS[0], module_name="data_module"))
+    calls = {"parse": 0, "dumps": 0}
+    parse, dumps = tomlkit.parse, tomlkit.dumps
+
+    def counting(name, func):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(pipeline.tomlkit, "parse", counting("parse", parse))
+    monkeypatch.setattr(pipeline.tomlkit, "dumps", counting("dumps", dumps))
+
+    run_post_gen(dict(CONFIGS[0], custom_config="", module_name="data_module"), project)
+
+    assert calls == {"parse": 1, "dumps": 1}
+    assert r"\u0027" not in (project / "pyproject.toml").read_text()
+
+
+def test_timings_per_step(tmp_path, monkeypatch, capsys):
+    project = _render(tmp_path, dict(CONFIGS[1], module_name="data_module"))
+    monkeypatch.setenv("CCDS_HOOK_TIMINGS", "1")
+
+    timings = run_post_gen(
+        dict(CONFIGS[1], custom_config="", module_name="data_module"), project
+    )
+
+    assert [name for name, _ in timings] == [name for name, _ in STEPS]
+    assert all(seconds >= 0 for _, seconds in timings)
+    report = capsys.readouterr().err
+    for name, _ in STEPS:
+        assert f"  {name} " in report
+    assert "  total " in report
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+from conftest import CCDS_ROOT
+
+from ccds import monkey_patch, raw_files
+from ccds.__main__ import api_main
+
+TEMPLATE = CCDS_ROOT / "{{ cookiecutter.repo_name }}"
+
+
+@pytest.mark.parametrize(
+    "data, raw",
+    [
+        (b"", True),
+        (b"# Project notes\n", True),
+        (b"name = {{ cookiecutter.repo_name }}\n", False),
+        (b"{% if x %}x{% endif %}\n", False),
+        (b"{# comment #}\n", False),
+        (b"windows\r\nnewlines\r\n", False),
+        (b"\xff\xfe binary", False),
+        (b"a dict: {'key': 1}\n", True),
+    ],
+)
+def test_is_raw(data, raw):
+    assert raw_files.is_raw(data) == raw
+
+
+def test_repo_manifest_in_sync():
+    problems = raw_files.check_manifest(TEMPLATE, CCDS_ROOT / raw_files.MANIFEST_NAME)
+
+    assert not problems, (
+        "ccds-raw-files.json is out of date, run "
+        "python copier/scripts/build_copier_template.py\n" + "\n".join(problems)
+    )
+
+
+def test_build_fails_when_raw_file_gains_syntax(tmp_path):
+    template = tmp_path / "template"
+    (template / "docs").mkdir(parents=True)
+    (template / "docs" / "index.md").write_text("# Docs\n")
+    (template / "README.md").write_text("# {{ cookiecutter.project_name }}\n")
+    manifest = tmp_path / raw_files.MANIFEST_NAME
+
+    assert list(raw_files.build_manifest(template, manifest)) == ["docs/index.md"]
+    assert raw_files.check_manifest(template, manifest) == []
+
+    (template / "docs" / "index.md").write_text("# {{ cookiecutter.project_name }}\n")
+    (template / "LICENSE").write_text("MIT\n")
+
+    assert raw_files.check_manifest(template, manifest) == [
+        "Raw file not in manifest: LICENSE",
+        "Marked raw but contains template syntax: docs/index.md",
+    ]
+    with pytest.raises(ValueError, match="docs/index.md"):
+        raw_files.build_manifest(template, manifest)
+    assert "docs/index.md" in raw_files.load_manifest(manifest)
+
+    assert list(raw_files.build_manifest(template, manifest, reclassify=True)) == [
+        "LICENSE"
+    ]
+
+
+def test_raw_files_are_copied(tmp_path, monkeypatch):
+    rendered = []
+    generate_file = monkey_patch.generate_file
+
+    def recording(project_dir, infile, *args, **kwargs):
+        rendered.append(infile)
+        return generate_file(project_dir, infile, *args, **kwargs)
+
+    monkeypatch.setattr(monkey_patch, "generate_file", recording)
+    project = api_main.cookiecutter(
+        str(CCDS_ROOT), no_input=True, output_dir=tmp_path, accept_hooks=False
+    )
+
+    raw = raw_files.raw_hashes(str(CCDS_ROOT))
+    assert rendered and not set(rendered) & set(raw)
+    gitignore = os.path.join(project, ".gitignore")
+    assert open(gitignore, "rb").read() == (TEMPLATE / ".gitignore").read_bytes()
+
+
+def test_changed_raw_file_is_rendered(tmp_path):
+    template = tmp_path / "template"
+    template.mkdir()
+    (template / "notes.md").write_text("# name\n")
+    manifest = tmp_path / raw_files.MANIFEST_NAME
+    raw_files.build_manifest(template, manifest)
+    hashes = raw_files.raw_hashes(str(tmp_path))
+    path = os.path.join(str(template), "notes.md")
+    hashes = {path: hashes["notes.md"]}
+
+    assert raw_files.read_raw_file(path, hashes) == b"# name\n"
+
+    # same size, but now with template syntax
+    (template / "notes.md").write_text("{{ n }}\n")
+    assert raw_files.read_raw_file(path, hashes) is None
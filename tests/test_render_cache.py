@@ -0,0 +1,178 @@
+import filecmp
+import shutil
+
+import pytest
+from conftest import CCDS_ROOT
+
+from ccds import monkey_patch, render_cache
+from ccds.__main__ import api_main, cookiecutter_main
+from ccds.render_cache import RenderCache, render_key, template_digest
+from ccds.template_cache import TemplateCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CCDS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("CCDS_RENDER_CACHE", "1")
+    monkeypatch.delenv("CCDS_RENDER_CACHE_LINK", raising=False)
+    monkeypatch.setattr(render_cache, "_disabled", False)
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Record the projects actually generated, rather than served from cache."""
+    projects = []
+    generate_files = monkey_patch.generate_files
+
+    def recording(*args, **kwargs):
+        projects.append(generate_files(*args, **kwargs))
+        return projects[-1]
+
+    monkeypatch.setattr(monkey_patch, "generate_files", recording)
+    return projects
+
+
+def _bake(output_dir, **extra_context):
+    return api_main.cookiecutter(
+        str(CCDS_ROOT),
+        no_input=True,
+        extra_context=extra_context,
+        output_dir=str(output_dir),
+    )
+
+
+def _same_tree(left, right):
+    comparison = filecmp.dircmp(left, right)
+    if comparison.left_only or comparison.right_only or comparison.funny_files:
+        return False
+    _match, mismatch, errors = filecmp.cmpfiles(
+        left, right, comparison.common_files, shallow=False
+    )
+    if mismatch or errors:
+        return False
+    return all(
+        _same_tree(f"{left}/{name}", f"{right}/{name}")
+        for name in comparison.common_dirs
+    )
+
+
+def test_identical_project_served_from_cache(tmp_path, generated):
+    first = _bake(tmp_path / "first")
+    assert generated == [first]
+
+    second = _bake(tmp_path / "second")
+    assert generated == [first]
+    assert _same_tree(first, second)
+
+    _bake(tmp_path / "third", docs="none")
+    assert len(generated) == 2
+
+
+def test_not_cached_when_disabled(tmp_path, generated, monkeypatch):
+    monkeypatch.setenv("CCDS_RENDER_CACHE", "0")
+    _bake(tmp_path / "first")
+    _bake(tmp_path / "second")
+    assert len(generated) == 2
+
+
+def test_no_render_cache_option(tmp_path, generated):
+    _bake(tmp_path / "first")
+
+    cookiecutter_main(
+        [
+            str(CCDS_ROOT),
+            "--no-input",
+            "--no-render-cache",
+            "-o",
+            str(tmp_path / "second"),
+        ],
+        standalone_mode=False,
+    )
+    assert len(generated) == 2
+    assert not render_cache.enabled()
+
+
+@pytest.mark.parametrize(
+    "cookiecutter, cacheable",
+    [
+        ({"custom_config": "", "lock_dependencies": "No"}, True),
+        ({"custom_config": "./overlay", "lock_dependencies": "No"}, False),
+        ({"custom_config": "", "lock_dependencies": "Yes"}, False),
+    ],
+)
+def test_is_cacheable(cookiecutter, cacheable):
+    assert render_cache.is_cacheable(cookiecutter) == cacheable
+
+
+def test_render_key_ignores_locations():
+    answers = {"repo_name": "project", "docs": "mkdocs"}
+
+    key = render_key("template", answers)
+    assert key == render_key("template", dict(answers, _output_dir="/elsewhere"))
+    assert key == render_key("template", dict(answers, _checkout="v2.0.0"))
+    assert key != render_key("template", dict(answers, _new_lines="\r\n"))
+    assert key != render_key("template", dict(answers, docs="none"))
+    assert key != render_key("changed template", answers)
+
+
+def test_template_digest_of_cached_checkout(tmp_path):
+    index = TemplateCache().index
+    checkout = index.entry_path("0123456789abcdef/" + "a" * 40)
+    (checkout / "{{ cookiecutter.repo_name }}").mkdir(parents=True)
+    (checkout / "cookiecutter.json").write_text('{"repo_name": "project"}')
+    index.add("0123456789abcdef/" + "a" * 40, url="file:///template", sha="a" * 40)
+    copy = tmp_path / "copy"
+    shutil.copytree(checkout, copy)
+    template_dir = "{{ cookiecutter.repo_name }}"
+
+    cached_digest = template_digest(checkout, checkout / template_dir)
+    local_digest = template_digest(copy, copy / template_dir)
+    (checkout / "cookiecutter.json").write_text("{}")
+    (copy / "cookiecutter.json").write_text("{}")
+
+    # the cached checkout is identified by its commit, the local copy by its files
+    assert template_digest(checkout, checkout / template_dir) == cached_digest
+    assert template_digest(copy, copy / template_dir) != local_digest
+
+
+def test_least_recently_used_evicted(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "README.md").write_text(name * 100)
+    store = RenderCache(root=tmp_path / "renders", max_bytes=250)
+
+    store.store("a", tmp_path / "a")
+    store.store("b", tmp_path / "b")
+    assert store.lookup("a") is not None
+    store.store("c", tmp_path / "c")
+
+    assert store.lookup("b") is None
+    cached = store.lookup("a")
+    assert (cached / "README.md").read_text() == "a" * 100
+    assert cached.name == "a"
+    assert store.lookup("c") is not None
+
+
+def test_concurrent_store_keeps_first_entry(tmp_path, monkeypatch):
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "README.md").write_text("rendered\n")
+    copy_tree = render_cache.copy_tree
+    published = []
+
+    def racing(source, target, mode="copy"):
+        copy_tree(source, target, mode)
+        if not published:
+            # another process stores the same project meanwhile
+            other = RenderCache(root=tmp_path / "renders")
+            published.append(True)
+            other.store("key", tmp_path / "project")
+            cached = other.lookup("key")
+            published[:] = [cached, (cached / "README.md").stat().st_ino]
+
+    monkeypatch.setattr(render_cache, "copy_tree", racing)
+    RenderCache(root=tmp_path / "renders").store("key", tmp_path / "project")
+
+    cached = RenderCache(root=tmp_path / "renders").lookup("key")
+    assert cached == published[0]
+    assert (cached / "README.md").stat().st_ino == published[1]
+    assert not list((tmp_path / "renders").glob("store-*"))
@@ -0,0 +1,228 @@
+import asyncio
+import http.client
+import io
+import json
+import socket
+import tarfile
+import threading
+import zipfile
+
+import pytest
+from conftest import CCDS_ROOT
+
+from ccds.batch import load_template
+from ccds.serve import GenerationServer
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@pytest.fixture(scope="module")
+def loaded():
+    template = load_template(str(CCDS_ROOT), use_template_cache=False)
+    yield template
+    template.cleanup()
+
+
+@pytest.fixture
+def start_server(loaded):
+    """Run a server on an event loop in a background thread; return a function
+    that starts it and returns a connection factory.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = GenerationServer(loaded, workers=1)
+
+    def start(path=None, output_root=None):
+        server.output_root = output_root
+        address = asyncio.run_coroutine_threadsafe(
+            server.start(port=0, path=path), loop
+        ).result()
+        if path is not None:
+            return lambda: UnixHTTPConnection(path)
+        return lambda: http.client.HTTPConnection(*address[:2], timeout=60)
+
+    yield start
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def _request(connect, method, path, body=None, headers=None):
+    connection = connect()
+    payload = None if body is None else json.dumps(body)
+    headers = dict({"Content-Type": "application/json"}, **(headers or {}))
+    connection.request(method, path, body=payload, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response, data
+
+
+def test_generate_archives(start_server):
+    connect = start_server()
+
+    response, data = _request(connect, "GET", "/health")
+    assert response.status == 200
+    assert json.loads(data)["status"] == "ok"
+
+    response, data = _request(
+        connect,
+        "POST",
+        "/generate",
+        {"extra_context": {"repo_name": "first-project"}},
+    )
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/zip"
+    assert "first-project.zip" in response.getheader("Content-Disposition")
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert "first-project/pyproject.toml" in zf.namelist()
+
+    # the warm worker renders the next project with other answers
+    response, data = _request(
+        connect,
+        "POST",
+        "/generate",
+        {
+            "extra_context": {"repo_name": "second-project", "docs": "none"},
+            "format": "tar.gz",
+        },
+    )
+    assert response.status == 200
+    with tarfile.open(fileobj=io.BytesIO(data)) as tf:
+        names = tf.getnames()
+    assert "second-project/pyproject.toml" in names
+    assert "second-project/docs/mkdocs.yml" not in names
+
+
+def test_generate_into_output_dir(start_server, tmp_path):
+    socket_path = str(tmp_path / "ccds.sock")
+    root = tmp_path / "projects"
+    root.mkdir()
+    connect = start_server(path=socket_path, output_root=str(root))
+
+    response, data = _request(
+        connect,
+        "POST",
+        "/generate",
+        {"extra_context": {"repo_name": "on-disk"}, "output_dir": "team"},
+    )
+
+    assert response.status == 200, data
+    assert json.loads(data)["project_dir"] == str(root / "team" / "on-disk")
+    assert (root / "team" / "on-disk" / "pyproject.toml").exists()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"output_dir": ".."},
+        {"output_dir": "/tmp"},
+        {"output_dir": ".", "extra_context": {"repo_name": "../escaped"}},
+    ],
+)
+def test_output_dir_confined_to_root(start_server, tmp_path, body):
+    root = tmp_path / "projects"
+    root.mkdir()
+    connect = start_server(output_root=str(root))
+
+    response, data = _request(connect, "POST", "/generate", body)
+
+    assert response.status == 403, data
+    assert not (tmp_path / "escaped").exists()
+
+
+def test_output_dir_needs_output_root(start_server, tmp_path):
+    connect = start_server()
+
+    response, _data = _request(
+        connect, "POST", "/generate", {"output_dir": str(tmp_path)}
+    )
+
+    assert response.status == 403
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        ({"Content-Type": "text/plain"}, 415),
+        ({"Host": "attacker.example:8765"}, 403),
+        ({"Origin": "http://attacker.example"}, 403),
+    ],
+)
+def test_browser_requests_refused(start_server, headers, status):
+    connect = start_server()
+
+    response, data = _request(connect, "POST", "/generate", {}, headers)
+
+    assert response.status == status
+    assert "error" in json.loads(data)
+
+
+@pytest.mark.parametrize(
+    "method, path, body, status",
+    [
+        ("GET", "/nowhere", None, 404),
+        ("GET", "/generate", None, 405),
+        ("POST", "/generate", ["not", "an", "object"], 400),
+        ("POST", "/generate", {"format": "rar"}, 400),
+        ("POST", "/generate", {"extra_context": {"python_version_number": 3}}, 500),
+    ],
+)
+def test_errors(start_server, method, path, body, status):
+    connect = start_server()
+
+    response, data = _request(connect, method, path, body)
+
+    assert response.status == status
+    assert "error" in json.loads(data)
+
+
+@pytest.mark.parametrize(
+    "extra_context, status",
+    [
+        ({"custom_config": "/etc"}, 403),
+        ({"custom_config": "https://example.com/config.zip"}, 403),
+        ({"_template": "/etc"}, 400),
+        ({"_output_dir": "/tmp"}, 400),
+    ],
+)
+def test_path_and_private_answers_refused(start_server, extra_context, status):
+    connect = start_server()
+
+    response, data = _request(
+        connect, "POST", "/generate", {"extra_context": extra_context}
+    )
+
+    assert response.status == status
+    assert "error" in json.loads(data)
+
+
+def test_requests_do_not_share_answers(start_server):
+    connect = start_server()
+
+    names = []
+    for project_name in ("first", "second"):
+        response, data = _request(
+            connect,
+            "POST",
+            "/generate",
+            {"extra_context": {"project_name": project_name}},
+        )
+        assert response.status == 200, data
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names.append(archive.read(f"{project_name}/README.md").decode("utf-8"))
+
+    assert "# first" in names[0]
+    assert "# second" in names[1]
+    assert "first" not in names[1]
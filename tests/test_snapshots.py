@@ -0,0 +1,102 @@
+"""Render-only snapshot tests.
+
+Every config is rendered in memory with ``ccds.render`` -- post-generation
+steps included, nothing written to disk -- and the digest of the resulting tree
+is compared with the one stored in ``snapshots.json``. A changed digest means a
+template change changed a generated project: check the change is intended, then
+store the new digests with
+
+    pytest tests/test_snapshots.py --update-snapshots
+
+(without -n, since the pytest-xdist workers would each write the file).
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import pytest
+from conftest import CCDS_ROOT, bake_project, config_generator, make_test_id
+from tree_verifier import index_memory_tree, verify_index
+
+from ccds.batch import load_template, project_context
+from ccds.render import render_project_tree
+
+SNAPSHOTS_PATH = Path(__file__).parent / "snapshots.json"
+
+# the configs follow the running python, the snapshots don't
+SNAPSHOT_PYTHON_VERSION = "3.12"
+
+TEMPLATE_STRINGS = [b"{{", b"}}", b"{%", b"%}"]
+
+# rendered with the current year
+LICENSE_YEAR_RE = re.compile(rb"(Copyright \(c\) )\d{4}")
+
+
+def snapshot(tree):
+    """Digest of a rendered tree, and the files with unrendered Jinja in it."""
+    digest = hashlib.sha256()
+    residue = []
+    for path in sorted(tree.dirs):
+        digest.update(f"d {path}\n".encode())
+    for path, data in sorted(tree.files.items()):
+        if path == "LICENSE":
+            data = LICENSE_YEAR_RE.sub(rb"\1YYYY", data)
+        if any(s in data for s in TEMPLATE_STRINGS):
+            residue.append(path)
+        digest.update(f"f {path} {hashlib.sha256(data).hexdigest()}\n".encode())
+    return digest.hexdigest(), residue
+
+
+@pytest.fixture(scope="module")
+def loaded_template():
+    loaded = load_template(str(CCDS_ROOT), accept_hooks=False, use_template_cache=False)
+    yield loaded
+    loaded.cleanup()
+
+
+@pytest.fixture(scope="module")
+def snapshots(request):
+    stored = json.loads(SNAPSHOTS_PATH.read_text()) if SNAPSHOTS_PATH.exists() else {}
+    yield stored
+    if request.config.getoption("--update-snapshots"):
+        SNAPSHOTS_PATH.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+
+
+def test_render_snapshot(config, loaded_template, snapshots, request):
+    config = dict(config, python_version_number=SNAPSHOT_PYTHON_VERSION)
+    context = project_context(loaded_template, config)
+
+    tree = render_project_tree(loaded_template.repo_dir, context)
+    digest, residue = snapshot(tree)
+
+    assert not residue, f"Unrendered Jinja template in {residue}"
+    verify_index(index_memory_tree(tree), config)
+    key = make_test_id(config)
+    if request.config.getoption("--update-snapshots"):
+        snapshots[key] = digest
+    assert key in snapshots, f"no snapshot for {key}, run with --update-snapshots"
+    assert digest == snapshots[key], (
+        f"the project rendered for {key} changed; "
+        "if that is intended, run with --update-snapshots"
+    )
+
+
+def test_render_matches_bake(loaded_template):
+    config = next(config_generator())
+    tree = render_project_tree(
+        loaded_template.repo_dir, project_context(loaded_template, config)
+    )
+
+    with bake_project(config) as project_dir:
+        paths = sorted(project_dir.rglob("*"))
+        files = {
+            p.relative_to(project_dir).as_posix(): p.read_bytes()
+            for p in paths
+            if p.is_file()
+        }
+        dirs = {p.relative_to(project_dir).as_posix() for p in paths if p.is_dir()}
+
+    assert tree.files == files
+    assert tree.dirs == dirs | {"."}
@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+# modules that are only needed once a project is generated
+GENERATION_MODULES = [
+    "click",
+    "jinja2",
+    "requests",
+    "cookiecutter.cli",
+    "cookiecutter.main",
+    "cookiecutter.prompt",
+    "cookiecutter.generate",
+]
+
+# `ccds --version` may take at most this fraction of the time it takes to import
+# the cookiecutter cli, measured alongside it so that the budget holds on slow
+# or busy machines; set CCDS_IMPORT_BUDGET_MS for an absolute budget instead
+IMPORT_BUDGET_RATIO = 0.5
+IMPORT_BUDGET_MS = os.environ.get("CCDS_IMPORT_BUDGET_MS")
+RUNS = 5
+
+
+def _run(code, *args):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _ccds_import_times(stderr):
+    """Cumulative import time in microseconds of each top-level module imported
+    from ccds.__main__ on, as reported by ``python -X importtime``.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit() or name[1:].startswith(" "):
+            continue
+        name = name.strip()
+        if times or name.startswith("ccds"):
+            times[name] = int(cumulative)
+    return times
+
+
+def _cumulative_ms(stderr, name):
+    for line in stderr.splitlines():
+        if line.endswith(f"| {name}"):
+            return int(line.split("|")[1]) / 1000
+    raise AssertionError(f"{name} was not imported")
+
+
+def test_version_import_budget():
+    # best of a few runs, so that a busy machine (e.g. other pytest-xdist
+    # workers) doesn't fail the budget
+    runs = []
+    for _ in range(RUNS):
+        result = _run("from ccds.__main__ import main; main()", "--version")
+        times = _ccds_import_times(result.stderr)
+
+        assert result.stdout.startswith("Cookiecutter ")
+        imported = [line.split("|")[-1].strip() for line in result.stderr.splitlines()]
+        assert not set(GENERATION_MODULES) & set(imported)
+
+        reference = _cumulative_ms(
+            _run("import cookiecutter.cli").stderr, "cookiecutter.cli"
+        )
+        runs.append((sum(times.values()) / 1000, reference, times))
+
+    total_ms, reference_ms, times = min(runs, key=lambda run: run[0] / run[1])
+    if IMPORT_BUDGET_MS:
+        budget_ms = float(IMPORT_BUDGET_MS)
+    else:
+        budget_ms = IMPORT_BUDGET_RATIO * reference_ms
+    assert total_ms < budget_ms, f"ccds --version imports took {times}"
+
+
+def test_version_matches_cookiecutter():
+    from cookiecutter.cli import version_msg
+
+    result = _run("from ccds.__main__ import main; main()", "--version")
+
+    assert result.stdout.strip() == version_msg()
+
+
+def test_patches_installed_after_cli_import():
+    # the cli binds cookiecutter.main and jinja2 names before the patches exist
+    code = """
+import cookiecutter.cli
+import jinja2
+from ccds.__main__ import install_patches
+install_patches()
+
+import cookiecutter.main
+from cookiecutter import hooks
+from cookiecutter.environment import StrictEnvironment
+from ccds.hook_runner import run_script
+from ccds.monkey_patch import generate_context_wrapper, prompt_for_config
+
+assert cookiecutter.main.prompt_for_config is prompt_for_config
+assert cookiecutter.main.generate_context is generate_context_wrapper
+assert hooks.run_script is run_script
+assert StrictEnvironment().undefined is jinja2.Undefined
+"""
+    _run(code)
+
+
+def test_default_checkout_without_installed_version():
+    # imported from a checkout, with no package metadata to read the version from
+    code = """
+import importlib.metadata
+
+def version(name):
+    raise importlib.metadata.PackageNotFoundError(name)
+
+importlib.metadata.version = version
+from ccds.__main__ import DEFAULT_CHECKOUT
+print(DEFAULT_CHECKOUT)
+"""
+    assert _run(code).stdout.strip() == "None"
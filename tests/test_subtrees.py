@@ -0,0 +1,135 @@
+import json
+import os
+from itertools import product
+
+import jinja2
+import pytest
+import yaml
+from conftest import CCDS_ROOT
+
+from ccds import monkey_patch
+from ccds.__main__ import api_main
+from ccds.subtrees import Subtrees, is_excluded, template_path
+
+CCDS_JSON = json.loads((CCDS_ROOT / "ccds.json").read_text())
+
+SUBTREE_FIELDS = [
+    "linting_and_formatting",
+    "testing_framework",
+    "docs",
+    "dependency_file",
+    "environment_manager",
+    "open_source_license",
+    "include_code_scaffold",
+    "docker_support",
+]
+
+
+@pytest.fixture
+def subtrees():
+    return Subtrees.from_context(CCDS_JSON)
+
+
+def test_excluded(subtrees):
+    answers = dict(
+        {field: CCDS_JSON[field][0] for field in SUBTREE_FIELDS},
+        testing_framework="unittest",
+        include_code_scaffold="No",
+    )
+
+    excluded = subtrees.excluded(answers)
+
+    assert "tests/pytest" in excluded and "tests/unittest" not in excluded
+    assert "tests" not in excluded
+    assert "docker" in excluded and "setup.cfg" in excluded
+    assert "{{ cookiecutter.module_name }}/modeling" in excluded
+    assert "{{ cookiecutter.module_name }}/__init__.py" not in excluded
+
+
+def test_is_excluded():
+    excluded = {"docs/mkdocs", "LICENSE"}
+
+    assert is_excluded("docs/mkdocs", excluded)
+    assert is_excluded(os.path.join("docs", "mkdocs", "docs", "index.md"), excluded)
+    assert is_excluded("LICENSE", excluded)
+    assert not is_excluded("docs/.gitkeep", excluded)
+    assert not is_excluded("docs", excluded)
+    assert not is_excluded("README.md", set())
+
+
+def test_template_path():
+    project_dir = os.path.abspath("my-project")
+
+    assert template_path(os.path.join(project_dir, ".", "docs")) == "docs"
+    assert template_path(os.path.join(project_dir, "./docs", "mkdocs")) == (
+        os.path.join("docs", "mkdocs")
+    )
+    assert template_path("{{ cookiecutter.repo_name }}") is None
+
+
+def test_copier_exclude_agrees_with_subtrees(subtrees):
+    """copier.yml's ``_exclude`` templates rule out the same paths."""
+    patterns = yaml.safe_load((CCDS_ROOT / "copier.yml").read_text())["_exclude"]
+    env = jinja2.Environment()
+    patterns = [env.from_string(pattern) for pattern in patterns]
+    paths = {path: env.from_string(path) for path in CCDS_JSON["_subtrees"]}
+    fields = {field: CCDS_JSON[field] for field in SUBTREE_FIELDS}
+
+    for values in product(*fields.values()):
+        answers = dict(zip(fields, values), module_name="lib_project")
+        rendered = {pattern.render(answers) for pattern in patterns} - {""}
+        excluded = {
+            paths[path].render(cookiecutter=answers)
+            for path in subtrees.excluded(answers)
+        }
+        assert excluded <= rendered, answers
+        assert not rendered - excluded - {"copier.yml", "*.pyc", "__pycache__", ".git"}
+
+
+def test_excluded_files_are_not_rendered(tmp_path, monkeypatch):
+    rendered = []
+    generate_file = monkey_patch.generate_file
+
+    def recording(project_dir, infile, *args, **kwargs):
+        rendered.append(infile)
+        return generate_file(project_dir, infile, *args, **kwargs)
+
+    monkeypatch.setattr(monkey_patch, "generate_file", recording)
+    project = api_main.cookiecutter(
+        str(CCDS_ROOT),
+        no_input=True,
+        extra_context={
+            "testing_framework": "none",
+            "docs": "none",
+            "include_code_scaffold": "No",
+        },
+        output_dir=tmp_path,
+        accept_hooks=False,
+    )
+
+    assert rendered and not [
+        path
+        for path in rendered
+        if path.startswith(("tests", "docs", "docker"))
+        and path != os.path.join("docs", ".gitkeep")
+    ]
+    module = os.path.join(project, "lib_project_name")
+    assert os.listdir(module) == ["__init__.py"]
+    assert open(os.path.join(module, "__init__.py")).read() == ""
+    assert not os.path.exists(os.path.join(project, "tests"))
+    assert os.listdir(os.path.join(project, "docs")) == [".gitkeep"]
+
+
+def test_excluded_subtrees_passed_down_in_context(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("excluded file rendered")
+
+    monkeypatch.setattr(monkey_patch, "generate_file", fail)
+    context = {
+        "cookiecutter": {"docker_support": "Yes"},
+        monkey_patch.EXCLUDED_KEY: frozenset({"docker"}),
+    }
+
+    monkey_patch.generate_file_wrapper(
+        "project", os.path.join("docker", "Dockerfile"), context, env=None
+    )
@@ -0,0 +1,133 @@
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ccds import template_cache
+from ccds.template_cache import TemplateCache, cache, cached_template
+
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def _git(*args, cwd):
+    env = dict(os.environ, **GIT_IDENTITY)
+    subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True)
+
+
+def _commit(work, message):
+    (work / "cookiecutter.json").write_text(f'{{"message": "{message}"}}')
+    _git("add", "-A", cwd=work)
+    _git("commit", "-q", "-m", message, cwd=work)
+    _git("push", "-q", "origin", "HEAD:main", "--tags", cwd=work)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CCDS_CACHE_DIR", str(tmp_path / "ccds-cache"))
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """A local bare repository standing in for the GitHub template repo."""
+    bare = tmp_path / "template.git"
+    _git("init", "-q", "--bare", "-b", "main", str(bare), cwd=tmp_path)
+
+    work = tmp_path / "work"
+    _git("clone", "-q", str(bare), str(work), cwd=tmp_path)
+    _commit(work, "first")
+    _git("tag", "-a", "v1.0.0", "-m", "release", cwd=work)
+    _git("push", "-q", "origin", "--tags", cwd=work)
+
+    return f"file://{bare}", work
+
+
+@pytest.fixture
+def no_git(monkeypatch):
+    def _offline(*args, **kwargs):
+        raise OSError("network access attempted")
+
+    monkeypatch.setattr(template_cache, "_git", _offline)
+
+
+def test_tag_resolves_offline_after_first_clone(tmp_path, remote, request):
+    url, _work = remote
+    store = TemplateCache(root=tmp_path / "cache")
+
+    first = store.resolve(url, "v1.0.0")
+    assert '"first"' in (first / "cookiecutter.json").read_text()
+    assert not (first / ".git").exists()
+
+    request.getfixturevalue("no_git")
+    assert store.resolve(url, "v1.0.0") == first
+
+
+def test_branch_follows_new_commits(tmp_path, remote):
+    url, work = remote
+    store = TemplateCache(root=tmp_path / "cache")
+
+    first = store.resolve(url, "main")
+    assert store.resolve(url, "main") == first
+
+    _commit(work, "second")
+    second = store.resolve(url, "main")
+    assert second != first
+    assert '"second"' in (second / "cookiecutter.json").read_text()
+
+    # the tag still points at the first commit and shares its cache entry
+    assert store.resolve(url, "v1.0.0") == first
+
+
+def test_branch_falls_back_to_cache_when_offline(tmp_path, remote, request):
+    url, _work = remote
+    store = TemplateCache(root=tmp_path / "cache")
+    first = store.resolve(url, "main")
+
+    request.getfixturevalue("no_git")
+    assert store.resolve(url, "main") == first
+
+
+def test_lru_eviction(tmp_path, remote):
+    url, work = remote
+    store = TemplateCache(root=tmp_path / "cache", max_entries=1)
+
+    first = store.resolve(url, "v1.0.0")
+    _commit(work, "second")
+    second = store.resolve(url, "main")
+
+    assert not first.exists()
+    assert second.exists()
+    assert len(store.entries()) == 1
+
+
+def test_cached_template_rewrites_cli_arguments(remote):
+    url, _work = remote
+
+    template, checkout = cached_template(url, "v1.0.0", abbreviations={})
+    assert checkout is None
+    assert Path(template).is_dir()
+
+    # local paths are passed through untouched
+    assert cached_template("/some/local/dir", "main", {}) == ("/some/local/dir", "main")
+
+
+def test_cache_cli(remote):
+    url, _work = remote
+    TemplateCache().resolve(url, "v1.0.0")
+
+    runner = CliRunner()
+    result = runner.invoke(cache, ["ls"])
+    assert result.exit_code == 0
+    assert url in result.output
+    assert "v1.0.0" in result.output
+
+    result = runner.invoke(cache, ["prune", "--all"])
+    assert result.exit_code == 0
+    assert "Removed 1 cached template(s)" in result.output
+    assert TemplateCache().entries() == {}
@@ -5,7 +5,10 @@ This test should run first to catch sync issues early.
 The cookiecutter template is the master, copier template is derived.
 """
 
-import tempfile
+import re
+import shutil
+import sys
+import time
 from pathlib import Path
 
 import pytest
@@ -13,7 +16,92 @@ import pytest
 REPO_ROOT = Path(__file__).parents[1].resolve()
 COOKIECUTTER_TEMPLATE = REPO_ROOT / "{{ cookiecutter.repo_name }}"
 COPIER_TEMPLATE = REPO_ROOT / "copier" / "template"
+MANIFEST = REPO_ROOT / "copier" / "template-manifest.json"
 BUILD_SCRIPT = REPO_ROOT / "copier" / "scripts" / "build_copier_template.py"
+COPIER_ONLY = [".copier-answers.yml.jinja"]
+
+sys.path.insert(0, str(BUILD_SCRIPT.parent))
+import build_copier_template  # noqa: E402
+
+
+def sequential_transform(content: str) -> str:
+    """The former multi-pass transformer, kept as the reference implementation."""
+
+    # Step 1: Transform dataset_storage nested dict patterns BEFORE removing cookiecutter. prefix
+    # This is critical - we need to handle the complex nested structures first
+
+    # Transform value access patterns:
+    # {{ cookiecutter.dataset_storage.s3.bucket }} -> {{ s3_bucket }}
+    # {{ cookiecutter.dataset_storage.s3.aws_profile }} -> {{ s3_aws_profile }}
+    # {{ cookiecutter.dataset_storage.azure.container }} -> {{ azure_container }}
+    # {{ cookiecutter.dataset_storage.gcs.bucket }} -> {{ gcs_bucket }}
+    content = re.sub(
+        r"\{\{\s*cookiecutter\.dataset_storage\.s3\.bucket\s*\}\}",
+        "{{ s3_bucket }}",
+        content,
+    )
+    content = re.sub(
+        r"\{\{\s*cookiecutter\.dataset_storage\.s3\.aws_profile\s*\}\}",
+        "{{ s3_aws_profile }}",
+        content,
+    )
+    content = re.sub(
+        r"\{\{\s*cookiecutter\.dataset_storage\.azure\.container\s*\}\}",
+        "{{ azure_container }}",
+        content,
+    )
+    content = re.sub(
+        r"\{\{\s*cookiecutter\.dataset_storage\.gcs\.bucket\s*\}\}",
+        "{{ gcs_bucket }}",
+        content,
+    )
+
+    # Transform conditional check patterns (in if/elif statements):
+    # {%- if cookiecutter.dataset_storage.s3 %} -> {%- if dataset_storage == 's3' %}
+    # {%- if cookiecutter.dataset_storage.azure %} -> {%- if dataset_storage == 'azure' %}
+    # {%- if cookiecutter.dataset_storage.gcs %} -> {%- if dataset_storage == 'gcs' %}
+    # {%- if cookiecutter.dataset_storage.none %} -> {%- if dataset_storage == 'none' %}
+    # {%- if not cookiecutter.dataset_storage.none %} -> {%- if dataset_storage != 'none' %}
+    # Preserve the whitespace control character (-) if present
+    content = re.sub(
+        r"\{%([-]?)\s*if\s+not\s+cookiecutter\.dataset_storage\.none\s*%\}",
+        r"{%\1 if dataset_storage != 'none' %}",
+        content,
+    )
+    content = re.sub(
+        r"\{%([-]?)\s*if\s+cookiecutter\.dataset_storage\.(s3|azure|gcs|none)\s*%\}",
+        r"{%\1 if dataset_storage == '\2' %}",
+        content,
+    )
+    content = re.sub(
+        r"\{%([-]?)\s*elif\s+cookiecutter\.dataset_storage\.(s3|azure|gcs|none)\s*%\}",
+        r"{%\1 elif dataset_storage == '\2' %}",
+        content,
+    )
+
+    # Transform comparison patterns (e.g., aws_profile != 'default'):
+    # {%- if cookiecutter.dataset_storage.s3.aws_profile != 'default' %}
+    # -> {%- if s3_aws_profile != 'default' %}
+    content = re.sub(
+        r"\{%([-]?)\s*if\s+cookiecutter\.dataset_storage\.s3\.aws_profile\s*!=\s*['\"]default['\"]\s*%\}",
+        r"{%\1 if s3_aws_profile != 'default' %}",
+        content,
+    )
+
+    # Step 2: Now transform all remaining {{ cookiecutter.var }} to {{ var }}
+    content = re.sub(r"\{\{\s*cookiecutter\.(\w+)\s*\}\}", r"{{ \1 }}", content)
+
+    # Step 3: Transform if/elif statements with cookiecutter.var
+    # Preserve the whitespace control character (-) if present
+    content = re.sub(r"\{%([-]?)\s*if\s+cookiecutter\.(\w+)", r"{%\1 if \2", content)
+    content = re.sub(
+        r"\{%([-]?)\s*elif\s+cookiecutter\.(\w+)", r"{%\1 elif \2", content
+    )
+
+    # Step 4: Handle any remaining cookiecutter.var in expressions
+    content = re.sub(r"cookiecutter\.(\w+)", r"\1", content)
+
+    return content
 
 
 def compare_directories(dir1: Path, dir2: Path, ignore: list = None) -> list:
@@ -59,38 +147,90 @@ class TestTemplateSync:
         """
         Verify copier template matches what build script would generate.
 
-        This test regenerates the copier template to a temp directory and
-        compares it with the committed copier/template/. If they differ,
-        the developer forgot to run build_copier_template.py before committing.
+        The build manifest records the hash of every cookiecutter source file
+        and of the copier output built from it, so the committed copier/template/
+        is checked without rebuilding it. If they differ, the developer forgot
+        to run build_copier_template.py before committing.
         """
-        # Generate fresh copier template to temp directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp_template = Path(tmpdir) / "template"
+        problems = build_copier_template.check_manifest(
+            COOKIECUTTER_TEMPLATE, COPIER_TEMPLATE, MANIFEST
+        )
+
+        if problems:
+            diff_msg = "\n".join(problems[:20])  # Show first 20
+            pytest.fail(
+                f"Copier template is out of sync with cookiecutter source!\n"
+                f"Run: python copier/scripts/build_copier_template.py\n\n"
+                f"Differences:\n{diff_msg}"
+            )
+
+    def test_incremental_build(self, tmp_path):
+        """Only changed sources are transformed again and stale outputs removed."""
+        src = tmp_path / "src"
+        (src / "{{ cookiecutter.module_name }}").mkdir(parents=True)
+        (src / "README.md").write_text("# {{ cookiecutter.project_name }}\n")
+        (src / "{{ cookiecutter.module_name }}" / "config.py").write_text(
+            "NAME = '{{ cookiecutter.module_name }}'\n"
+        )
+        dst = tmp_path / "template"
+        manifest = tmp_path / "template-manifest.json"
+
+        counts = build_copier_template.build_incremental(src, dst, manifest)
+        assert counts == {"transformed": 2, "unchanged": 0, "removed": 0}
+        assert (dst / "README.md").read_text() == "# {{ project_name }}\n"
+        assert (dst / "{{ module_name }}" / "config.py").exists()
+
+        # full builds and incremental builds produce the same tree
+        fresh = tmp_path / "fresh"
+        build_copier_template.copy_and_transform_tree(src, fresh)
+        assert compare_directories(dst, fresh) == []
 
-            # Run the build script with modified output path
-            # We'll import and call the function directly
-            import sys
+        (src / "README.md").write_text("# {{ cookiecutter.repo_name }}\n")
+        problems = build_copier_template.check_manifest(src, dst, manifest)
+        assert problems == ["Source changed: README.md"]
 
-            sys.path.insert(0, str(BUILD_SCRIPT.parent))
-            from build_copier_template import copy_and_transform_tree
+        counts = build_copier_template.build_incremental(src, dst, manifest)
+        assert counts == {"transformed": 1, "unchanged": 1, "removed": 0}
+        assert (dst / "README.md").read_text() == "# {{ repo_name }}\n"
 
-            copy_and_transform_tree(COOKIECUTTER_TEMPLATE, tmp_template)
+        shutil.rmtree(src / "{{ cookiecutter.module_name }}")
+        counts = build_copier_template.build_incremental(src, dst, manifest)
+        assert counts == {"transformed": 0, "unchanged": 1, "removed": 1}
+        assert not (dst / "{{ module_name }}").exists()
+        assert build_copier_template.check_manifest(src, dst, manifest) == []
 
-            # Compare with committed copier template
-            # Ignore .copier-answers.yml.jinja as it's copier-specific
-            differences = compare_directories(
-                tmp_template,
-                COPIER_TEMPLATE,
-                ignore=[".copier-answers.yml.jinja"],
+        # outputs edited by hand are detected and rebuilt
+        (dst / "README.md").write_text("edited\n")
+        assert build_copier_template.check_manifest(src, dst, manifest) == [
+            "Output modified: README.md"
+        ]
+        counts = build_copier_template.build_incremental(src, dst, manifest)
+        assert counts["transformed"] == 1
+
+    def test_parallel_build_matches_serial(self, tmp_path, capsys):
+        """A pooled build writes the same tree, manifest and report as a serial one."""
+        src = tmp_path / "src"
+        module = src / "{{ cookiecutter.module_name }}"
+        module.mkdir(parents=True)
+        (src / "README.md").write_text("# {{ cookiecutter.project_name }}\n")
+        (src / "logo.png").write_bytes(bytes(range(256)))
+        for i in range(10):
+            (module / f"step_{i}.py").write_text(
+                f"NAME = '{{{{ cookiecutter.module_name }}}}.step_{i}'\n"
+            )
+
+        builds = {}
+        for jobs in (1, 3):
+            dst = tmp_path / f"jobs-{jobs}"
+            manifest = tmp_path / f"manifest-{jobs}.json"
+            counts = build_copier_template.build_incremental(
+                src, dst, manifest, jobs=jobs, verbose=True
             )
+            builds[jobs] = (counts, manifest.read_text(), capsys.readouterr().out)
 
-            if differences:
-                diff_msg = "\n".join(differences[:20])  # Show first 20
-                pytest.fail(
-                    f"Copier template is out of sync with cookiecutter source!\n"
-                    f"Run: python copier/scripts/build_copier_template.py\n\n"
-                    f"Differences:\n{diff_msg}"
-                )
+        assert builds[1] == builds[3]
+        assert builds[3][0]["transformed"] == 12
+        assert compare_directories(tmp_path / "jobs-1", tmp_path / "jobs-3") == []
 
     def test_build_script_exists(self):
         """Verify the build script exists."""
@@ -105,3 +245,72 @@ class TestTemplateSync:
         assert (
             COOKIECUTTER_TEMPLATE.exists()
         ), f"Cookiecutter template not found: {COOKIECUTTER_TEMPLATE}"
+
+
+# Constructs the transformer has to handle beyond what the template uses today
+EDGE_CASES = [
+    "{{cookiecutter.repo_name}} and {{   cookiecutter.module_name   }}",
+    "{%if cookiecutter.docs == 'mkdocs' %}{%- elif cookiecutter.docs %}",
+    "{%-   if not cookiecutter.dataset_storage.none   %}",
+    "{% elif cookiecutter.dataset_storage.gcs %}{%if cookiecutter.dataset_storage.none%}",
+    '{%- if cookiecutter.dataset_storage.s3.aws_profile != "default" %}',
+    "{%- if cookiecutter.dataset_storage.s3.aws_profile == 'default' %}",
+    "{{ cookiecutter.dataset_storage.azure.bucket }} {{ cookiecutter.dataset_storage.s3 }}",
+    "{{ cookiecutter.dataset_storage.gcs.bucket | lower }}",
+    "{{ cookiecutter.repo_name.lower() }} x.cookiecutter.y cookiecutter.",
+    "{% for x in cookiecutter.items %}{{ cookiecutter.x }}{% endfor %}",
+    "{{% if cookiecutter.x %} {{{ cookiecutter.y }}} { cookiecutter.z }",
+    "cookiecutter. cookiecutter.-x {{ cookiecutter.}} cookiecutter.dataset_storage",
+    "no template syntax at all",
+]
+
+
+def _template_texts():
+    texts = {}
+    for path in sorted(COOKIECUTTER_TEMPLATE.rglob("*")):
+        if path.is_file():
+            try:
+                texts[path.relative_to(COOKIECUTTER_TEMPLATE)] = path.read_text()
+            except UnicodeDecodeError:
+                pass
+    return texts
+
+
+class TestTransformer:
+    """The single-scan transformer matches the former multi-pass one."""
+
+    def test_identical_over_template_tree(self):
+        texts = _template_texts()
+        assert texts
+        for path, text in texts.items():
+            assert build_copier_template.transform_cookiecutter_to_copier(
+                text
+            ) == sequential_transform(text), f"transformers differ on {path}"
+
+    @pytest.mark.parametrize("text", EDGE_CASES)
+    def test_identical_on_edge_cases(self, text):
+        expected = sequential_transform(text)
+        assert build_copier_template.transform_cookiecutter_to_copier(text) == expected
+
+    @pytest.mark.benchmark
+    def test_transform_benchmark(self):
+        """Time both transformers over the template tree."""
+        texts = list(_template_texts().values())
+        rounds = 20
+
+        def _time(transform):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for text in texts:
+                    transform(text)
+            return time.perf_counter() - start
+
+        sequential_time = _time(sequential_transform)
+        single_time = _time(build_copier_template.transform_cookiecutter_to_copier)
+
+        print(
+            f"\ntransformed {len(texts)} files x {rounds}: "
+            f"sequential {sequential_time * 1000:.1f}ms, "
+            f"single scan {single_time * 1000:.1f}ms"
+        )
+        assert single_time < sequential_time
@@ -0,0 +1,54 @@
+import pytest
+from conftest import config_generator
+from tree_verifier import expectations, index_tree, verify_tree
+
+
+@pytest.fixture
+def expected_tree(tmp_path):
+    config = next(config_generator())
+    expected = expectations(config)
+    for d in expected.dirs:
+        (tmp_path / d).mkdir(parents=True, exist_ok=True)
+    for f in expected.files:
+        (tmp_path / f).write_text("rendered\n")
+    return tmp_path, config
+
+
+def test_index_tree(expected_tree):
+    root, config = expected_tree
+    (root / "__pycache__").mkdir()
+    (root / "__pycache__" / "module.pyc").write_bytes(b"\0{{")
+    (root / "README.md").write_text("{{ cookiecutter.project_name }}\n")
+
+    index = index_tree(root)
+
+    assert index.dirs == set(expectations(config).dirs)
+    assert index.files == set(expectations(config).files)
+    assert index.residue == {"README.md"}
+
+
+def test_verify_tree(expected_tree):
+    root, config = expected_tree
+    verify_tree(root, config)
+
+    # the first config uses pyproject.toml, which leaves no environment.yml
+    (root / "environment.yml").write_text("name: project\n")
+    with pytest.raises(AssertionError, match="Extra: {'environment.yml'}"):
+        verify_tree(root, config)
+    with pytest.raises(AssertionError, match="should not exist"):
+        verify_tree(root, config, extra_files=["environment.yml"])
+
+
+def test_verify_tree_residue(expected_tree):
+    root, config = expected_tree
+    (root / "Makefile").write_text("{% if true %}\n")
+
+    with pytest.raises(AssertionError, match="Unrendered Jinja template"):
+        verify_tree(root, config)
+    verify_tree(root, config, ignore_residue=["Makefile"])
+
+
+def test_expectations_cached():
+    config = next(config_generator())
+
+    assert expectations(config) is expectations(dict(config, repo_name="other"))
@@ -0,0 +1,161 @@
+"""
+Verifier for generated projects, shared by the cookiecutter and copier tests.
+
+The tree is indexed in a single ``os.scandir`` walk, which records every
+directory and file and reads each file once to look for unrendered Jinja. The
+expected folders, the expected and absent files and the residue check are then
+answered from that index. The expectations of a config only depend on a few of
+its answers, so they are derived from ENV_MATRIX once per combination of those
+answers.
+"""
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from env_matrix import get_absent_files, get_expected_files
+
+TEMPLATE_STRINGS = [b"{{", b"}}", b"{%", b"%}"]
+
+# created when the project is used, not generated
+EXCLUDED_DIRS = {".ipynb_checkpoints", "__pycache__"}
+
+BASE_DIRS = [
+    ".",
+    "data",
+    "data/external",
+    "data/interim",
+    "data/processed",
+    "data/raw",
+    "docs",
+    "models",
+    "notebooks",
+    "references",
+    "reports",
+    "reports/figures",
+]
+
+# the answers the expected tree depends on
+EXPECTATION_KEYS = (
+    "environment_manager",
+    "dependency_file",
+    "module_name",
+    "open_source_license",
+    "linting_and_formatting",
+    "include_code_scaffold",
+    "docs",
+    "testing_framework",
+    "lock_dependencies",
+)
+
+
+@dataclass(frozen=True)
+class Expectations:
+    dirs: frozenset
+    files: frozenset
+    absent: frozenset
+
+
+@dataclass
+class TreeIndex:
+    """Relative POSIX paths of the directories and files of a tree, and the
+    files that still contain Jinja template strings.
+    """
+
+    dirs: set = field(default_factory=lambda: {"."})
+    files: set = field(default_factory=set)
+    residue: set = field(default_factory=set)
+
+    def add_file(self, path, data):
+        self.files.add(path)
+        if any(s in data for s in TEMPLATE_STRINGS):
+            self.residue.add(path)
+
+
+def index_tree(root):
+    """Index the tree at ``root`` with one scandir walk."""
+    index = TreeIndex()
+    pending = [(os.fspath(root), "")]
+    while pending:
+        directory, prefix = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDED_DIRS:
+                        index.dirs.add(path)
+                        pending.append((entry.path, path + "/"))
+                else:
+                    with open(entry.path, "rb") as f:
+                        index.add_file(path, f.read())
+    return index
+
+
+def index_memory_tree(tree):
+    """Index a ``ccds.hook_utils.tree.MemoryTree``."""
+    index = TreeIndex(dirs=set(tree.dirs))
+    for path, data in tree.files.items():
+        index.add_file(path, data)
+    return index
+
+
+@lru_cache(maxsize=None)
+def _expectations(key):
+    config = dict(zip(EXPECTATION_KEYS, key))
+
+    dirs = BASE_DIRS + [config["module_name"]]
+    if config["include_code_scaffold"] == "Yes":
+        dirs.append(f"{config['module_name']}/modeling")
+    if config["docs"] == "mkdocs":
+        dirs.append("docs/docs")
+    # Tests folder is created when testing_framework != "none"
+    if config["testing_framework"] != "none":
+        dirs.append("tests")
+
+    return Expectations(
+        dirs=frozenset(dirs),
+        files=frozenset(get_expected_files(config)),
+        absent=frozenset(get_absent_files(config)),
+    )
+
+
+def expectations(config):
+    """The expected tree of ``config``, computed once per combination of answers."""
+    defaults = {"open_source_license": "MIT", "testing_framework": "pytest"}
+    return _expectations(
+        tuple(config.get(key, defaults.get(key)) for key in EXPECTATION_KEYS)
+    )
+
+
+def verify_index(index, config, extra_files=(), ignore_residue=()):
+    """Check an index against the expectations of ``config``.
+
+    ``extra_files`` are expected on top of the ENV_MATRIX files (e.g. copier's
+    answers file), and ``ignore_residue`` may legitimately contain Jinja.
+    """
+    expected = expectations(config)
+    label = f"{config['environment_manager']} + {config['dependency_file']}"
+
+    assert index.dirs == expected.dirs, (
+        f"Directory mismatch for {label}\n"
+        f"Missing: {expected.dirs - index.dirs}\n"
+        f"Extra: {index.dirs - expected.dirs}"
+    )
+
+    expected_files = expected.files | set(extra_files)
+    assert index.files == expected_files, (
+        f"File mismatch for {label}\n"
+        f"Missing: {expected_files - index.files}\n"
+        f"Extra: {index.files - expected_files}"
+    )
+
+    present = expected.absent & index.files
+    assert not present, f"{sorted(present)} should not exist for {label}"
+
+    residue = index.residue - set(ignore_residue)
+    assert not residue, f"Unrendered Jinja template in {sorted(residue)}"
+
+
+def verify_tree(root, config, extra_files=(), ignore_residue=()):
+    """Check the project generated at ``root`` for ``config``."""
+    verify_index(index_tree(root), config, extra_files, ignore_residue)
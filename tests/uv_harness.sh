@@ -17,8 +17,8 @@ function finish {
     fi
 
     # Remove Jupyter kernel if registered
-    if [ -d "$HOME/.local/share/jupyter/kernels/$PROJECT_NAME" ]; then
-        rm -rf "$HOME/.local/share/jupyter/kernels/$PROJECT_NAME"
+    if [ -d "${JUPYTER_DATA_DIR:-$HOME/.local/share/jupyter}/kernels/$PROJECT_NAME" ]; then
+        rm -rf "${JUPYTER_DATA_DIR:-$HOME/.local/share/jupyter}/kernels/$PROJECT_NAME"
     fi
 }
 trap finish EXIT
@@ -30,6 +30,9 @@ source $CCDS_ROOT/test_functions.sh
 cd $1
 make
 
+# Restore a snapshot of an environment with the same dependencies, if any
+env_cache restore "$1" uv
+
 # Create and activate virtual environment
 make create_environment
 
@@ -53,4 +56,7 @@ if [ -d "__pycache__" ]; then
     exit 1
 fi
 
+# Snapshot the environment for configs with the same dependencies
+env_cache save "$1" uv
+
 echo "All targets passed!"
@@ -22,8 +22,8 @@ function finish {
     fi
 
     # Remove Jupyter kernel if registered
-    if [ -d "$HOME/.local/share/jupyter/kernels/$PROJECT_NAME" ]; then
-        rm -rf "$HOME/.local/share/jupyter/kernels/$PROJECT_NAME"
+    if [ -d "${JUPYTER_DATA_DIR:-$HOME/.local/share/jupyter}/kernels/$PROJECT_NAME" ]; then
+        rm -rf "${JUPYTER_DATA_DIR:-$HOME/.local/share/jupyter}/kernels/$PROJECT_NAME"
     fi
 }
 trap finish EXIT
@@ -35,6 +35,9 @@ source $CCDS_ROOT/test_functions.sh
 cd $1
 
 make
+
+# Restore a snapshot of an environment with the same dependencies, if any
+env_cache restore "$1" virtualenv
 make create_environment
 
 # Activate the virtualenv - check both standard venv and virtualenvwrapper locations
@@ -68,4 +71,9 @@ if [ -d "__pycache__" ]; then
     exit 1
 fi
 
+# Snapshot the environment for configs with the same dependencies
+if [ -d ".venv" ]; then
+    env_cache save "$1" virtualenv
+fi
+
 echo "All targets passed!"
@@ -1 +1,3 @@
+{% if cookiecutter.include_code_scaffold == 'Yes' -%}
 from {{ cookiecutter.module_name }} import config  # noqa: F401
+{% endif -%}
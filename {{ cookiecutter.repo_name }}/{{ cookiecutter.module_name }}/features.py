@@ -1,3 +1,55 @@
+{% if cookiecutter.pydata_packages == 'performance' -%}
+from pathlib import Path
+
+import duckdb
+from loguru import logger
+from numba import njit, prange
+import numpy as np
+import polars as pl
+import typer
+
+from {{ cookiecutter.module_name }}.config import PROCESSED_DATA_DIR
+
+app = typer.Typer()
+
+
+@njit(parallel=True, cache=True)
+def standardize(values: np.ndarray) -> np.ndarray:
+    """Standardize a column; compiled to machine code and run on every core."""
+    mean = values.mean()
+    std = values.std()
+    if std == 0:
+        std = 1.0
+    result = np.empty_like(values)
+    for i in prange(values.shape[0]):
+        result[i] = (values[i] - mean) / std
+    return result
+
+
+@app.command()
+def main(
+    # ---- REPLACE DEFAULT PATHS AS APPROPRIATE ----
+    input_path: Path = PROCESSED_DATA_DIR / "dataset.parquet",
+    output_path: Path = PROCESSED_DATA_DIR / "features.parquet",
+    # -----------------------------------------
+):
+    # ---- REPLACE THIS WITH YOUR OWN CODE ----
+    logger.info("Generating features from dataset...")
+    # DuckDB queries the Parquet file in place and hands the result to polars
+    # without copying it
+    numeric = duckdb.read_parquet(str(input_path)).pl().select(pl.selectors.numeric())
+    features = numeric.with_columns(
+        pl.Series(name, standardize(numeric[name].to_numpy().astype(np.float64)))
+        for name in numeric.columns
+    )
+    features.write_parquet(output_path)
+    logger.success("Features generation complete.")
+    # -----------------------------------------
+
+
+if __name__ == "__main__":
+    app()
+{% else -%}
 from pathlib import Path
 
 from loguru import logger
@@ -27,3 +79,4 @@ def main(
 
 if __name__ == "__main__":
     app()
+{% endif -%}
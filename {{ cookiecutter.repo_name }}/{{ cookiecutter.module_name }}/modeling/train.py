@@ -1,3 +1,50 @@
+{% if cookiecutter.pydata_packages == 'performance' -%}
+from pathlib import Path
+
+from joblib import Parallel, delayed, dump
+from loguru import logger
+import numpy as np
+import polars as pl
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold
+import typer
+
+from {{ cookiecutter.module_name }}.config import MODELS_DIR, PROCESSED_DATA_DIR
+
+app = typer.Typer()
+
+
+def score_fold(features, labels, train_index, test_index):
+    model = Ridge().fit(features[train_index], labels[train_index])
+    return model.score(features[test_index], labels[test_index])
+
+
+@app.command()
+def main(
+    # ---- REPLACE DEFAULT PATHS AS APPROPRIATE ----
+    features_path: Path = PROCESSED_DATA_DIR / "features.parquet",
+    labels_path: Path = PROCESSED_DATA_DIR / "labels.parquet",
+    model_path: Path = MODELS_DIR / "model.joblib",
+    # -----------------------------------------
+):
+    # ---- REPLACE THIS WITH YOUR OWN CODE ----
+    logger.info("Training some model...")
+    features = pl.read_parquet(features_path).to_numpy()
+    labels = pl.read_parquet(labels_path).to_series().to_numpy()
+    # score the cross-validation folds in parallel, one process per core
+    scores = Parallel(n_jobs=-1)(
+        delayed(score_fold)(features, labels, train_index, test_index)
+        for train_index, test_index in KFold(n_splits=5).split(features)
+    )
+    logger.info(f"Cross-validation R^2: {np.mean(scores):.3f}")
+    dump(Ridge().fit(features, labels), model_path)
+    logger.success("Modeling training complete.")
+    # -----------------------------------------
+
+
+if __name__ == "__main__":
+    app()
+{% else -%}
 from pathlib import Path
 
 from loguru import logger
@@ -28,3 +75,4 @@ def main(
 
 if __name__ == "__main__":
     app()
+{% endif -%}